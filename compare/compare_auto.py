@@ -0,0 +1,34 @@
+import time
+
+import numpy as np
+
+import opt_einsum as oe
+from opt_einsum import slicing
+
+# FLOP count of the greedy path and of the 'auto' paths found within several
+# time budgets, for random networks with three bonds per term
+
+
+def random_network(num_terms, rng):
+    terms = [set() for _ in range(num_terms)]
+    for bond in range(num_terms * 3 // 2):
+        x, y = rng.choice(num_terms, 2, replace=False)
+        terms[x].add(bond)
+        terms[y].add(bond)
+    return terms, set(), {bond: int(rng.randint(2, 8)) for term in terms for bond in term}
+
+
+rng = np.random.RandomState(0)
+for num_terms in [10, 20, 40, 100, 200]:
+    input_sets, output_set, size_dict = random_network(num_terms, rng)
+    greedy = oe.paths.greedy(input_sets, output_set, size_dict, 1e300)
+    greedy_cost = slicing.path_costs(input_sets, output_set, greedy, size_dict)[0]
+
+    line = '%4d terms  greedy %.2e' % (num_terms, greedy_cost)
+    for max_time in [0.01, 0.1, 1.0]:
+        start = time.time()
+        path = oe.paths.auto(input_sets, output_set, size_dict, 1e300, max_time=max_time, seed=0)
+        run_time = time.time() - start
+        cost = slicing.path_costs(input_sets, output_set, path, size_dict)[0]
+        line += '  | %4.2f s budget: %.2e in %.2f s' % (max_time, cost, run_time)
+    print(line)
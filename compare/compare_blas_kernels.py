@@ -0,0 +1,38 @@
+import numpy as np
+import timeit
+
+from opt_einsum import blas, helpers
+
+# Times single GEMM shaped contractions with tensordot, as contract used to,
+# against the reshaped np.dot calls of blas.tensor_blas
+contractions = ['abc,cd->abd',
+                'abc,bcd->ad',
+                'abc,dbc->ad',
+                'cab,cd->abd',
+                'abcd,cdef->abef']
+
+number = 200
+for contraction in contractions:
+    input_str, result = contraction.split('->')
+    input_left, input_right = input_str.split(',')
+    idx_removed = set(input_left) & set(input_right)
+    view_left, view_right = helpers.build_views(input_str, dict.fromkeys(contraction, 30))
+
+    left_pos = tuple(input_left.find(s) for s in idx_removed)
+    right_pos = tuple(input_right.find(s) for s in idx_removed)
+
+    def tensordot():
+        tmp = np.tensordot(view_left, view_right, axes=(left_pos, right_pos))
+        return np.einsum(input_left.translate({ord(s): None for s in idx_removed}) +
+                         input_right.translate({ord(s): None for s in idx_removed}) + '->' + result, tmp)
+
+    def tensor_blas():
+        return blas.tensor_blas(view_left, input_left, view_right, input_right, result, idx_removed)
+
+    assert np.allclose(tensordot(), tensor_blas())
+    tensordot_time = min(timeit.repeat(tensordot, number=number, repeat=3)) / number
+    blas_time = min(timeit.repeat(tensor_blas, number=number, repeat=3)) / number
+
+    print('%-16s %5s  tensordot %8.1f us  tensor_blas %8.1f us  speedup %.2f' %
+          (contraction, blas.can_blas([input_left, input_right], result, idx_removed), tensordot_time * 1e6,
+           blas_time * 1e6, tensordot_time / blas_time))
@@ -0,0 +1,28 @@
+import timeit
+
+import opt_einsum as oe
+from opt_einsum import helpers
+
+# Wall time of the fewest FLOPs paths against those of a calibrated cost model
+model = oe.costs.calibrate(save=False)
+print(model)
+
+contractions = [('ijk,ijl,lm->ikm', {'i': 10, 'j': 100, 'k': 40, 'l': 200, 'm': 100}),
+                ('ijk,ijl,lm->ikm', {'i': 20, 'j': 60, 'k': 30, 'l': 200, 'm': 80}),
+                ('ab,bc,cd->ad', {'a': 400, 'b': 8, 'c': 400, 'd': 400}),
+                ('ab,ac,ad,bcd->', {'a': 50, 'b': 60, 'c': 60, 'd': 60})]
+
+number = 5
+for sum_string, sizes in contractions:
+    views = helpers.build_views(sum_string, sizes)
+    flops_path, flops_info = oe.contract_path(sum_string, *views, path='dp', memory_limit=-1)
+    model_path, model_info = oe.contract_path(sum_string, *views, path='dp', memory_limit=-1, cost_model=model)
+
+    flops_time = min(timeit.repeat(lambda: oe.contract(sum_string, *views, optimize=flops_path), number=number,
+                                   repeat=3)) / number
+    model_time = min(timeit.repeat(lambda: oe.contract(sum_string, *views, optimize=model_path), number=number,
+                                   repeat=3)) / number
+
+    print('%-16s flops %.2e %8.2f ms  model %.2e %8.2f ms  speedup %.2f' %
+          (sum_string, flops_info.opt_cost, flops_time * 1e3, model_info.opt_cost, model_time * 1e3,
+           flops_time / model_time))
@@ -0,0 +1,42 @@
+import time
+
+import numpy as np
+
+import opt_einsum as oe
+from opt_einsum import slicing
+
+# FLOP count of the greedy and graph partitioning paths of random 3-regular
+# networks with bonds of size 2
+
+
+def random_regular(num_terms, rng):
+    while True:
+        stubs = np.repeat(np.arange(num_terms), 3)
+        rng.shuffle(stubs)
+        pairs = [tuple(sorted(x)) for x in stubs.reshape(-1, 2)]
+        if all(x != y for x, y in pairs) and (len(set(pairs)) == len(pairs)):
+            break
+
+    terms = [set() for _ in range(num_terms)]
+    for bond, (x, y) in enumerate(pairs):
+        terms[x].add(bond)
+        terms[y].add(bond)
+    return terms, set(), dict.fromkeys(range(len(pairs)), 2)
+
+
+rng = np.random.RandomState(0)
+for num_terms in [30, 100, 200, 400, 1000]:
+    input_sets, output_set, size_dict = random_regular(num_terms, rng)
+
+    start = time.time()
+    greedy = oe.paths.greedy(input_sets, output_set, size_dict, 1e300)
+    greedy_time = time.time() - start
+
+    start = time.time()
+    partition = oe.paths.graph_partition(input_sets, output_set, size_dict, 1e300)
+    partition_time = time.time() - start
+
+    greedy_cost = slicing.path_costs(input_sets, output_set, greedy, size_dict)[0]
+    partition_cost = slicing.path_costs(input_sets, output_set, partition, size_dict)[0]
+    print('%5d terms  greedy %.2e %6.2f s  partition %.2e %6.2f s  ratio %.1f' %
+          (num_terms, greedy_cost, greedy_time, partition_cost, partition_time, greedy_cost / partition_cost))
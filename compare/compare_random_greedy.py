@@ -0,0 +1,44 @@
+import time
+
+import numpy as np
+
+import opt_einsum as oe
+from opt_einsum import slicing
+
+# FLOP count of the greedy path against random-greedy on random networks with
+# three bonds per term
+
+
+def random_network(num_terms, rng):
+    chars = iter(oe.parser.einsum_symbols)
+    terms = [set() for _ in range(num_terms)]
+    for _ in range(num_terms * 3 // 2):
+        x, y = rng.choice(num_terms, 2, replace=False)
+        char = next(chars)
+        terms[x].add(char)
+        terms[y].add(char)
+
+    output_set = set()
+    for _ in range(2):
+        char = next(chars)
+        terms[rng.randint(num_terms)].add(char)
+        output_set.add(char)
+
+    size_dict = {char: int(rng.randint(2, 8)) for term in terms for char in term}
+    return terms, output_set, size_dict
+
+
+rng = np.random.RandomState(0)
+for num_terms in [10, 15, 20, 30]:
+    input_sets, output_set, size_dict = random_network(num_terms, rng)
+
+    greedy = oe.paths.greedy(input_sets, output_set, size_dict, int(1e20))
+    greedy_cost = slicing.path_costs(input_sets, output_set, greedy, size_dict)[0]
+
+    start = time.time()
+    path = oe.paths.random_greedy(input_sets, output_set, size_dict, int(1e20), trials=64, seed=0)
+    elapsed = time.time() - start
+    random_cost = slicing.path_costs(input_sets, output_set, path, size_dict)[0]
+
+    print('%3d terms  greedy %.3e  random-greedy %.3e  ratio %6.1f  %.2f s' %
+          (num_terms, greedy_cost, random_cost, greedy_cost / random_cost, elapsed))
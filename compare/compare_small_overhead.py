@@ -0,0 +1,21 @@
+import numpy as np
+import timeit
+
+import opt_einsum as oe
+
+# Python overhead of contract relative to einsum for small contractions
+a = np.random.rand(3, 4)
+b = np.random.rand(4, 5)
+c = np.random.rand(5, 2)
+
+contractions = [('ij,jk->ik', (a, b)),
+                ('ij,jk,kl->il', (a, b, c)),
+                ('ij,ij->', (a, a))]
+
+number = 20000
+for sum_string, views in contractions:
+    einsum_time = min(timeit.repeat(lambda: np.einsum(sum_string, *views), number=number, repeat=3)) / number
+    contract_time = min(timeit.repeat(lambda: oe.contract(sum_string, *views), number=number, repeat=3)) / number
+
+    print('%-14s einsum %6.2f us  contract %6.2f us  ratio %.2f' %
+          (sum_string, einsum_time * 1e6, contract_time * 1e6, contract_time / einsum_time))
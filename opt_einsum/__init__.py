@@ -1,6 +1,11 @@
-from .contract import contract, contract_path, contract_expression
+from .contract import contract, contract_path, contract_expression, PathInfo
 from . import paths
+from . import backends
 from . import blas
+from . import cache
+from . import costs
+from . import memory
+from . import slicing
 from . import helpers
 
 
@@ -0,0 +1,251 @@
+"""
+Dispatches the einsum, tensordot and transpose calls of a contraction to the
+library of the operands, so that for example Dask or torch arrays are
+contracted without being converted to NumPy
+"""
+
+import importlib
+
+import numpy as np
+
+# The module holding the array functions of each backend
+_backend_modules = {
+    'numpy': 'numpy',
+    'dask': 'dask.array',
+    'torch': 'torch',
+    'sparse': 'sparse',
+}
+
+
+def _torch_einsum(torch):
+    """torch.einsum, with more than two operands contracted left to right.
+    Given more than two operands torch searches for a path itself, through
+    the installed opt_einsum, while the step was already planned here.
+    """
+
+    def einsum(einsum_str, *operands):
+        if len(operands) <= 2:
+            return torch.einsum(einsum_str, *operands)
+
+        input_str, result = einsum_str.split('->')
+        terms = input_str.split(',')
+        new_view, current = operands[0], terms[0]
+        for num in range(1, len(terms)):
+            if num == len(terms) - 1:
+                new_term = result
+            else:
+                keep = set(result).union(*terms[num + 1:])
+                new_term = "".join(sorted(set(x for x in current + terms[num] if x in keep)))
+            new_view = torch.einsum(current + ',' + terms[num] + '->' + new_term, new_view, operands[num])
+            current = new_term
+
+        return new_view
+
+    return einsum
+
+
+# Functions that are named or called differently from NumPy
+_torch_funcs = {
+    'einsum': _torch_einsum,
+    'tensordot': lambda torch: lambda x, y, axes: torch.tensordot(x, y, dims=axes),
+    'transpose': lambda torch: lambda x, perm: x.permute(*perm),
+    'asarray': lambda torch: lambda x: torch.as_tensor(np.asarray(x)),
+}
+
+_sparse_funcs = {
+    'transpose': lambda sparse: lambda x, perm: x.transpose(perm),
+    'asarray': lambda sparse: lambda x: sparse.COO.from_numpy(np.asarray(x)),
+}
+
+_special_funcs = {
+    'torch': _torch_funcs,
+    'sparse': _sparse_funcs,
+}
+
+_cached_funcs = {}
+
+
+def infer_backend(x):
+    """
+    Finds the backend of an array from the package its type is defined in.
+    Arrays of other packages, lists and scalars are converted to NumPy.
+
+    Parameters
+    ----------
+    x : array_like
+        An operand of the contraction.
+
+    Returns
+    -------
+    backend : str
+        The name of the backend.
+
+    Examples
+    --------
+    >>> infer_backend(np.ones(3))
+    'numpy'
+    >>> infer_backend(da.ones(3))
+    'dask'
+    """
+
+    backend = x.__class__.__module__.split('.')[0]
+    if backend not in _backend_modules:
+        return 'numpy'
+    return backend
+
+
+def get_func(func, backend):
+    """
+    Imports the ``func`` ('einsum', 'tensordot', 'transpose' or 'asarray') of
+    a backend on first use, so that backends are only required when they are
+    used.
+
+    Parameters
+    ----------
+    func : str
+        The name of the function.
+    backend : str
+        The name of the backend.
+
+    Returns
+    -------
+    fn : callable
+        The function, called like its NumPy namesake.
+    """
+
+    try:
+        return _cached_funcs[func, backend]
+    except KeyError:
+        pass
+
+    if backend not in _backend_modules:
+        raise ValueError("Unknown backend '%s', valid backends are: %s." % (backend, sorted(_backend_modules)))
+
+    try:
+        module = importlib.import_module(_backend_modules[backend])
+    except ImportError:
+        raise ImportError("The '%s' backend requires the '%s' package to be installed." % (backend, backend))
+
+    special = _special_funcs.get(backend, {})
+    if func in special:
+        fn = special[func](module)
+    else:
+        fn = getattr(module, func)
+
+    _cached_funcs[func, backend] = fn
+    return fn
+
+
+def to_backend(x, backend):
+    """
+    Converts an operand to an array of ``backend``, arrays of the backend
+    are returned as they are.
+
+    Parameters
+    ----------
+    x : array_like
+        An operand of the contraction.
+    backend : str
+        The name of the backend.
+
+    Returns
+    -------
+    array : array_like
+        ``x`` as an array of ``backend``.
+
+    Examples
+    --------
+    >>> to_backend(np.ones(3), 'torch')
+    tensor([1., 1., 1.], dtype=torch.float64)
+    """
+
+    if infer_backend(x) == backend:
+        return x
+    return get_func('asarray', backend)(x)
+
+
+def contract_step(tmp_operands, contraction, backend):
+    """
+    Performs a single contraction of a ``contraction_list`` with the
+    functions of ``backend``. Steps that can use BLAS are a tensordot
+    followed by a transpose, all others an einsum call with any 0-d
+    operands multiplied in afterwards.
+
+    Parameters
+    ----------
+    tmp_operands : list of array_like
+        The operands of the step.
+    contraction : tuple
+        An entry of the contraction list of
+        ``contract_path(..., einsum_call=True)``.
+    backend : str
+        The name of the backend.
+
+    Returns
+    -------
+    result : array_like
+        The result of the step, an array of ``backend``.
+    """
+
+    inds, idx_rm, einsum_str, remaining, do_blas = contraction
+    input_str, results_index = einsum_str.split('->')
+
+    if not do_blas:
+        # Scalars are multiplied in, as e.g. sparse cannot einsum a 0-d
+        # array with a non-zero fill value
+        terms = input_str.split(',')
+        if all(terms):
+            return get_func('einsum', backend)(einsum_str, *tmp_operands)
+
+        scalars = [x for x, term in zip(tmp_operands, terms) if not term]
+        if any(terms):
+            arrays = [x for x, term in zip(tmp_operands, terms) if term]
+            new_view = get_func('einsum', backend)(','.join(x for x in terms if x) + '->' + results_index, *arrays)
+        else:
+            new_view = scalars.pop()
+        for scalar in scalars:
+            new_view = new_view * scalar
+        return new_view
+
+    input_left, input_right = input_str.split(',')
+
+    # Contract over the removed indices, keeping the others in order
+    idx_rm = sorted(idx_rm)
+    axes = (tuple(input_left.find(s) for s in idx_rm), tuple(input_right.find(s) for s in idx_rm))
+    new_view = get_func('tensordot', backend)(tmp_operands[0], tmp_operands[1], axes)
+
+    tensor_result = "".join(s for s in input_left + input_right if s not in idx_rm)
+    if tensor_result != results_index:
+        perm = tuple(tensor_result.find(s) for s in results_index)
+        new_view = get_func('transpose', backend)(new_view, perm)
+
+    return new_view
+
+
+def contract(operands, contraction_list, backend):
+    """
+    Performs a contraction given the output of
+    ``contract_path(..., einsum_call=True)`` with the functions of
+    ``backend``.
+
+    Parameters
+    ----------
+    operands : list of array_like
+        The arrays of the contraction.
+    contraction_list : list of tuples
+        The contraction list of ``contract_path(..., einsum_call=True)``.
+    backend : str
+        The name of the backend.
+
+    Returns
+    -------
+    result : array_like
+        The result of the contraction, an array of ``backend``.
+    """
+
+    operands = list(operands)
+    for contraction in contraction_list:
+        tmp_operands = [operands.pop(x) for x in contraction[0]]
+        operands.append(contract_step(tmp_operands, contraction, backend))
+
+    return operands[0]
@@ -64,6 +64,10 @@ def can_blas(inputs, result, idx_removed):
     if any(len(l) != len(s) for l, s in zip(inputs, sets)):
         return False
 
+    # Indices summed over in one input only are left to einsum
+    if not idx_removed <= (sets[0] & sets[1]):
+        return False
+
     # Cannot handle partial inner
     if len(keep_left & keep_right):
         return False
@@ -101,7 +105,7 @@ def can_blas(inputs, result, idx_removed):
         return 'TDOT'
 
 
-def tensor_blas(view_left, input_left, view_right, input_right, index_result, idx_removed):
+def tensor_blas(view_left, input_left, view_right, input_right, index_result, idx_removed, out=None):
     """
     Computes the dot product between two tensors, attempts to use np.dot and
     then tensordot if that fails.
@@ -120,6 +124,8 @@ def tensor_blas(view_left, input_left, view_right, input_right, index_result, id
         The resulting indices
     idx_removed : set
         Indices removed in the contraction
+    out : array_like, optional
+        A C contiguous array of the result shape and type to write into.
 
     Returns
     -------
@@ -180,31 +186,38 @@ def tensor_blas(view_left, input_left, view_right, input_right, index_result, id
     for s in idx_removed:
         tensor_result = tensor_result.replace(s, "")
 
+    # GEMM results in the right order can be written straight into out
+    gemm_out = None
+    if (out is not None) and (tensor_result == index_result):
+        gemm_out = out.reshape(dim_left, dim_right)
+
     # This is ugly, but can vastly speed up certain operations
     # Vectordot
     if input_left == input_right:
         new_view = np.dot(view_left.ravel(), view_right.ravel())
+        gemm_out = None
 
     # Matrix multiply
     # No transpose needed
     elif input_left[-rs:] == input_right[:rs]:
         new_view = np.dot(view_left.reshape(dim_left, dim_removed),
-                          view_right.reshape(dim_removed, dim_right))
+                          view_right.reshape(dim_removed, dim_right), out=gemm_out)
 
-    # Transpose both
+    # Transpose both, np.dot does not accept out here
     elif input_left[:rs] == input_right[-rs:]:
         new_view = np.dot(view_left.reshape(dim_removed, dim_left).T,
                           view_right.reshape(dim_right, dim_removed).T)
+        gemm_out = None
 
     # Transpose right
     elif input_left[-rs:] == input_right[-rs:]:
         new_view = np.dot(view_left.reshape(dim_left, dim_removed),
-                          view_right.reshape(dim_right, dim_removed).T)
+                          view_right.reshape(dim_right, dim_removed).T, out=gemm_out)
 
     # Tranpose left
     elif input_left[:rs] == input_right[:rs]:
         new_view = np.dot(view_left.reshape(dim_removed, dim_left).T,
-                          view_right.reshape(dim_removed, dim_right))
+                          view_right.reshape(dim_removed, dim_right), out=gemm_out)
 
     # Conventional tensordot
     else:
@@ -214,6 +227,7 @@ def tensor_blas(view_left, input_left, view_right, input_right, index_result, id
             left_pos += (input_left.find(s),)
             right_pos += (input_right.find(s),)
         new_view = np.tensordot(view_left, view_right, axes=(left_pos, right_pos))
+        gemm_out = None
 
     # Make sure the resulting shape is correct
     tensor_shape = tuple(dimension_dict[x] for x in tensor_result)
@@ -223,7 +237,220 @@ def tensor_blas(view_left, input_left, view_right, input_right, index_result, id
         else:
             new_view = np.squeeze(new_view)
 
+    if out is not None:
+        if gemm_out is not None:
+            return out
+        np.einsum(tensor_result + '->' + index_result, new_view, out=out)
+        return out
+
+    if tensor_result != index_result:
+        new_view = np.einsum(tensor_result + '->' + index_result, new_view)
+
+    return new_view
+
+
+def batch_blas(view_left, input_left, view_right, input_right, index_result, idx_removed):
+    """
+    Computes the dot product between two stacks of tensors that share a
+    leading batch index with a single ``np.matmul`` call.
+
+    Parameters
+    ----------
+    view_left : array_like
+        The left hand view
+    input_left : str
+        Indices of the left view, starting with the batch index
+    view_right : array_like
+        The right hand view
+    input_right : str
+        Indices of the right view, starting with the batch index
+    index_result : str
+        The resulting indices
+    idx_removed : set
+        Indices removed in the contraction
+
+    Returns
+    -------
+    type : array
+        The resulting batched BLAS operation.
+
+    Examples
+    --------
+
+    >>> a = np.random.rand(10, 4, 4)
+    >>> b = np.random.rand(10, 4, 4)
+    >>> tmp = batch_blas(a, 'zij', b, 'zjk', 'zik', set('j'))
+    >>> np.allclose(tmp, np.einsum('zij,zjk->zik', a, b))
+
+    """
+
+    batch = input_left[0]
+    removed = "".join(x for x in input_left if x in idx_removed)
+    keep_left = "".join(x for x in input_left[1:] if x not in idx_removed)
+    keep_right = "".join(x for x in input_right[1:] if x not in idx_removed)
+
+    dimension_dict = dict(zip(input_left, view_left.shape))
+    dimension_dict.update(zip(input_right, view_right.shape))
+    dim_batch = dimension_dict[batch]
+    dim_left = helpers.compute_size_by_dict(keep_left, dimension_dict)
+    dim_right = helpers.compute_size_by_dict(keep_right, dimension_dict)
+    dim_removed = helpers.compute_size_by_dict(removed, dimension_dict)
+
+    # Bring both stacks into matrix order, only copies if the layout needs it
+    left_str = batch + keep_left + removed
+    right_str = batch + removed + keep_right
+    view_left = view_left.transpose([input_left.index(x) for x in left_str])
+    view_right = view_right.transpose([input_right.index(x) for x in right_str])
+
+    new_view = np.matmul(view_left.reshape(dim_batch, dim_left, dim_removed),
+                         view_right.reshape(dim_batch, dim_removed, dim_right))
+
+    tensor_result = batch + keep_left + keep_right
+    new_view = new_view.reshape(tuple(dimension_dict[x] for x in tensor_result))
+
     if tensor_result != index_result:
         new_view = np.einsum(tensor_result + '->' + index_result, new_view)
 
     return new_view
+
+
+def blas_copies(inputs, result, idx_removed, blas_type):
+    """
+    Counts the full array copies ``tensor_blas`` makes for a contraction,
+    either to bring the operands of a tensordot into matrix form or because
+    the result of the BLAS call is in a different index order than
+    ``result``.
+
+    Parameters
+    ----------
+    inputs : list of str
+        Specifies the subscripts for summation.
+    result : str
+        Resulting summation.
+    idx_removed : set
+        Indices that are removed in the summation
+    blas_type : str or bool
+        The type of BLAS call as returned by ``can_blas``.
+
+    Returns
+    -------
+    copies : int
+        The number of copies made.
+
+    Examples
+    --------
+    >>> blas_copies(['ij', 'jk'], 'ik', set('j'), 'GEMM')
+    0
+
+    >>> blas_copies(['ij', 'jk'], 'ki', set('j'), 'GEMM')
+    1
+    """
+
+    if not blas_type:
+        return 0
+
+    copies = int(blas_type == 'TDOT')
+
+    tensor_result = "".join(x for x in inputs[0] + inputs[1] if x not in idx_removed)
+    if tensor_result != result:
+        copies += 1
+
+    return copies
+
+
+def plan_layout(terms, steps, output, dimension_dict):
+    """
+    Chooses the index order of each intermediate so that it can be used as a
+    matrix by the BLAS call that consumes it. An intermediate keeps the order
+    its own BLAS call produces it in, unless the indices the next contraction
+    removes are not grouped at its front or back; then they are moved to the
+    back of a left operand or the front of a right operand, in the order of
+    the other operand.
+
+    Parameters
+    ----------
+    terms : list of str
+        The input terms of the contraction.
+    steps : list of tuples
+        The ``(ids, out_inds, idx_removed)`` of each contraction, where
+        ``ids`` are the terms contracted in the order they are passed to the
+        contraction. The result of step ``k`` is term ``len(terms) + k``.
+    output : str
+        The output term of the contraction.
+    dimension_dict : dictionary
+        Dictionary of index sizes
+
+    Returns
+    -------
+    orders : list of str
+        The index order of the result of each step.
+
+    Examples
+    --------
+    >>> steps = [([1, 0], set('acd'), set('b')), ([3, 2], set('ae'), set('cd'))]
+    >>> plan_layout(['ab', 'bcd', 'cde'], steps, 'ae', {'a': 3, 'b': 5, 'c': 2, 'd': 4, 'e': 6})
+    ['cda', 'ae']
+    """
+
+    num_inputs = len(terms)
+    terms = list(terms) + [None] * len(steps)
+
+    consumers = {}
+    for num, (ids, out_inds, idx_removed) in enumerate(steps):
+        for pos, x in enumerate(ids):
+            consumers[x] = (num, pos)
+
+    orders = []
+    for num, (ids, out_inds, idx_removed) in enumerate(steps):
+        if num == len(steps) - 1:
+            orders.append(output)
+            break
+
+        # The order the contraction itself produces
+        inputs = [terms[x] for x in ids]
+        produced_by_blas = bool(can_blas(inputs, out_inds, idx_removed))
+        if produced_by_blas:
+            order = "".join(x for x in inputs[0] + inputs[1] if x not in idx_removed)
+        else:
+            order = "".join(sorted(out_inds, key=lambda x: (dimension_dict[x], x)))
+
+        # Only pairwise contractions over all shared indices can be BLAS calls
+        cnum, pos = consumers[num_inputs + num]
+        cids, cout_inds, cidx_removed = steps[cnum]
+        partner = cids[1 - pos] if len(cids) == 2 else None
+        if partner is not None:
+            partner_set = set(terms[partner]) if partner < num_inputs else steps[partner - num_inputs][1]
+            if cidx_removed and (cidx_removed == (partner_set & out_inds)):
+                rs = len(cidx_removed)
+                if terms[partner] is not None:
+                    group = "".join(x for num, x in enumerate(terms[partner])
+                                    if (x in cidx_removed) and (x not in terms[partner][:num]))
+                    grouped = group in (order[:rs], order[-rs:])
+                else:
+                    group = "".join(x for x in order if x in cidx_removed)
+                    grouped = cidx_removed in (set(order[:rs]), set(order[-rs:]))
+
+                # Reordering the result of a BLAS call costs a copy as well
+                if not (grouped or produced_by_blas):
+                    keep = "".join(x for x in order if x not in cidx_removed)
+                    order = keep + group if pos == 0 else group + keep
+
+        terms[num_inputs + num] = order
+        orders.append(order)
+
+    return orders
+
+
+def layout_copies(terms, steps, orders):
+    """
+    Counts the copies ``tensor_blas`` makes along a contraction when the
+    intermediates have the index orders ``orders``, see ``plan_layout``.
+    """
+
+    terms = list(terms) + list(orders)
+    copies = 0
+    for num, (ids, out_inds, idx_removed) in enumerate(steps):
+        inputs = [terms[x] for x in ids]
+        copies += blas_copies(inputs, orders[num], idx_removed, can_blas(inputs, out_inds, idx_removed))
+
+    return copies
@@ -0,0 +1,184 @@
+"""
+Caches of contraction paths so that repeated contractions skip path finding
+"""
+
+import collections
+import os
+import pickle
+import sqlite3
+
+from . import parser
+
+
+def path_key(input_subscripts, output_subscript, dimension_dict, memory_limit, use_blas, path_type):
+    """
+    Builds the key of a contraction path. Indices are relabeled in order of
+    appearance, so that for example ``'ij,jk->ik'`` and ``'ab,bc->ac'`` with
+    the same sizes share a key.
+
+    Parameters
+    ----------
+    input_subscripts : str
+        The parsed input subscripts, e.g. ``'ij,jk'``.
+    output_subscript : str
+        The parsed output subscript, e.g. ``'ik'``.
+    dimension_dict : dictionary
+        Dictionary of index sizes
+    memory_limit : int
+        The maximum number of elements in a temporary array
+    use_blas : bool
+        If BLAS is used for the contraction.
+    path_type : str
+        The type of path, e.g. ``'greedy'``.
+
+    Returns
+    -------
+    key : tuple
+        A hashable key of the contraction path.
+
+    Examples
+    --------
+    >>> path_key('ij,jk', 'ik', {'i': 2, 'j': 3, 'k': 4}, 24, True, 'greedy')
+    ('ab,bc->ac', (2, 3, 4), 24, True, 'greedy')
+    """
+
+    mapping = {}
+    for char in input_subscripts.replace(',', ''):
+        if char not in mapping:
+            mapping[char] = parser.einsum_symbols[len(mapping)]
+
+    subscripts = "".join(mapping.get(x, x) for x in input_subscripts + '->' + output_subscript)
+    sizes = tuple(dimension_dict[x] for x in sorted(mapping, key=mapping.get))
+
+    return (subscripts, sizes, memory_limit, use_blas, path_type)
+
+
+class PathCache(object):
+    """
+    In memory cache of contraction paths with least recently used eviction,
+    which can be given to ``contract`` and ``contract_path`` as ``cache=``.
+
+    Parameters
+    ----------
+    maxsize : int, optional (default: 1024)
+        The maximum number of paths held in memory.
+    filename : str, optional
+        A pickle file the cache is loaded from, if it exists, and written to
+        by ``save``.
+
+    Examples
+    --------
+    >>> cache = PathCache(filename='paths.pkl')
+    >>> path_info = contract_path('ij,jk,kl->il', a, b, c, cache=cache)
+    >>> cache.save()
+    """
+
+    def __init__(self, maxsize=1024, filename=None):
+        self.maxsize = maxsize
+        self.filename = filename
+        self.hits = 0
+        self.misses = 0
+        self._paths = collections.OrderedDict()
+
+        if (filename is not None) and os.path.isfile(filename):
+            with open(filename, 'rb') as handle:
+                for key, path in pickle.load(handle):
+                    self._store(key, path)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, key):
+        return key in self._paths
+
+    def _store(self, key, path):
+        self._paths.pop(key, None)
+        self._paths[key] = path
+        while len(self._paths) > self.maxsize:
+            self._paths.popitem(last=False)
+
+    def get(self, key):
+        """Returns the path of ``key``, or None if it is not cached."""
+
+        try:
+            path = self._paths.pop(key)
+        except KeyError:
+            self.misses += 1
+            return None
+
+        # Reinsert to mark as most recently used
+        self._paths[key] = path
+        self.hits += 1
+        return path
+
+    def put(self, key, path):
+        """Caches the path of ``key``."""
+        self._store(key, list(path))
+
+    def clear(self):
+        """Empties the in memory cache."""
+        self._paths.clear()
+
+    def save(self, filename=None):
+        """Writes the in memory cache to a pickle file."""
+
+        filename = filename or self.filename
+        if filename is None:
+            raise ValueError("No filename to save the path cache to.")
+
+        with open(filename, 'wb') as handle:
+            pickle.dump(list(self._paths.items()), handle, protocol=2)
+
+
+class SQLitePathCache(PathCache):
+    """
+    A ``PathCache`` backed by a local SQLite database. Paths are written
+    through to the database as they are found and read from it when they
+    are not held in memory, so that other processes can reuse them.
+
+    Parameters
+    ----------
+    filename : str
+        The SQLite database file, created if it does not exist.
+    maxsize : int, optional (default: 1024)
+        The maximum number of paths held in memory.
+    """
+
+    def __init__(self, filename, maxsize=1024):
+        super(SQLitePathCache, self).__init__(maxsize=maxsize)
+        self.filename = filename
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS paths (key TEXT PRIMARY KEY, path BLOB)")
+        self._connection.commit()
+
+    def get(self, key):
+        """Returns the path of ``key``, or None if it is not cached."""
+
+        if key in self._paths:
+            return super(SQLitePathCache, self).get(key)
+
+        row = self._connection.execute("SELECT path FROM paths WHERE key = ?", (repr(key), )).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        path = pickle.loads(bytes(row[0]))
+        self._store(key, path)
+        return path
+
+    def put(self, key, path):
+        """Caches the path of ``key`` and writes it to the database."""
+
+        super(SQLitePathCache, self).put(key, path)
+        blob = sqlite3.Binary(pickle.dumps(list(path), protocol=2))
+        self._connection.execute("INSERT OR REPLACE INTO paths (key, path) VALUES (?, ?)", (repr(key), blob))
+        self._connection.commit()
+
+    def save(self, filename=None):
+        """Paths are written as they are found, commits any pending writes."""
+        self._connection.commit()
+
+    def close(self):
+        """Closes the database connection."""
+        self._connection.close()
@@ -2,12 +2,149 @@
 Contains the primary optimization and contraction routines
 """
 
+import collections
+import itertools
+import multiprocessing
+import timeit
+
 import numpy as np
 
+from . import backends
 from . import blas
+from . import cache as path_cache
 from . import helpers
+from . import memory
 from . import paths
 from . import parser
+from . import slicing as path_slicing
+
+
+class PathInfo(object):
+    """
+    Information about a contraction path returned by ``contract_path``. The
+    printable report is only built when the object is converted to a string.
+
+    Attributes
+    ----------
+    path : list of tuples
+        The einsum path
+    contraction_list : list of tuples
+        The individual contractions, as used by ``contract``.
+    naive_cost : int
+        The FLOP count of the contraction in a single einsum call.
+    opt_cost : int
+        The FLOP count of the contraction along ``path``.
+    speedup : float
+        The ratio of the naive to the optimized FLOP count.
+    naive_scaling : int
+        The number of indices of the contraction in a single einsum call.
+    optimized_scaling : int
+        The largest number of indices of any contraction along ``path``.
+    scale_list : list of int
+        The number of indices of each contraction along ``path``.
+    size_list : list of int
+        The number of elements of each intermediate along ``path``.
+    largest_intermediate : int
+        The number of elements of the largest intermediate.
+    copies : int
+        The number of full array copies the BLAS calls along ``path`` make.
+    copies_avoided : int
+        The number of copies saved by ordering the indices of intermediates
+        for the BLAS calls that consume them.
+    sliced_inds : str
+        The indices looped over to fit ``memory_limit``, see ``slicing``.
+    sliced_sizes : dictionary
+        The number of values of each sliced index taken in a slice.
+    num_slices : int
+        The number of slices of the contraction.
+    sliced_cost : int
+        The FLOP count of all slices together.
+    slicing_overhead : float
+        The ratio of the sliced to the optimized FLOP count.
+    sliced_largest_intermediate : int
+        The number of elements of the largest intermediate of a slice.
+    """
+
+    def __init__(self, path, contraction_list, input_subscripts, output_subscript, indices, dimension_dict, opt_cost,
+                 scale_list, size_list, copies=0, copies_avoided=0, sliced_inds="", sliced_cost=None,
+                 sliced_largest_intermediate=None, sliced_sizes=None):
+        self.path = path
+        self.contraction_list = contraction_list
+        self.input_subscripts = input_subscripts
+        self.output_subscript = output_subscript
+        self.indices = indices
+        self.dimension_dict = dimension_dict
+        self.opt_cost = opt_cost
+        self.scale_list = scale_list
+        self.size_list = size_list
+        self.copies = copies
+        self.copies_avoided = copies_avoided
+        self.sliced_inds = sliced_inds
+        self.sliced_cost = opt_cost if sliced_cost is None else sliced_cost
+        self.sliced_largest_intermediate = sliced_largest_intermediate
+        self.sliced_sizes = sliced_sizes or dict.fromkeys(sliced_inds, 1)
+
+    @property
+    def naive_cost(self):
+        # This isnt quite right, need to look into exactly how einsum does this
+        input_terms = self.input_subscripts.split(',')
+        inner_product = (sum(len(set(x)) for x in input_terms) - len(self.indices)) > 0
+        return helpers.flop_count(self.indices, inner_product, len(input_terms), self.dimension_dict)
+
+    @property
+    def speedup(self):
+        return self.naive_cost / float(self.opt_cost)
+
+    @property
+    def naive_scaling(self):
+        return len(self.indices)
+
+    @property
+    def optimized_scaling(self):
+        return max(self.scale_list)
+
+    @property
+    def largest_intermediate(self):
+        return max(self.size_list)
+
+    @property
+    def num_slices(self):
+        return path_slicing.count_slices(self.sliced_sizes, self.dimension_dict)
+
+    @property
+    def slicing_overhead(self):
+        return self.sliced_cost / float(self.opt_cost)
+
+    def __repr__(self):
+        overall_contraction = self.input_subscripts + "->" + self.output_subscript
+        header = ("scaling", "BLAS", "current", "remaining")
+
+        path_print = ["  Complete contraction:  %s\n" % overall_contraction,
+                      "         Naive scaling:  %d\n" % self.naive_scaling,
+                      "     Optimized scaling:  %d\n" % self.optimized_scaling,
+                      "      Naive FLOP count:  %.3e\n" % self.naive_cost,
+                      "  Optimized FLOP count:  %.3e\n" % self.opt_cost,
+                      "   Theoretical speedup:  %3.3f\n" % self.speedup,
+                      "  Largest intermediate:  %.3e elements\n" % self.largest_intermediate,
+                      "   Intermediate copies:  %d (%d avoided)\n" % (self.copies, self.copies_avoided)]
+
+        if self.sliced_inds:
+            sliced_flops = (self.sliced_cost, self.slicing_overhead)
+            path_print += ["        Sliced indices:  %s (%d slices)\n" % (self.sliced_inds, self.num_slices),
+                           "     Sliced FLOP count:  %.3e (%.3f overhead)\n" % sliced_flops,
+                           "   Sliced intermediate:  %.3e elements\n" % self.sliced_largest_intermediate]
+
+        path_print += ["-" * 80 + "\n", "%6s %6s %24s %40s\n" % header, "-" * 80]
+
+        for n, contraction in enumerate(self.contraction_list):
+            inds, idx_rm, einsum_str, remaining, do_blas = contraction
+            remaining_str = ",".join(remaining) + "->" + self.output_subscript
+            path_run = (self.scale_list[n], do_blas, einsum_str, remaining_str)
+            path_print.append("\n%4d %9s %24s %40s" % path_run)
+
+        return "".join(path_print)
+
+    __str__ = __repr__
 
 
 def contract_path(*operands, **kwargs):
@@ -30,18 +167,48 @@ def contract_path(*operands, **kwargs):
         - 'optimal' An algorithm that tries all possible ways of
             contracting the listed tensors. Scales exponentially with
             the number of terms in the contraction.
+        - 'dp' A dynamic programming algorithm that finds the same
+            lowest cost path as 'optimal' by reusing the cheapest way of
+            building each intermediate. Practical for up to about 20 terms.
+        - 'random-greedy' Samples many greedy paths, drawing each pair
+            to contract with Boltzmann weights, and keeps the cheapest.
+            For 10-30 terms, ``paths.RandomGreedy`` sets the number of
+            trials, a time budget and a seed.
+        - 'partition' Recursively bisects the network so that few and
+            small indices join the halves, and searches groups of up to 8
+            terms exactly. For hundreds or thousands of terms, see
+            ``paths.GraphPartition``.
+        - 'auto' Finds the 'greedy' path, then improves on it with the
+            searches above until 0.1 seconds have passed and returns the
+            cheapest path found. ``paths.Auto`` sets the time budget.
     use_blas : bool
         Use BLAS functions or not
 
     memory_limit : int, optional (default: largest input or output array size)
         Maximum number of elements allowed in intermediate arrays.
+    parallel : int, optional (default: None)
+        Number of processes to search the 'optimal' or 'random-greedy' path
+        with, the path found is identical to that of the serial search.
+    cache : PathCache, optional (default: None)
+        A cache of paths, see ``opt_einsum.cache``. Paths are looked up by the
+        subscripts, dimensions, ``memory_limit``, ``use_blas`` and path type
+        and only searched for if they were not cached.
+    slicing : bool, optional (default: False)
+        Search for a path without a memory limit and pick indices to loop
+        over, so that the intermediates of each slice fit in ``memory_limit``.
+        The indices are given by ``path_info.sliced_inds`` and are looped
+        over in chunks of ``path_info.sliced_sizes`` values.
+    cost_model : CostModel, optional (default: None)
+        Find the path with the lowest estimated time under a model of
+        FLOPs, bytes moved and kernel speeds rather than the fewest FLOPs,
+        see ``opt_einsum.costs``. The reported costs are still FLOPs.
 
     Returns
     -------
     path : list of tuples
         The einsum path
-    string_repr : str
-        A printable representation of the path
+    path_info : PathInfo
+        The costs of the path, printing it gives a report of the contraction
 
     Notes
     -----
@@ -104,13 +271,18 @@ def contract_path(*operands, **kwargs):
     """
 
     # Make sure all keywords are valid
-    valid_contract_kwargs = ['path', 'memory_limit', 'einsum_call', 'use_blas']
+    valid_contract_kwargs = ['path', 'memory_limit', 'einsum_call', 'use_blas', 'parallel', 'cache', 'slicing',
+                             'cost_model']
     unknown_kwargs = [k for (k, v) in kwargs.items() if k not in valid_contract_kwargs]
     if len(unknown_kwargs):
         raise TypeError("einsum_path: Did not understand the following kwargs: %s" % unknown_kwargs)
 
     path_type = kwargs.pop('path', 'greedy')
     memory_limit = kwargs.pop('memory_limit', None)
+    parallel = kwargs.pop('parallel', None)
+    cache = kwargs.pop('cache', None)
+    slicing = kwargs.pop('slicing', False)
+    cost_model = kwargs.pop('cost_model', None)
 
     # Hidden option, only einsum should call this
     einsum_call_arg = kwargs.pop("einsum_call", False)
@@ -136,7 +308,7 @@ def contract_path(*operands, **kwargs):
                              "correct number of indices for operand %d.", input_subscripts[tnum], tnum)
         for cnum, char in enumerate(term):
             dim = sh[cnum]
-            if char in dimension_dict.keys():
+            if char in dimension_dict:
                 if dimension_dict[char] != dim:
                     raise ValueError("Size of label '%s' for operand %d does " "not match previous terms.", char, tnum)
             else:
@@ -159,15 +331,26 @@ def contract_path(*operands, **kwargs):
         else:
             memory_arg = int(memory_limit)
 
-    # Compute naive cost
-    # This isnt quite right, need to look into exactly how einsum does this
-    # indices_in_input = input_subscripts.replace(',', '')
-    # inne
-    inner_product = (sum(len(x) for x in input_sets) - len(indices)) > 0
-    naive_cost = helpers.flop_count(indices, inner_product, len(input_list), dimension_dict)
+    # Sliced contractions search for a path without a memory limit and loop
+    # over indices to bring its intermediates under the limit instead
+    slice_limit = None
+    if slicing:
+        slice_limit = memory_arg
+        memory_arg = int(1e20)
+
+    # Look for a previously found path
+    cache_key = None
+    if (cache is not None) and isinstance(path_type, str):
+        cache_key = path_cache.path_key(input_subscripts, output_subscript, dimension_dict, memory_arg, use_blas,
+                                        path_type if cost_model is None else (path_type, repr(cost_model)))
+        path = cache.get(cache_key)
+        if path is not None:
+            path_type = path
 
     # Compute the path
-    if not isinstance(path_type, str):
+    if callable(path_type):
+        path = path_type(input_sets, output_set, dimension_dict, memory_arg, cost_model=cost_model)
+    elif not isinstance(path_type, str):
         path = path_type
     elif len(input_list) == 1:
         # Nothing to be optimized
@@ -179,18 +362,47 @@ def contract_path(*operands, **kwargs):
         # If no rank reduction leave it to einsum
         path = [tuple(range(len(input_list)))]
     elif path_type in ["greedy", "opportunistic"]:
-        path = paths.greedy(input_sets, output_set, dimension_dict, memory_arg)
+        path = paths.greedy(input_sets, output_set, dimension_dict, memory_arg, cost_model=cost_model)
     elif path_type == "optimal":
-        path = paths.optimal(input_sets, output_set, dimension_dict, memory_arg)
+        path = paths.optimal(input_sets, output_set, dimension_dict, memory_arg, parallel=parallel,
+                             cost_model=cost_model)
+    elif path_type == "dp":
+        path = paths.dynamic_programming(input_sets, output_set, dimension_dict, memory_arg, cost_model=cost_model)
+    elif path_type == "random-greedy":
+        path = paths.random_greedy(input_sets, output_set, dimension_dict, memory_arg, parallel=parallel,
+                                   cost_model=cost_model)
+    elif path_type == "partition":
+        path = paths.graph_partition(input_sets, output_set, dimension_dict, memory_arg, cost_model=cost_model)
+    elif path_type == "auto":
+        path = paths.auto(input_sets, output_set, dimension_dict, memory_arg, cost_model=cost_model)
     else:
         raise KeyError("Path name %s not found", path_type)
 
+    if (cache_key is not None) and (cache_key not in cache):
+        cache.put(cache_key, path)
+
+    sliced_inds = ""
+    sliced_sizes = None
+    sliced_cost = sliced_largest = None
+    if slice_limit is not None:
+        sliced_inds = path_slicing.find_slices(input_sets, output_set, path, dimension_dict, slice_limit)
+        sliced_sizes = path_slicing.slice_sizes(input_sets, output_set, path, dimension_dict, sliced_inds, slice_limit)
+        sliced_inds = "".join(x for x in sliced_inds if sliced_sizes[x] < dimension_dict[x])
+        sliced_sizes = {x: sliced_sizes[x] for x in sliced_inds}
+
+        sliced_dims = dict(dimension_dict)
+        sliced_dims.update(sliced_sizes)
+        sliced_cost, sliced_largest = path_slicing.path_costs(input_sets, output_set, path, sliced_dims)
+        sliced_cost *= path_slicing.count_slices(sliced_sizes, dimension_dict)
+
     cost_list = []
     scale_list = []
     size_list = []
     contraction_list = []
 
-    # Build contraction tuple (positions, gemm, einsum_str, remaining)
+    # Follow the path to find the terms and indices of each contraction
+    term_ids = list(range(len(input_list)))
+    steps = []
     for cnum, contract_inds in enumerate(path):
         # Make sure we remove inds from right to left
         contract_inds = tuple(sorted(list(contract_inds), reverse=True))
@@ -204,6 +416,32 @@ def contract_path(*operands, **kwargs):
         scale_list.append(len(idx_contract))
         size_list.append(helpers.compute_size_by_dict(out_inds, dimension_dict))
 
+        ids = [term_ids.pop(x) for x in contract_inds]
+        term_ids.append(len(input_list) + cnum)
+        steps.append((ids, out_inds, idx_removed))
+
+    # Order the indices of the intermediates, BLAS calls want to read them as matrices
+    orders = []
+    for ids, out_inds, idx_removed in steps[:-1]:
+        sort_result = [(dimension_dict[ind], ind) for ind in out_inds]
+        orders.append("".join([x[1] for x in sorted(sort_result)]))
+    orders.append(output_subscript)
+
+    copies = copies_avoided = 0
+    if use_blas and (len(steps) > 1):
+        planned_orders = blas.plan_layout(input_list, steps, output_subscript, dimension_dict)
+        copies = blas.layout_copies(input_list, steps, planned_orders)
+        copies_avoided = blas.layout_copies(input_list, steps, orders) - copies
+        if copies_avoided > 0:
+            orders = planned_orders
+        else:
+            copies += copies_avoided
+            copies_avoided = 0
+
+    # Build contraction tuple (positions, gemm, einsum_str, remaining)
+    for (contract_inds, (ids, out_inds, idx_removed), idx_result) in zip(path, steps, orders):
+        contract_inds = tuple(sorted(list(contract_inds), reverse=True))
+
         tmp_inputs = []
         for x in contract_inds:
             tmp_inputs.append(input_list.pop(x))
@@ -213,13 +451,6 @@ def contract_path(*operands, **kwargs):
         else:
             do_blas = False
 
-        # Last contraction
-        if (cnum - len(path)) == -1:
-            idx_result = output_subscript
-        else:
-            sort_result = [(dimension_dict[ind], ind) for ind in out_inds]
-            idx_result = "".join([x[1] for x in sorted(sort_result)])
-
         input_list.append(idx_result)
         einsum_str = ",".join(tmp_inputs) + "->" + idx_result
 
@@ -231,28 +462,11 @@ def contract_path(*operands, **kwargs):
     if einsum_call_arg:
         return operands, contraction_list
 
-    # Return the path along with a nice string representation
-    overall_contraction = input_subscripts + "->" + output_subscript
-    header = ("scaling", "BLAS", "current", "remaining")
-
-    path_print = "  Complete contraction:  %s\n" % overall_contraction
-    path_print += "         Naive scaling:  %d\n" % len(indices)
-    path_print += "     Optimized scaling:  %d\n" % max(scale_list)
-    path_print += "      Naive FLOP count:  %.3e\n" % naive_cost
-    path_print += "  Optimized FLOP count:  %.3e\n" % opt_cost
-    path_print += "   Theoretical speedup:  %3.3f\n" % (naive_cost / float(opt_cost))
-    path_print += "  Largest intermediate:  %.3e elements\n" % max(size_list)
-    path_print += "-" * 80 + "\n"
-    path_print += "%6s %6s %24s %40s\n" % header
-    path_print += "-" * 80
-
-    for n, contraction in enumerate(contraction_list):
-        inds, idx_rm, einsum_str, remaining, do_blas = contraction
-        remaining_str = ",".join(remaining) + "->" + output_subscript
-        path_run = (scale_list[n], do_blas, einsum_str, remaining_str)
-        path_print += "\n%4d %9s %24s %40s" % path_run
+    path_info = PathInfo(path, contraction_list, input_subscripts, output_subscript, indices, dimension_dict,
+                         opt_cost, scale_list, size_list, copies, copies_avoided, sliced_inds, sliced_cost,
+                         sliced_largest, sliced_sizes)
 
-    return path, path_print
+    return path, path_info
 
 
 # Rewrite einsum to handle different cases
@@ -291,12 +505,67 @@ def contract(*operands, **kwargs):
         - 'optimal' An algorithm that tries all possible ways of
             contracting the listed tensors. Scales exponentially with
             the number of terms in the contraction.
+        - 'dp' A dynamic programming algorithm that finds the same
+            lowest cost path as 'optimal' by reusing the cheapest way of
+            building each intermediate. Practical for up to about 20 terms.
+        - 'random-greedy' Samples many greedy paths, drawing each pair
+            to contract with Boltzmann weights, and keeps the cheapest.
+            For 10-30 terms, ``paths.RandomGreedy`` sets the number of
+            trials, a time budget and a seed.
+        - 'partition' Recursively bisects the network so that few and
+            small indices join the halves, and searches groups of up to 8
+            terms exactly. For hundreds or thousands of terms, see
+            ``paths.GraphPartition``.
+        - 'auto' Finds the 'greedy' path, then improves on it with the
+            searches above until 0.1 seconds have passed and returns the
+            cheapest path found. ``paths.Auto`` sets the time budget.
 
     memory_limit : int or None (default : None)
         The upper limit of the size of tensor created, by default this will be
         Give the upper bound of the largest intermediate tensor contract will build.
         By default (None) will size the ``memory_limit`` as the largest input tensor.
         Users can also specify ``-1`` to allow arbitrarily large tensors to be built.
+    parallel : int or None (default : None)
+        Number of processes to search for the 'optimal' or 'random-greedy'
+        path with.
+    cache : PathCache or None (default : None)
+        A cache of paths to consult before searching for a path.
+    cost_model : CostModel or None (default : None)
+        Search for the fastest path under a calibrated model rather than the
+        path with the fewest FLOPs, see ``opt_einsum.costs``.
+    buffer_pool : BufferPool or bool (default : None)
+        Write intermediates into reused buffers of a ``memory.BufferPool``
+        instead of allocating each one, ``True`` uses a pool for this call
+        only. The pool reports the ``peak_bytes`` of the contraction.
+    slicing : bool (default : False)
+        Rather than falling back to einsum when an intermediate would exceed
+        ``memory_limit``, loop over slices of a few indices so that every
+        intermediate of a slice fits, see ``contract_path``.
+    n_workers : int or None (default : None)
+        Number of threads to contract the slices, or otherwise independent
+        steps of the path, with.
+    executor : Executor or None (default : None)
+        A ``concurrent.futures`` executor to contract with, rather than
+        starting ``n_workers`` threads for this call. At most ``n_workers``,
+        or else the number of CPUs, tasks are submitted to it at once.
+    memory_cap : int or None (default : None)
+        When steps run concurrently, the maximum number of elements of the
+        intermediates alive at once. A step is held back while it would
+        exceed the cap, unless no other step is running.
+    streaming : bool (default : False)
+        Contract out-of-core operands such as ``np.memmap`` arrays block by
+        block. The largest operand is read once, in blocks along the index
+        it is laid out by on disk, with the blocks sized so that the
+        intermediates of a block hold at most ``memory_limit`` elements.
+        The path is found without the limit, and intermediates that do not
+        carry the blocked index are not bounded by it. The result can be
+        written into a memory-mapped ``out``.
+    backend : str (default : 'auto')
+        The library to contract with, one of 'numpy', 'dask', 'torch' or
+        'sparse'. By default the library of the first operand, so that for
+        example Dask arrays are contracted lazily and out-of-core rather than
+        converted to NumPy. The path is found from the shapes alone, and
+        operands of other libraries are converted to arrays of the backend.
 
     Returns
     -------
@@ -323,12 +592,24 @@ def contract(*operands, **kwargs):
     See opt_einsum.contract_path or numpy.einsum
 
     """
+
+    # Calls without options on NumPy arrays go straight to a cached plan
+    if (not kwargs) and operands and (type(operands[0]) is str):
+        arrays = operands[1:]
+        shapes = tuple([x.shape for x in arrays if type(x) is np.ndarray])
+        contraction_list = None
+        if len(shapes) == len(arrays):
+            contraction_list = _plan_cache.get((operands[0], shapes, 'greedy', None, True))
+        if contraction_list is not None:
+            if (len(contraction_list) == 1) and not contraction_list[0][-1]:
+                return np.einsum(contraction_list[0][2], *[arrays[x] for x in contraction_list[0][0]])
+            return _core_contract(list(arrays), contraction_list)
+
     optimize_arg = kwargs.pop('optimize', True)
     if optimize_arg is True:
         optimize_arg = 'greedy'
 
-    valid_einsum_kwargs = ['out', 'dtype', 'order', 'casting']
-    einsum_kwargs = {k: v for (k, v) in kwargs.items() if k in valid_einsum_kwargs}
+    einsum_kwargs = {k: kwargs.pop(k) for k in _valid_einsum_kwargs if k in kwargs}
 
     # If no optimization, run pure einsum
     if optimize_arg is False:
@@ -337,30 +618,249 @@ def contract(*operands, **kwargs):
     # Grab non-einsum kwargs
     use_blas = kwargs.pop('use_blas', True)
     memory_limit = kwargs.pop('memory_limit', None)
+    parallel = kwargs.pop('parallel', None)
+    cache = kwargs.pop('cache', None)
+    cost_model = kwargs.pop('cost_model', None)
+    buffer_pool = kwargs.pop('buffer_pool', None)
+    slicing = kwargs.pop('slicing', False)
+    n_workers = kwargs.pop('n_workers', None)
+    executor = kwargs.pop('executor', None)
+    memory_cap = kwargs.pop('memory_cap', None)
+    streaming = kwargs.pop('streaming', False)
+    backend = kwargs.pop('backend', 'auto')
     gen_expression = kwargs.pop('gen_expression', False)
 
     # Make sure remaining keywords are valid for einsum
-    unknown_kwargs = [k for (k, v) in kwargs.items() if k not in valid_einsum_kwargs]
-    if len(unknown_kwargs):
-        raise TypeError("Did not understand the following kwargs: %s" % unknown_kwargs)
+    if kwargs:
+        raise TypeError("Did not understand the following kwargs: %s" % list(kwargs))
 
     if gen_expression:
         full_str = operands[0]
+        operands, contraction_list = contract_path(
+            *operands,
+            path=optimize_arg,
+            memory_limit=memory_limit,
+            einsum_call=True,
+            use_blas=use_blas,
+            parallel=parallel,
+            cache=cache,
+            cost_model=cost_model)
+        return ContractExpression(full_str, contraction_list, **einsum_kwargs)
 
-    # Build the contraction list and operand
-    operands, contraction_list = contract_path(
-        *operands, path=optimize_arg, memory_limit=memory_limit, einsum_call=True, use_blas=use_blas)
+    # The first array, in either input format
+    first = operands[1:2] if isinstance(operands[0], str) else operands[:1]
+    if (backend == 'auto') and first:
+        backend = backends.infer_backend(first[0])
 
-    # check if performing contraction or just building expression
-    if gen_expression:
-        return ContractExpression(full_str, contraction_list, **einsum_kwargs)
+    # Other libraries contract with their own functions
+    if backend not in ('auto', 'numpy'):
+        if einsum_kwargs or slicing or buffer_pool or n_workers or executor:
+            raise ValueError("The einsum keyword arguments, `slicing`, `buffer_pool`, `n_workers` and `executor` are"
+                             " only supported by the 'numpy' backend.")
+
+        if isinstance(operands[0], str):
+            subscripts, arrays = operands[0], operands[1:]
+        else:
+            subscripts, arrays = parser.convert_interleaved_input(operands)
+        arrays = [backends.to_backend(x, backend) for x in arrays]
+
+        dummy_arrays = [_ShapeOnly(x.shape) for x in arrays]
+        dummy_arrays, contraction_list = contract_path(
+            subscripts,
+            *dummy_arrays,
+            path=optimize_arg,
+            memory_limit=memory_limit,
+            einsum_call=True,
+            use_blas=use_blas,
+            parallel=parallel,
+            cache=cache,
+            cost_model=cost_model)
+        return backends.contract(arrays, contraction_list, backend)
+
+    if ('out' in einsum_kwargs) and (backends.infer_backend(einsum_kwargs['out']) != 'numpy'):
+        raise ValueError("`out` must be a NumPy array, got an array of the '%s' backend." %
+                         backends.infer_backend(einsum_kwargs['out']))
+
+    if slicing:
+        path, path_info = contract_path(
+            *operands,
+            path=optimize_arg,
+            memory_limit=memory_limit,
+            use_blas=use_blas,
+            parallel=parallel,
+            cache=cache,
+            cost_model=cost_model,
+            slicing=True)
+        operands = parser.parse_einsum_input(operands)[2]
+        return _sliced_contract(operands, path_info, n_workers=n_workers, executor=executor, **einsum_kwargs)
+
+    if streaming:
+        # The blocks, not the path, are sized by the memory limit
+        path, path_info = contract_path(
+            *operands,
+            path=optimize_arg,
+            memory_limit=-1,
+            use_blas=use_blas,
+            parallel=parallel,
+            cache=cache,
+            cost_model=cost_model)
+        operands = parser.parse_einsum_input(operands)[2]
+        return _streamed_contract(operands, path_info, block_limit=memory_limit, **einsum_kwargs)
+
+    # Reuse the contraction list of previously seen subscripts and shapes,
+    # which were already parsed and checked when the plan was built
+    plan_key = None
+    contraction_list = None
+    if (cache is None) and (cost_model is None) and isinstance(operands[0], str) and isinstance(optimize_arg, str):
+        try:
+            shapes = tuple([x.shape for x in operands[1:]])
+        except AttributeError:
+            pass
+        else:
+            plan_key = (operands[0], shapes, optimize_arg, memory_limit, use_blas)
+            contraction_list = _plan_cache.get(plan_key)
+
+    if contraction_list is not None:
+        operands = list(operands[1:])
+    else:
+        operands, contraction_list = contract_path(
+            *operands,
+            path=optimize_arg,
+            memory_limit=memory_limit,
+            einsum_call=True,
+            use_blas=use_blas,
+            parallel=parallel,
+            cache=cache,
+            cost_model=cost_model)
+
+        # BLAS does not pay off for small contractions
+        if sum(x.size for x in operands) <= _small_contraction_size:
+            contraction_list = _small_steps(operands, contraction_list)
+
+        if plan_key is not None:
+            if len(_plan_cache) >= _plan_cache_size:
+                _plan_cache.clear()
+            _plan_cache[plan_key] = contraction_list
+
+    buffers = None
+    if buffer_pool:
+        if buffer_pool is True:
+            buffer_pool = memory.BufferPool()
+        buffers = buffer_pool.buffers(operands, contraction_list, einsum_kwargs.get('dtype'))
+
+    # Independent steps run concurrently, intermediates in a buffer pool
+    # assume the steps run in order
+    if (n_workers or executor) and (buffers is None) and (len(contraction_list) > 1):
+        return _dag_contract(operands, contraction_list, n_workers=n_workers, executor=executor,
+                             memory_cap=memory_cap, **einsum_kwargs)
+
+    # A single contraction is one einsum call
+    if (len(contraction_list) == 1) and not contraction_list[0][-1]:
+        inds, idx_rm, einsum_str, remaining, do_blas = contraction_list[0]
+        return np.einsum(einsum_str, *[operands[x] for x in inds], **einsum_kwargs)
+
+    return _core_contract(operands, contraction_list, buffers=buffers, **einsum_kwargs)
+
+
+_valid_einsum_kwargs = ('out', 'dtype', 'order', 'casting')
+
+# Contraction lists of recent ``contract`` calls, emptied when full. Single
+# dictionary lookups and stores need no lock between threads
+_plan_cache = {}
+_plan_cache_size = 256
+
+# Total number of operand elements below which a single contraction skips BLAS
+_small_contraction_size = 1024
+
+# Number of elements of the largest term of a streamed block without a memory limit
+_stream_block_size = 2**22
+
+
+def _small_steps(operands, contraction_list):
+    """Turns the BLAS calls of ``contraction_list`` whose operands hold at
+    most ``_small_contraction_size`` elements together into einsum calls.
+    """
+
+    sizes = [x.size for x in operands]
+    shapes = [x.shape for x in operands]
+    steps = []
+    for inds, idx_rm, einsum_str, remaining, do_blas in contraction_list:
+        input_str, result = einsum_str.split('->')
+        dimension_dict = {}
+        for term, x in zip(input_str.split(','), inds):
+            dimension_dict.update(zip(term, shapes.pop(x)))
+        if sum(sizes.pop(x) for x in inds) <= _small_contraction_size:
+            do_blas = False
+
+        shapes.append(tuple(dimension_dict[x] for x in result))
+        sizes.append(helpers.compute_size_by_dict(result, dimension_dict))
+        steps.append((inds, idx_rm, einsum_str, remaining, do_blas))
+
+    return steps
+
+
+def _contract_step(tmp_operands, contraction, out=None, step_out=None, **einsum_kwargs):
+    """Performs a single contraction of a ``contraction_list``, writing the
+    final result into ``out`` or an intermediate into the pooled buffer
+    ``step_out``.
+    """
+
+    inds, idx_rm, einsum_str, remaining, do_blas = contraction
+
+    # Write into a pooled buffer
+    if step_out is not None:
+        if do_blas:
+            input_str, results_index = einsum_str.split('->')
+            input_left, input_right = input_str.split(',')
+            return blas.tensor_blas(tmp_operands[0], input_left, tmp_operands[1], input_right, results_index, idx_rm,
+                                    out=step_out)
+
+        return np.einsum(einsum_str, *tmp_operands, out=step_out, **einsum_kwargs)
+
+    # If out was specified
+    if out is not None:
+        einsum_kwargs["out"] = out
+
+    # Stacks of contractions sharing a leading batch index
+    if do_blas == 'BATCH':
+        input_str, results_index = einsum_str.split('->')
+        input_left, input_right = input_str.split(',')
+        new_view = blas.batch_blas(tmp_operands[0], input_left, tmp_operands[1], input_right, results_index, idx_rm)
+        if out is not None:
+            new_view = np.einsum(results_index + '->' + results_index, new_view, **einsum_kwargs)
+
+        return new_view
+
+    # Call a BLAS kernel
+    if do_blas:
 
-    return _core_contract(operands, contraction_list, **einsum_kwargs)
+        # Checks have already been handled
+        input_str, results_index = einsum_str.split('->')
+        input_left, input_right = input_str.split(',')
 
+        tensor_result = input_left + input_right
+        for s in idx_rm:
+            tensor_result = tensor_result.replace(s, "")
 
-def _core_contract(operands, contraction_list, **einsum_kwargs):
+        # Contract! DOT and GEMM reshape into np.dot, TDOT uses tensordot
+        left_view, right_view = tmp_operands
+        new_view = blas.tensor_blas(left_view, input_left, right_view, input_right, tensor_result, idx_rm)
+
+        # Build a new view if needed
+        if (tensor_result != results_index) or (out is not None):
+            new_view = np.einsum(tensor_result + '->' + results_index, new_view, **einsum_kwargs)
+
+        return new_view
+
+    # Call einsum
+    return np.einsum(einsum_str, *tmp_operands, **einsum_kwargs)
+
+
+def _core_contract(operands, contraction_list, buffers=None, **einsum_kwargs):
     """Inner loop used to perform an actual contraction given the output
-    from a ``contract_path(..., einsum_call=True)`` call.
+    from a ``contract_path(..., einsum_call=True)`` call. If given, the
+    result of each step is written into the matching array of ``buffers``,
+    see ``BufferPool.buffers``.
     """
 
     # Special handeling if out is specified
@@ -369,57 +869,341 @@ def _core_contract(operands, contraction_list, **einsum_kwargs):
 
     # Start contraction loop
     for num, contraction in enumerate(contraction_list):
-        inds, idx_rm, einsum_str, remaining, blas = contraction
         tmp_operands = []
-        for x in inds:
+        for x in contraction[0]:
             tmp_operands.append(operands.pop(x))
 
         # Do we need to deal with the output?
         handle_out = specified_out and ((num + 1) == len(contraction_list))
 
-        # Call tensordot
-        if blas:
+        new_view = _contract_step(tmp_operands, contraction, out=out_array if handle_out else None,
+                                  step_out=buffers[num] if buffers else None, **einsum_kwargs)
 
-            # Checks have already been handled
-            input_str, results_index = einsum_str.split('->')
-            input_left, input_right = input_str.split(',')
+        # Append new items and derefernce what we can
+        operands.append(new_view)
+        del tmp_operands, new_view
 
-            tensor_result = input_left + input_right
-            for s in idx_rm:
-                tensor_result = tensor_result.replace(s, "")
+    if specified_out:
+        return out_array
+
+    # A final step that only returns a view, e.g. a transpose, would hand
+    # out memory that the next call with the same pool overwrites
+    result = operands[0]
+    if buffers and any(np.may_share_memory(result, x) for x in buffers if x is not None):
+        result = result.copy()
+    return result
 
-            # Find indices to contract over
-            left_pos, right_pos = [], []
-            for s in idx_rm:
-                left_pos.append(input_left.find(s))
-                right_pos.append(input_right.find(s))
 
-            # Contract!
-            new_view = np.tensordot(*tmp_operands, axes=(tuple(left_pos), tuple(right_pos)))
+def _dag_contract(operands, contraction_list, n_workers=None, executor=None, memory_cap=None, **einsum_kwargs):
+    """Runs the steps of a ``contraction_list`` on a thread pool as soon as
+    the steps they depend on are done, rather than one after the other.
+    While steps are running, a new step is only started if the elements of
+    the live intermediates plus its result stay within ``memory_cap``.
+    """
 
-            # Build a new view if needed
-            if (tensor_result != results_index) or handle_out:
-                if handle_out:
-                    einsum_kwargs["out"] = out_array
-                new_view = np.einsum(tensor_result + '->' + results_index, new_view, **einsum_kwargs)
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    out_array = einsum_kwargs.pop('out', None)
+    num_inputs = len(operands)
+    num_steps = len(contraction_list)
+
+    # Terms are numbered inputs first, then the result of each step
+    positions = list(range(num_inputs))
+    shapes = [x.shape for x in operands]
+    depends = []
+    sizes = []
+    for num, (inds, idx_rm, einsum_str, remaining, do_blas) in enumerate(contraction_list):
+        terms = [positions.pop(x) for x in inds]
+        input_str, result = einsum_str.split('->')
+        dimension_dict = {}
+        for term_str, term in zip(input_str.split(','), terms):
+            dimension_dict.update(zip(term_str, shapes[term]))
+
+        shapes.append(tuple(dimension_dict[x] for x in result))
+        sizes.append(helpers.compute_size_by_dict(result, dimension_dict))
+        depends.append(terms)
+        positions.append(num_inputs + num)
+
+    results = dict(enumerate(operands))
+    waiting = [sum(x >= num_inputs for x in terms) for terms in depends]
+    consumer = {}
+    for num, terms in enumerate(depends):
+        for x in terms:
+            consumer[x] = num
+
+    ready = [num for num in range(num_steps) if waiting[num] == 0]
+    running = {}
+    live = 0
+
+    max_running = n_workers or multiprocessing.cpu_count()
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_running)
+
+    try:
+        while ready or running:
+            while ready and (len(running) < max_running):
+                num = ready[0]
+                if running and (memory_cap is not None) and (live + sizes[num] > memory_cap):
+                    break
+
+                ready.pop(0)
+                step_out = out_array if num == num_steps - 1 else None
+                future = executor.submit(_contract_step, [results[x] for x in depends[num]], contraction_list[num],
+                                         out=step_out, **einsum_kwargs)
+                running[future] = num
+                live += sizes[num]
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                num = running.pop(future)
+                results[num_inputs + num] = future.result()
+
+                # Inputs of the step are no longer needed
+                for x in depends[num]:
+                    del results[x]
+                    if x >= num_inputs:
+                        live -= sizes[x - num_inputs]
+
+                if num != num_steps - 1:
+                    nxt = consumer[num_inputs + num]
+                    waiting[nxt] -= 1
+                    if waiting[nxt] == 0:
+                        ready.append(nxt)
+                        ready.sort()
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    if out_array is not None:
+        return out_array
+    return results[num_inputs + num_steps - 1]
+
+
+def _contract_slices(operands, path_info, selections, out_array, **einsum_kwargs):
+    """Contracts the slices of ``path_info`` given by ``selections``, each a
+    dictionary of indices to the ``slice`` taken of them, writing into slices
+    of ``out_array``. If some sliced indices are not part of the output, the
+    slices are added to ``out_array``, which must start out zeroed.
+    """
 
-        # Call einsum
+    input_list = path_info.input_subscripts.split(',')
+    output_subscript = path_info.output_subscript
+
+    def select(term, selection):
+        return tuple(selection.get(x, slice(None)) for x in term) + (Ellipsis, )
+
+    for selection in selections:
+        # Sliced indices keep their dimension so the contraction list still applies
+        sliced_operands = [op[select(term, selection)] for op, term in zip(operands, input_list)]
+        out_view = out_array[select(output_subscript, selection)]
+
+        if any(x not in output_subscript for x in selection):
+            out_view += _core_contract(sliced_operands, path_info.contraction_list, **einsum_kwargs)
         else:
-            # If out was specified
-            if handle_out:
-                einsum_kwargs["out"] = out_array
+            _core_contract(sliced_operands, path_info.contraction_list, out=out_view, **einsum_kwargs)
 
-            # Do the contraction
-            new_view = np.einsum(einsum_str, *tmp_operands, **einsum_kwargs)
+    return out_array
 
-        # Append new items and derefernce what we can
-        operands.append(new_view)
-        del tmp_operands, new_view
 
-    if specified_out:
-        return out_array
-    else:
-        return operands[0]
+def _sliced_contract(operands, path_info, n_workers=None, executor=None, **einsum_kwargs):
+    """Runs ``_core_contract`` once for every chunk of the sliced indices of
+    ``path_info``, writing into slices of the output and summing over the
+    sliced indices that are not part of it. Given ``n_workers`` or an
+    ``executor`` the slices are split between workers, each summing into its
+    own buffer, and the buffers are added up at the end.
+    """
+
+    dimension_dict = path_info.dimension_dict
+    output_subscript = path_info.output_subscript
+    summed = any(x not in output_subscript for x in path_info.sliced_inds)
+
+    out_array = einsum_kwargs.pop('out', None)
+    if out_array is None:
+        dtype = einsum_kwargs.get('dtype') or np.result_type(*operands)
+        out_array = np.empty(tuple(dimension_dict[x] for x in output_subscript), dtype=dtype)
+    if summed:
+        out_array[...] = 0
+
+    sizes = path_info.sliced_sizes
+    slices = [{x: slice(v, v + sizes[x])
+               for x, v in zip(path_info.sliced_inds, values)}
+              for values in itertools.product(*[range(0, dimension_dict[x], sizes[x]) for x in path_info.sliced_inds])]
+
+    if executor is None and (n_workers or 1) <= 1:
+        return _contract_slices(operands, path_info, slices, out_array, **einsum_kwargs)
+
+    num_chunks = min(len(slices), n_workers or multiprocessing.cpu_count())
+
+    # Slices of output indices are disjoint, summed slices need a buffer per worker
+    buffers = [out_array]
+    for _ in range(num_chunks - 1):
+        buffers.append(np.zeros_like(out_array) if summed else out_array)
+
+    own_executor = executor is None
+    if own_executor:
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(num_chunks)
+
+    try:
+        futures = [
+            executor.submit(_contract_slices, operands, path_info, slices[num::num_chunks], buffers[num],
+                            **einsum_kwargs) for num in range(num_chunks)
+        ]
+        for future in futures:
+            future.result()
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    if summed:
+        for buf in buffers[1:]:
+            out_array += buf
+
+    return out_array
+
+
+def _streamed_contract(operands, path_info, block_limit=None, **einsum_kwargs):
+    """Runs ``_core_contract`` on blocks of the largest operand, taken along
+    the index it is laid out by in memory so that each block is read from
+    disk in one sequential pass. The blocks are as large as possible while
+    every term holding the blocked index stays within ``block_limit``
+    elements, terms without it keep their full size. Blocks are written into
+    slices of the output, or added up if the index is summed over.
+    """
+
+    input_list = path_info.input_subscripts.split(',')
+    output_subscript = path_info.output_subscript
+    dimension_dict = path_info.dimension_dict
+
+    out_array = einsum_kwargs.pop('out', None)
+    if out_array is None:
+        dtype = einsum_kwargs.get('dtype') or np.result_type(*operands)
+        out_array = np.empty(tuple(dimension_dict[x] for x in output_subscript), dtype=dtype)
+
+    largest = max(range(len(operands)), key=lambda x: operands[x].size)
+    term = input_list[largest]
+    if not term:
+        return _core_contract(list(operands), path_info.contraction_list, out=out_array, **einsum_kwargs)
+
+    # Fortran ordered arrays are laid out by their last index
+    flags = operands[largest].flags
+    ind = term[-1] if (flags.f_contiguous and not flags.c_contiguous) else term[0]
+
+    if block_limit is None or block_limit < 1:
+        block_limit = _stream_block_size
+    terms = input_list + [contraction[2].split('->')[1] for contraction in path_info.contraction_list]
+    largest_size = max(helpers.compute_size_by_dict(x, dimension_dict) for x in terms if ind in x)
+    dim = dimension_dict[ind]
+    block = max(1, min(dim, dim * int(block_limit) // largest_size))
+
+    if ind not in output_subscript:
+        out_array[...] = 0
+
+    selections = [{ind: slice(start, start + block)} for start in range(0, dim, block)]
+    return _contract_slices(operands, path_info, selections, out_array, **einsum_kwargs)
+
+
+def _prod(dims):
+    ret = 1
+    for dim in dims:
+        ret *= dim
+    return ret
+
+
+class _CompiledStep(object):
+    """A single step of a ``contraction_list`` with the string work of
+    ``_contract_step`` done once ahead of time: the kernel to call, the axes
+    to reshape and contract over and the permutation of the result.
+    """
+
+    __slots__ = ('inds', 'kind', 'einsum_str', 'left_keep', 'left_removed', 'right_keep', 'transpose_left',
+                 'transpose_right', 'axes', 'perm', 'transpose_str', 'dims')
+
+    def __init__(self, contraction):
+        inds, idx_rm, einsum_str, remaining, do_blas = contraction
+        self.inds = inds
+        self.kind = do_blas or 'EINSUM'
+        self.einsum_str = einsum_str
+        self.left_keep = self.left_removed = self.right_keep = None
+        self.transpose_left = self.transpose_right = False
+        self.axes = self.perm = self.transpose_str = self.dims = None
+
+        if self.kind in ('EINSUM', 'BATCH'):
+            return
+
+        input_str, result = einsum_str.split('->')
+        input_left, input_right = input_str.split(',')
+        tensor_result = "".join(x for x in input_left + input_right if x not in idx_rm)
+
+        self.left_keep = tuple(i for i, x in enumerate(input_left) if x not in idx_rm)
+        self.left_removed = tuple(i for i, x in enumerate(input_left) if x in idx_rm)
+        self.right_keep = tuple(i for i, x in enumerate(input_right) if x not in idx_rm)
+        self.transpose_str = tensor_result + '->' + result
+        if tensor_result != result:
+            self.perm = tuple(tensor_result.index(x) for x in result)
+
+        # The same four np.dot layouts as ``blas.tensor_blas``
+        rs = len(idx_rm)
+        if self.kind == 'GEMM':
+            if input_left[-rs:] == input_right[:rs]:
+                pass
+            elif input_left[:rs] == input_right[-rs:]:
+                self.transpose_left = self.transpose_right = True
+            elif input_left[-rs:] == input_right[-rs:]:
+                self.transpose_right = True
+            else:
+                self.transpose_left = True
+
+        elif self.kind == 'TDOT':
+            removed = list(idx_rm)
+            self.axes = (tuple(input_left.find(s) for s in removed), tuple(input_right.find(s) for s in removed))
+
+    def __call__(self, operands, out=None, **einsum_kwargs):
+        if self.kind in ('EINSUM', 'BATCH'):
+            return _contract_step(operands, (self.inds, None, self.einsum_str, None, False), out=out, **einsum_kwargs)
+
+        left, right = operands
+        if self.kind == 'DOT':
+            new_view = np.dot(left.ravel(), right.ravel())
+
+        elif self.kind == 'GEMM':
+            # The matrix sizes of the last shapes seen are kept
+            dims = self.dims
+            if (dims is None) or (dims[0] != left.shape) or (dims[1] != right.shape):
+                keep_shape = tuple(left.shape[i] for i in self.left_keep)
+                keep_shape += tuple(right.shape[i] for i in self.right_keep)
+                dims = (left.shape, right.shape, _prod(left.shape[i] for i in self.left_keep),
+                        _prod(left.shape[i] for i in self.left_removed), _prod(right.shape[i] for i in self.right_keep),
+                        keep_shape)
+                self.dims = dims
+
+            dim_left, dim_removed, dim_right, keep_shape = dims[2:]
+
+            if self.transpose_left:
+                left = left.reshape(dim_removed, dim_left).T
+            else:
+                left = left.reshape(dim_left, dim_removed)
+
+            if self.transpose_right:
+                right = right.reshape(dim_right, dim_removed).T
+            else:
+                right = right.reshape(dim_removed, dim_right)
+
+            new_view = np.dot(left, right).reshape(keep_shape)
+
+        else:
+            new_view = np.tensordot(left, right, axes=self.axes)
+
+        if out is not None:
+            return np.einsum(self.transpose_str, new_view, out=out, **einsum_kwargs)
+
+        if self.perm is not None:
+            if einsum_kwargs:
+                return np.einsum(self.transpose_str, new_view, **einsum_kwargs)
+            return new_view.transpose(self.perm)
+
+        return new_view
 
 
 class ContractExpression:
@@ -432,8 +1216,80 @@ class ContractExpression:
         self.contraction_list = contraction_list
         self.einsum_kwargs = einsum_kwargs
         self.num_args = len(contraction.split('->')[0].split(','))
+        self._batch_contraction_list = None
+        self._steps = [_CompiledStep(contraction) for contraction in contraction_list]
+        self._constants = []
+        self._folded = {}
+
+    def _fold_constants(self, constants):
+        """Evaluates the steps whose operands are all constants once. Only the
+        constants and constant intermediates read by a variable step are
+        kept, ``constants`` maps operand positions to arrays.
+        """
+
+        operands = [constants.get(num) for num in range(self.num_args)]
+        producers = [('input', num) if num in constants else None for num in range(self.num_args)]
+        needed = set()
+
+        folded = {}
+        for num, contraction in enumerate(self.contraction_list):
+            tmp_operands = [operands.pop(x) for x in contraction[0]]
+            tmp_producers = [producers.pop(x) for x in contraction[0]]
+
+            if all(x is not None for x in tmp_producers):
+                folded[num] = _contract_step(tmp_operands, contraction, **self.einsum_kwargs)
+                operands.append(folded[num])
+                producers.append(('step', num))
+            else:
+                needed.update(x for x in tmp_producers if x is not None)
+                operands.append(None)
+                producers.append(None)
+
+        # A fully constant expression keeps its result
+        needed.update(x for x in producers if x is not None)
+
+        self._folded = dict((num, value if ('step', num) in needed else None) for num, value in folded.items())
+        self._constants = [(pos, value if ('input', pos) in needed else None)
+                           for pos, value in sorted(constants.items())]
+        self.num_args -= len(constants)
 
     def __call__(self, *arrays, **kwargs):
+        return self._contract(arrays, None, **kwargs)
+
+    def batch(self, *arrays, **kwargs):
+        """Evaluates the expression for a stack of problems at once. Each
+        array has an extra leading dimension of the same size, which is kept
+        as the leading dimension of the result. The path of the expression is
+        reused with the stack as an extra free index, so that each pairwise
+        BLAS contraction becomes one batched ``np.matmul`` call.
+        """
+
+        if self._constants:
+            raise ValueError("`batch` is not supported for a `ContractExpression` with constants.")
+
+        if self._batch_contraction_list is None:
+            self._batch_contraction_list = self._build_batch()
+
+        return self._contract(arrays, self._batch_contraction_list, **kwargs)
+
+    def _build_batch(self):
+        """Prefixes every term of the contraction list with a new batch index."""
+
+        batch = [x for x in parser.einsum_symbols if x not in self.contraction][0]
+
+        def batched(terms):
+            return ",".join(batch + x for x in terms.split(','))
+
+        contraction_list = []
+        for inds, idx_rm, einsum_str, remaining, do_blas in self.contraction_list:
+            input_str, result = einsum_str.split('->')
+            einsum_str = batched(input_str) + '->' + batch + result
+            remaining = [batch + x for x in remaining]
+            contraction_list.append((inds, idx_rm, einsum_str, remaining, 'BATCH' if do_blas else False))
+
+        return contraction_list
+
+    def _contract(self, arrays, contraction_list, **kwargs):
         if len(arrays) != self.num_args:
             raise ValueError("This `ContractExpression` takes exactly %s array arguments "
                              "but received %s." % (self.num_args, len(arrays)))
@@ -442,9 +1298,36 @@ class ContractExpression:
         if kwargs:
             raise ValueError("The only valid keyword argument to a `ContractExpression` "
                              "call is `out=`. Got: %s." % kwargs)
+        if (out is not None) and (backends.infer_backend(out) != 'numpy'):
+            raise ValueError("`out` must be a NumPy array, got an array of the '%s' backend." %
+                             backends.infer_backend(out))
+
+        backend = backends.infer_backend(arrays[0]) if arrays else 'numpy'
+        if (backend != 'numpy') and (contraction_list is None) and (out is None) and not self._constants:
+            return backends.contract(arrays, self.contraction_list, backend)
 
         try:
-            return _core_contract(list(arrays), self.contraction_list, out=out, **self.einsum_kwargs)
+            if contraction_list is not None:
+                return _core_contract(list(arrays), contraction_list, out=out, **self.einsum_kwargs)
+
+            # Only numeric work is left for the compiled steps
+            operands = list(arrays)
+            for pos, value in self._constants:
+                operands.insert(pos, value)
+
+            last = len(self._steps) - 1
+            for num, step in enumerate(self._steps):
+                tmp_operands = [operands.pop(x) for x in step.inds]
+                if num in self._folded:
+                    operands.append(self._folded[num])
+                    continue
+                operands.append(step(tmp_operands, out=out if num == last else None, **self.einsum_kwargs))
+
+            if (out is not None) and (last in self._folded):
+                out[...] = operands[0]
+                return out
+
+            return operands[0]
         except ValueError as err:
             original_msg = "".join(err.args) if err.args else ""
             msg = ("Internal error while evaluating `ContractExpression`. Note that few checks are performed"
@@ -461,11 +1344,101 @@ class ContractExpression:
         for i, c in enumerate(self.contraction_list):
             s += "\n  %i.  " % (i + 1)
             s += "'%s'" % c[2] + (" [%s]" % c[-1] if c[-1] else "")
+            if i in self._folded:
+                s += " [constant]"
         if self.einsum_kwargs:
             s += "\neinsum_kwargs=%s" % self.einsum_kwargs
         return s
 
 
+def _bucket_pow2(dim):
+    """Rounds a dimension up to the next power of two."""
+    return 1 << max(int(dim) - 1, 0).bit_length()
+
+
+class PolymorphicExpression(object):
+    """
+    A contraction expression for any shapes of the operands. Each distinct
+    shape signature is planned once as a ``ContractExpression``, which is
+    kept in a cache with least recently used eviction, so that calls with
+    sizes seen before never search for a path again.
+
+    Parameters
+    ----------
+    subscripts : str
+        Specifies the subscripts for summation.
+    maxsize : int, optional (default: 128)
+        The maximum number of planned expressions held.
+    bucket : bool or callable, optional (default: None)
+        Plan for a representative size rather than the exact size of each
+        dimension, so that nearby sizes share a plan. ``True`` rounds every
+        dimension up to a power of two, a callable maps a dimension to its
+        representative size.
+    kwargs :
+        Passed on to ``contract_expression``.
+
+    Examples
+    --------
+    >>> expr = contract_expression('bij,jk->bik', bucket=True)
+    >>> expr(np.random.rand(30, 3, 4), np.random.rand(4, 5)).shape
+    (30, 3, 5)
+    >>> expr(np.random.rand(31, 3, 4), np.random.rand(4, 5)).shape
+    (31, 3, 5)
+    >>> expr.hits, expr.misses
+    (1, 1)
+    """
+
+    def __init__(self, subscripts, maxsize=128, bucket=None, **kwargs):
+        if kwargs.get('constants', None):
+            raise ValueError("Constants need fixed shapes, give the shapes to `contract_expression`.")
+
+        self.subscripts = subscripts
+        self.maxsize = maxsize
+        self.bucket = _bucket_pow2 if bucket is True else bucket
+        self.kwargs = kwargs
+        self.hits = 0
+        self.misses = 0
+        self._expressions = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._expressions)
+
+    def signature(self, *shapes):
+        """The shapes the operands are planned for."""
+
+        if self.bucket is None:
+            return tuple(tuple(shape) for shape in shapes)
+        return tuple(tuple(self.bucket(dim) for dim in shape) for shape in shapes)
+
+    def expression(self, *shapes):
+        """Returns the ``ContractExpression`` of ``shapes``, planning it if
+        it is not cached.
+        """
+
+        key = self.signature(*shapes)
+        try:
+            self._expressions[key] = self._expressions.pop(key)
+        except KeyError:
+            self.misses += 1
+            self._expressions[key] = contract_expression(self.subscripts, *key, **self.kwargs)
+            while len(self._expressions) > self.maxsize:
+                self._expressions.popitem(last=False)
+            return self._expressions[key]
+
+        self.hits += 1
+        return self._expressions[key]
+
+    def clear(self):
+        """Empties the cache of planned expressions."""
+        self._expressions.clear()
+
+    def __call__(self, *arrays, **kwargs):
+        return self.expression(*[x.shape for x in arrays])(*arrays, **kwargs)
+
+    def __repr__(self):
+        return "PolymorphicExpression('%s')" % self.subscripts
+
+
 class _ShapeOnly(np.ndarray):
     """Dummy ``numpy.ndarray`` which has a shape only - for generating
     contract expressions.
@@ -475,6 +1448,158 @@ class _ShapeOnly(np.ndarray):
         self.shape = shape
 
 
+def _variable_cost(input_sets, output_set, path, dimension_dict, constants):
+    """The FLOP count of the steps of ``path`` that read a variable operand."""
+
+    is_constant = [num in constants for num in range(len(input_sets))]
+    cost = 0
+    for contract_inds in path:
+        contract_inds = tuple(sorted(list(contract_inds), reverse=True))
+        contract = helpers.find_contraction(contract_inds, input_sets, output_set)
+        out_inds, input_sets, idx_removed, idx_contract = contract
+        step_constant = all([is_constant.pop(x) for x in contract_inds])
+        is_constant.append(step_constant)
+        if not step_constant:
+            cost += helpers.flop_count(idx_contract, idx_removed, len(contract_inds), dimension_dict)
+
+    return cost
+
+
+def _constants_path(subscripts, shapes, constants, path_type, memory_limit, use_blas, cost_model=None):
+    """
+    Finds a path for an expression with constant operands. The usual path is
+    compared with one that first contracts each connected group of constants
+    on its own, and the path with the lower FLOP count per call, counting
+    only the steps that read a variable operand, is returned.
+    """
+
+    input_subscripts, output_subscript, views = parser.parse_einsum_input([subscripts] +
+                                                                          [_ShapeOnly(x) for x in shapes])
+    input_list = input_subscripts.split(',')
+    dimension_dict = {}
+    for term, view in zip(input_list, views):
+        dimension_dict.update(zip(term, view.shape))
+
+    def find_path(terms, output):
+        if len(terms) == 1:
+            return [(0, )]
+        views = [_ShapeOnly(tuple(dimension_dict[x] for x in term)) for term in terms]
+        return contract_path(','.join(terms) + '->' + output, *views, path=path_type, memory_limit=memory_limit,
+                             use_blas=use_blas, cost_model=cost_model)[0]
+
+    default_path = find_path(input_list, output_subscript)
+
+    # Group the constants that share indices
+    groups = []
+    for num in sorted(constants):
+        joined = [g for g in groups if any(set(input_list[num]) & set(input_list[x]) for x in g)]
+        groups = [g for g in groups if g not in joined] + [sorted(sum(joined, []) + [num])]
+
+    # Contract each group, positions are tracked by operand ids
+    ids = list(range(len(input_list)))
+    terms = dict(enumerate(input_list))
+    constants_path = []
+    for group in sorted(groups):
+        if len(group) == 1:
+            continue
+
+        others = set(output_subscript).union(*[terms[x] for x in ids if x not in group])
+        group_out = ''.join(sorted(set(''.join(input_list[x] for x in group)) & others))
+        local = list(group)
+        for step in find_path([input_list[x] for x in group], group_out):
+            step_ids = [local[x] for x in step]
+            for x in sorted(step, reverse=True):
+                local.pop(x)
+
+            constants_path.append(tuple(ids.index(x) for x in step_ids))
+            ids = [x for x in ids if x not in step_ids]
+            ids.append(len(terms))
+            local.append(len(terms))
+            terms[len(terms)] = group_out
+
+    constants_path += find_path([terms[x] for x in ids], output_subscript)
+
+    input_sets = [set(x) for x in input_list]
+    output_set = set(output_subscript)
+    default_cost = _variable_cost(input_sets, output_set, default_path, dimension_dict, constants)
+    constants_cost = _variable_cost(input_sets, output_set, constants_path, dimension_dict, constants)
+
+    return constants_path if constants_cost <= default_cost else default_path
+
+
+def _autotune_candidates(num_terms, path_type, use_blas):
+    """The ``(path_type, use_blas)`` pairs timed by ``autotune``."""
+
+    if path_type is True:
+        path_types = ['greedy']
+        if num_terms >= 4:
+            path_types.append('random-greedy')
+        if num_terms <= _autotune_dp_terms:
+            path_types.append('dp')
+        if num_terms <= _autotune_optimal_terms:
+            path_types.append('optimal')
+    else:
+        path_types = [path_type]
+
+    blas_choices = [True, False] if use_blas is None else [use_blas]
+    return [(x, y) for x in path_types for y in blas_choices]
+
+
+def _autotuned_expression(subscripts, shapes, autotune, **kwargs):
+    """Builds the expression of every ``_autotune_candidates`` pair, times
+    them on random operands and returns the fastest, caching its path and
+    ``use_blas`` in ``autotune`` or ``_autotune_cache``.
+    """
+
+    tuned = _autotune_cache if autotune is True else autotune
+    path_type = kwargs.pop('optimize', True)
+    use_blas = kwargs.pop('use_blas', None)
+
+    constants = set(kwargs.get('constants', None) or ())
+    shape_list = [np.shape(s) if num in constants else tuple(s) for num, s in enumerate(shapes)]
+
+    input_subscripts, output_subscript, views = parser.parse_einsum_input([subscripts] +
+                                                                          [_ShapeOnly(x) for x in shape_list])
+    dimension_dict = {}
+    for term, view in zip(input_subscripts.split(','), views):
+        dimension_dict.update(zip(term, view.shape))
+
+    tune_type = ('autotune', path_type if isinstance(path_type, str) else repr(path_type))
+    key = path_cache.path_key(input_subscripts, output_subscript, dimension_dict, kwargs.get('memory_limit'),
+                              use_blas, tune_type)
+    plan = tuned.get(key)
+
+    if plan is None:
+        dtype = kwargs.get('dtype') or np.float64
+        variables = [np.random.rand(*shape).astype(dtype) for num, shape in enumerate(shape_list)
+                     if num not in constants]
+
+        best = None
+        for candidate_type, candidate_blas in _autotune_candidates(len(shapes), path_type, use_blas):
+            expr = contract_expression(subscripts, *shapes, optimize=candidate_type, use_blas=candidate_blas,
+                                       **kwargs)
+            time = min(timeit.repeat(lambda: expr(*variables), number=1, repeat=_autotune_repeats))
+            if (best is None) or (time < best[0]):
+                best = (time, [contraction[0] for contraction in expr.contraction_list], candidate_blas)
+
+        plan = best[1:]
+        tuned.put(key, plan)
+
+    path, use_blas = plan
+    return contract_expression(subscripts, *shapes, optimize=list(path), use_blas=use_blas, **kwargs)
+
+
+# Fastest paths found by ``contract_expression(..., autotune=True)``
+_autotune_cache = path_cache.PathCache(maxsize=256)
+
+# Largest number of terms for which autotune also times the 'dp' and 'optimal' paths
+_autotune_dp_terms = 16
+_autotune_optimal_terms = 6
+
+# Number of timings of each candidate, the fastest is kept
+_autotune_repeats = 3
+
+
 def contract_expression(subscripts, *shapes, **kwargs):
     """Generate an reusable expression for a given contraction with
     specific shapes, which can for example be cached.
@@ -484,7 +1609,20 @@ def contract_expression(subscripts, *shapes, **kwargs):
     subscripts : str
         Specifies the subscripts for summation.
     shapes : sequence of integer tuples
-        Shapes of the arrays to optimize the contraction for.
+        Shapes of the arrays to optimize the contraction for. The arrays
+        themselves are given at the positions listed in ``constants``. If no
+        shapes are given, a ``PolymorphicExpression`` is returned which plans
+        each distinct set of shapes it is called with once.
+    constants : sequence of int, optional
+        The positions of the operands that are the same for every call. The
+        steps that only involve constants are evaluated once when the
+        expression is built, and the path is chosen to minimize the work
+        left for each call.
+    autotune : bool or PathCache, optional
+        Time the expressions of several candidate paths, with and without
+        BLAS, on random operands of ``shapes`` and keep the fastest. The
+        choice is remembered per shape signature in a ``PathCache``, a
+        cache given here can be saved to reuse it between processes.
     kwargs :
         Passed on to ``contract_path`` or ``einsum``. See ``contract``.
 
@@ -492,7 +1630,7 @@ def contract_expression(subscripts, *shapes, **kwargs):
     -------
     expr : ContractExpression
         Callable with signature ``expr(*arrays)`` where the array's shapes
-        should match ``shapes``.
+        should match ``shapes``, leaving out the constants.
 
     Notes
     -----
@@ -501,6 +1639,8 @@ def contract_expression(subscripts, *shapes, **kwargs):
     - The generated expression will work with any arrays which have
       the same rank (number of dimensions) as the original shapes, however, if
       the actual sizes are different, the expression may no longer be optimal.
+      When sizes vary between calls, leave out the shapes to replan per size,
+      ``maxsize=`` and ``bucket=`` are passed on to ``PolymorphicExpression``.
 
     Examples
     --------
@@ -511,6 +1651,13 @@ def contract_expression(subscripts, *shapes, **kwargs):
     >>> np.allclose(c, a @ b)
     True
 
+    Constant operands are given as arrays and contracted once:
+
+    >>> w1, w2 = np.random.rand(4, 5), np.random.rand(5, 6)
+    >>> expr = contract_expression("ab,bc,cd->ad", (3, 4), w1, w2, constants=[1, 2])
+    >>> np.allclose(expr(a), a @ w1 @ w2)
+    True
+
     """
     if not kwargs.get('optimize', True):
         raise ValueError("Can only generate expressions for optimized contractions.")
@@ -518,6 +1665,29 @@ def contract_expression(subscripts, *shapes, **kwargs):
     if kwargs.get('out', None) is not None:
         raise ValueError("`out` should only be specified when calling a `ContractExpression`, not when building it.")
 
-    dummy_arrays = [_ShapeOnly(s) for s in shapes]
+    if not shapes:
+        return PolymorphicExpression(subscripts, **kwargs)
 
-    return contract(subscripts, *dummy_arrays, gen_expression=True, **kwargs)
+    # An empty cache is falsy
+    autotune = kwargs.pop('autotune', None)
+    if (autotune is not None) and (autotune is not False):
+        return _autotuned_expression(subscripts, shapes, autotune, **kwargs)
+
+    constants = set(kwargs.pop('constants', None) or ())
+    if not constants:
+        dummy_arrays = [_ShapeOnly(s) for s in shapes]
+        return contract(subscripts, *dummy_arrays, gen_expression=True, **kwargs)
+
+    values = dict((num, np.asanyarray(shapes[num])) for num in constants)
+    shapes = [values[num].shape if num in values else s for num, s in enumerate(shapes)]
+    path_type = kwargs.pop('optimize', True)
+    if not isinstance(path_type, str) and (path_type is not True) and not callable(path_type):
+        path = path_type
+    else:
+        path = _constants_path(subscripts, shapes, constants, 'greedy' if path_type is True else path_type,
+                               kwargs.get('memory_limit', None), kwargs.get('use_blas', True), kwargs.get('cost_model'))
+
+    dummy_arrays = [_ShapeOnly(s) for s in shapes]
+    expr = contract(subscripts, *dummy_arrays, optimize=path, gen_expression=True, **kwargs)
+    expr._fold_constants(values)
+    return expr
@@ -0,0 +1,159 @@
+"""
+Estimates the run time of contraction steps from their FLOPs, the bytes they
+move and the kernel they run on, so that path finders can minimize time
+rather than the FLOP count
+"""
+
+import json
+import os
+import timeit
+
+import numpy as np
+
+# Where ``calibrate`` stores the model of this machine by default
+default_filename = os.path.join(os.path.expanduser('~'), '.opt_einsum_costs.json')
+
+
+class CostModel(object):
+    """
+    Cost of a contraction step as ``flops * flop_time[kernel] + bytes *
+    byte_time``. A pair contraction that sums over shared indices runs on
+    BLAS (``'blas'``), all other steps on ``np.einsum`` (``'einsum'``). The
+    bytes of a step are those of its inputs and its result. Can be given to
+    ``contract_path`` and ``contract`` as ``cost_model=``.
+
+    Parameters
+    ----------
+    flop_time : dictionary, optional
+        The time of a FLOP of each kernel, ``'einsum'`` and ``'blas'``.
+    byte_time : float, optional (default: 0.0)
+        The time of moving a byte to or from memory.
+    itemsize : int, optional (default: 8)
+        The number of bytes of an element.
+
+    Examples
+    --------
+    >>> model = CostModel({'einsum': 1.0, 'blas': 0.1}, byte_time=0.5)
+    >>> path, path_info = contract_path('ij,jk,kl->il', a, b, c, cost_model=model)
+    """
+
+    def __init__(self, flop_time=None, byte_time=0.0, itemsize=8):
+        self.flop_time = {'einsum': 1.0, 'blas': 1.0}
+        self.flop_time.update(flop_time or {})
+        self.byte_time = byte_time
+        self.itemsize = itemsize
+
+    def __repr__(self):
+        return "CostModel(%r, byte_time=%r, itemsize=%r)" % (self.flop_time, self.byte_time, self.itemsize)
+
+    def kernel(self, inputs, result, idx_removed):
+        """The kernel a step of ``IndexBits`` bitsets runs on."""
+
+        if (len(inputs) == 2) and idx_removed and not (inputs[0] & inputs[1] & result):
+            return 'blas'
+        return 'einsum'
+
+    def cost(self, bits, inputs, result, idx_contract, idx_removed):
+        """
+        The cost of a contraction step, see ``IndexBits.contraction_cost``.
+
+        Parameters
+        ----------
+        bits : IndexBits
+            The bitsets of the contraction.
+        inputs : list of int
+            The bitsets of the contracted terms.
+        result : int
+            The bitset of the result.
+        idx_contract : int
+            The bitset of all indices of the step.
+        idx_removed : int
+            The bitset of the summed indices.
+
+        Returns
+        -------
+        cost : float
+            The estimated time of the step.
+        """
+
+        flops = bits.flop_count(idx_contract, idx_removed, len(inputs))
+        elements = sum(bits.size(x) for x in inputs) + bits.size(result)
+        kernel = self.kernel(inputs, result, idx_removed)
+        return flops * self.flop_time[kernel] + elements * self.itemsize * self.byte_time
+
+    def read_cost(self, size):
+        """The least a later step can cost to read ``size`` elements."""
+        return size * (self.itemsize * self.byte_time + min(self.flop_time.values()))
+
+    def save(self, filename=None):
+        """Writes the model to a JSON file, by default ``default_filename``."""
+
+        with open(filename or default_filename, 'w') as handle:
+            json.dump({'flop_time': self.flop_time, 'byte_time': self.byte_time, 'itemsize': self.itemsize}, handle)
+
+    @classmethod
+    def load(cls, filename=None):
+        """Reads a model written by ``save``."""
+
+        with open(filename or default_filename) as handle:
+            return cls(**json.load(handle))
+
+
+def _best_time(func, repeats):
+    return min(timeit.repeat(func, number=1, repeat=repeats))
+
+
+def calibrate(size=256, repeats=5, filename=None, save=True):
+    """
+    Times each kernel and a memory copy on this machine and returns the
+    matching ``CostModel``, which is written to ``filename`` (by default
+    ``default_filename``) unless ``save`` is False. Times are relative to a
+    FLOP of ``np.einsum``.
+
+    Parameters
+    ----------
+    size : int, optional (default: 256)
+        The size of the indices of the timed contractions.
+    repeats : int, optional (default: 5)
+        The number of timings of each kernel, the fastest is kept.
+    filename : str, optional
+        The file to store the model in.
+    save : bool, optional (default: True)
+        Whether to store the model.
+
+    Returns
+    -------
+    model : CostModel
+        The calibrated model.
+
+    Examples
+    --------
+    >>> model = calibrate()
+    >>> model.flop_time['blas'] < model.flop_time['einsum']
+    True
+    """
+
+    # A batched product sharing a kept index, which BLAS cannot do
+    batch = max(2, size // 16)
+    left = np.random.rand(batch, size, size // 4)
+    right = np.random.rand(batch, size // 4, size)
+    einsum_time = _best_time(lambda: np.einsum('ijk,ikl->ijl', left, right), repeats)
+    einsum_flops = 2 * batch * size * size * (size // 4)
+
+    a = np.random.rand(size, size)
+    b = np.random.rand(size, size)
+    blas_time = _best_time(lambda: np.dot(a, b), repeats)
+    blas_flops = 2 * size ** 3
+
+    src = np.random.rand(16 * size, size)
+    dst = np.empty_like(src)
+    copy_time = _best_time(lambda: np.copyto(dst, src), repeats)
+    copy_bytes = 2 * src.nbytes
+
+    unit = einsum_time / einsum_flops
+    model = CostModel({'einsum': 1.0, 'blas': (blas_time / blas_flops) / unit},
+                      byte_time=(copy_time / copy_bytes) / unit)
+
+    if save:
+        model.save(filename)
+    return model
@@ -172,3 +172,116 @@ def flop_count(idx_contraction, inner, num_terms, size_dictionary):
         op_factor += 1
 
     return overall_size * op_factor
+
+
+class IndexBits(object):
+    """
+    Maps each index of a contraction onto a bit of an integer so that sets of
+    indices can be combined with integer operations (``|``, ``&``, ``& ~``)
+    rather than Python sets. The size of a set of indices is looked up from
+    tables of precomputed size products, one table per byte of the bitset.
+
+    Parameters
+    ----------
+    idx_dict : dictionary
+        Dictionary of index sizes
+    cost_model : CostModel, optional
+        Prices contraction steps rather than counting their FLOPs, see
+        ``opt_einsum.costs``.
+
+    Examples
+    --------
+    >>> bits = IndexBits({'a': 2, 'b': 3, 'c': 5})
+    >>> bits.encode('ac')
+    5
+    >>> bits.decode(5)
+    {'a', 'c'}
+    >>> bits.size(bits.encode('abc'))
+    30
+    """
+
+    def __init__(self, idx_dict, cost_model=None):
+        self.cost_model = cost_model
+        self.indices = sorted(idx_dict)
+        self.bits = {ind: 1 << num for num, ind in enumerate(self.indices)}
+
+        # Product of the sizes of every combination of 8 consecutive bits
+        self.size_tables = []
+        for start in range(0, len(self.indices), 8):
+            sizes = [idx_dict[ind] for ind in self.indices[start:start + 8]]
+            table = [1] * (1 << len(sizes))
+            for byte in range(1, len(table)):
+                low = byte & -byte
+                table[byte] = table[byte ^ low] * sizes[low.bit_length() - 1]
+            self.size_tables.append(table)
+
+    def encode(self, indices):
+        """Returns the bitset of an iterable of indices."""
+        ret = 0
+        for ind in indices:
+            ret |= self.bits[ind]
+        return ret
+
+    def decode(self, bits):
+        """Returns the set of indices of a bitset."""
+        return set(ind for ind in self.indices if bits & self.bits[ind])
+
+    def size(self, bits):
+        """Equivalent of ``compute_size_by_dict`` for a bitset."""
+        ret = 1
+        for table in self.size_tables:
+            if not bits:
+                break
+            ret *= table[bits & 255]
+            bits >>= 8
+        return ret
+
+    def flop_count(self, idx_contraction, inner, num_terms):
+        """Equivalent of ``flop_count`` for a bitset."""
+        op_factor = max(1, num_terms - 1)
+        if inner:
+            op_factor += 1
+
+        return self.size(idx_contraction) * op_factor
+
+    def contraction_cost(self, inputs, result, idx_contraction, inner):
+        """The cost of contracting the bitsets ``inputs`` into ``result``,
+        its FLOP count unless a ``cost_model`` is given.
+        """
+        if self.cost_model is None:
+            return self.flop_count(idx_contraction, inner, len(inputs))
+        return self.cost_model.cost(self, inputs, result, idx_contraction, inner)
+
+    def read_cost(self, size):
+        """The least a step reading ``size`` elements can cost."""
+        if self.cost_model is None:
+            return size
+        return self.cost_model.read_cost(size)
+
+
+def find_contraction_bits(positions, input_bits, output_bits):
+    """
+    Equivalent of ``find_contraction`` where all sets of indices are given
+    as bitsets, see ``IndexBits``.
+
+    Examples
+    --------
+    >>> find_contraction_bits((0, 2), [0b1011, 0b101, 0b1110], 0b101)
+    (5, [5, 5], 10, 15)
+    """
+
+    idx_contract = 0
+    idx_remain = output_bits
+    remaining = []
+    for ind, value in enumerate(input_bits):
+        if ind in positions:
+            idx_contract |= value
+        else:
+            remaining.append(value)
+            idx_remain |= value
+
+    new_result = idx_remain & idx_contract
+    idx_removed = idx_contract & ~new_result
+    remaining.append(new_result)
+
+    return new_result, remaining, idx_removed, idx_contract
@@ -0,0 +1,166 @@
+"""
+Reuses the memory of intermediates between the steps of a contraction
+"""
+
+import numpy as np
+
+
+def plan_buffers(contraction_list, nbytes):
+    """
+    Assigns the intermediates of a contraction to as few buffers as
+    possible. An intermediate is live from the step that computes it until
+    the step that consumes it, after which its buffer can hold the result
+    of a later step.
+
+    Parameters
+    ----------
+    contraction_list : list of tuples
+        The contraction list of ``contract_path(..., einsum_call=True)``.
+    nbytes : list of int
+        The number of bytes of the result of each step.
+
+    Returns
+    -------
+    assignment : list of int
+        The buffer each step writes into, None for the final step.
+    capacities : list of int
+        The number of bytes of each buffer.
+
+    Examples
+    --------
+    >>> contraction_list = [((1, 0), ...), ((2, 1), ...), ((1, 0), ...)]
+    >>> plan_buffers(contraction_list, [80, 40, 8])
+    ([0, 1, None], [80, 40])
+    """
+
+    # Positions hold the step an operand was computed by, None for inputs
+    positions = [None] * (len(contraction_list[0][-2]) + len(contraction_list[0][0]) - 1)
+    assignment = []
+    capacities = []
+    free = []
+
+    for num, contraction in enumerate(contraction_list):
+        consumed = [positions.pop(x) for x in contraction[0]]
+
+        if num == len(contraction_list) - 1:
+            assignment.append(None)
+            break
+
+        # Smallest free buffer that fits, otherwise grow the largest one
+        fits = [x for x in free if capacities[x] >= nbytes[num]]
+        if fits:
+            buf = min(fits, key=lambda x: capacities[x])
+        elif free:
+            buf = max(free, key=lambda x: capacities[x])
+            capacities[buf] = nbytes[num]
+        else:
+            buf = len(capacities)
+            capacities.append(nbytes[num])
+
+        if buf in free:
+            free.remove(buf)
+        assignment.append(buf)
+        positions.append(num)
+
+        # Consumed intermediates can only be overwritten by later steps
+        free.extend(assignment[x] for x in consumed if x is not None)
+
+    return assignment, capacities
+
+
+class BufferPool(object):
+    """
+    Preallocated buffers that the intermediates of ``contract`` are written
+    into through ``out=``, rather than allocating a new array for each step.
+    Buffers are kept between calls, so that repeated contractions of the same
+    size do not allocate at all. Can be given to ``contract`` as
+    ``buffer_pool=``.
+
+    Attributes
+    ----------
+    nbytes : int
+        The number of bytes currently held by the pool.
+    peak_bytes : int
+        The peak number of bytes of intermediates and result of the last
+        contraction.
+
+    Examples
+    --------
+    >>> pool = BufferPool()
+    >>> result = contract('ij,jk,kl,lm->im', a, b, c, d, buffer_pool=pool)
+    >>> pool.peak_bytes
+    """
+
+    def __init__(self):
+        self._buffers = []
+        self.peak_bytes = 0
+
+    @property
+    def nbytes(self):
+        return sum(x.nbytes for x in self._buffers)
+
+    def clear(self):
+        """Releases the memory held by the pool."""
+        self._buffers = []
+
+    def buffers(self, operands, contraction_list, dtype=None):
+        """
+        Plans the buffers of a contraction and returns the array each step
+        should write its result into, None for the final step.
+
+        Parameters
+        ----------
+        operands : list of array_like
+            The operands of the contraction.
+        contraction_list : list of tuples
+            The contraction list of ``contract_path(..., einsum_call=True)``.
+        dtype : data-type, optional
+            The type of the intermediates, by default the result type of the
+            operands of each step.
+
+        Returns
+        -------
+        outs : list of arrays
+            The output array of each step.
+        """
+
+        # Follow the contraction to find the shape and type of each step
+        shapes = [x.shape for x in operands]
+        types = [x.dtype for x in operands]
+        step_shapes = []
+        step_types = []
+        for inds, idx_rm, einsum_str, remaining, do_blas in contraction_list:
+            input_str, result = einsum_str.split('->')
+            dimension_dict = {}
+            for term, x in zip(input_str.split(','), inds):
+                dimension_dict.update(zip(term, shapes.pop(x)))
+
+            step_type = np.result_type(*[types.pop(x) for x in inds])
+            if (dtype is not None) and not do_blas:
+                step_type = np.dtype(dtype)
+
+            shapes.append(tuple(dimension_dict[x] for x in result))
+            types.append(step_type)
+            step_shapes.append(shapes[-1])
+            step_types.append(step_type)
+
+        nbytes = [int(np.prod(shape, dtype=np.int64)) * t.itemsize for shape, t in zip(step_shapes, step_types)]
+        assignment, capacities = plan_buffers(contraction_list, nbytes)
+
+        # Only grow buffers that are too small for this contraction
+        for num, capacity in enumerate(capacities):
+            if num == len(self._buffers):
+                self._buffers.append(np.empty(capacity, dtype=np.uint8))
+            elif self._buffers[num].nbytes < capacity:
+                self._buffers[num] = np.empty(capacity, dtype=np.uint8)
+
+        self.peak_bytes = sum(capacities) + nbytes[-1]
+
+        outs = []
+        for buf, shape, step_type, size in zip(assignment, step_shapes, step_types, nbytes):
+            if buf is None:
+                outs.append(None)
+            else:
+                outs.append(self._buffers[buf][:size].view(step_type).reshape(shape))
+
+        return outs
@@ -8,6 +8,58 @@ einsum_symbols = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
 einsum_symbols_set = set(einsum_symbols)
 
 
+def convert_interleaved_input(operands):
+    """
+    Converts the interleaved input ``(operand, sublist, ..., [sublistout])``
+    to a subscripts string, leaving the operands as they are.
+
+    Returns
+    -------
+    subscripts : str
+        The subscripts, e.g. ``'ab,bc->ac'``.
+    operands : list of array_like
+        The operands, in order.
+
+    Examples
+    --------
+    >>> convert_interleaved_input((a, [0, 1], b, [1, 2], [0, 2]))
+    ('ab,bc->ac', [a, b])
+    """
+
+    tmp_operands = list(operands)
+    operand_list = []
+    subscript_list = []
+    for p in range(len(operands) // 2):
+        operand_list.append(tmp_operands.pop(0))
+        subscript_list.append(tmp_operands.pop(0))
+
+    output_list = tmp_operands[-1] if len(tmp_operands) else None
+    subscripts = ""
+    last = len(subscript_list) - 1
+    for num, sub in enumerate(subscript_list):
+        for s in sub:
+            if s is Ellipsis:
+                subscripts += "..."
+            elif isinstance(s, int):
+                subscripts += einsum_symbols[s]
+            else:
+                raise TypeError("For this input type lists must contain " "either int or Ellipsis")
+        if num != last:
+            subscripts += ","
+
+    if output_list is not None:
+        subscripts += "->"
+        for s in output_list:
+            if s is Ellipsis:
+                subscripts += "..."
+            elif isinstance(s, int):
+                subscripts += einsum_symbols[s]
+            else:
+                raise TypeError("For this input type lists must contain " "either int or Ellipsis")
+
+    return subscripts, operand_list
+
+
 def parse_einsum_input(operands):
     """
     A reproduction of einsum c side einsum parsing in python.
@@ -39,7 +91,7 @@ def parse_einsum_input(operands):
 
     if isinstance(operands[0], str):
         subscripts = operands[0].replace(" ", "")
-        operands = [np.asanyarray(v) for v in operands[1:]]
+        operands = [v if isinstance(v, np.ndarray) else np.asanyarray(v) for v in operands[1:]]
 
         # Ensure all characters are valid
         for s in subscripts:
@@ -49,37 +101,9 @@ def parse_einsum_input(operands):
                 raise ValueError("Character %s is not a valid symbol." % s)
 
     else:
-        tmp_operands = list(operands)
-        operand_list = []
-        subscript_list = []
-        for p in range(len(operands) // 2):
-            operand_list.append(tmp_operands.pop(0))
-            subscript_list.append(tmp_operands.pop(0))
-
-        output_list = tmp_operands[-1] if len(tmp_operands) else None
-        operands = [np.asanyarray(v) for v in operand_list]
-        subscripts = ""
-        last = len(subscript_list) - 1
-        for num, sub in enumerate(subscript_list):
-            for s in sub:
-                if s is Ellipsis:
-                    subscripts += "..."
-                elif isinstance(s, int):
-                    subscripts += einsum_symbols[s]
-                else:
-                    raise TypeError("For this input type lists must contain " "either int or Ellipsis")
-            if num != last:
-                subscripts += ","
-
-        if output_list is not None:
-            subscripts += "->"
-            for s in output_list:
-                if s is Ellipsis:
-                    subscripts += "..."
-                elif isinstance(s, int):
-                    subscripts += einsum_symbols[s]
-                else:
-                    raise TypeError("For this input type lists must contain " "either int or Ellipsis")
+        subscripts, operands = convert_interleaved_input(operands)
+        operands = [np.asanyarray(v) for v in operands]
+
     # Check for proper "->"
     if ("-" in subscripts) or (">" in subscripts):
         invalid = (subscripts.count("-") > 1) or (subscripts.count(">") > 1)
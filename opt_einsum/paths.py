@@ -2,14 +2,115 @@
 Contains the path technology behind opt_einsum in addition to several path helpers
 """
 
+import bisect
+import heapq
+import itertools
+import math
+import random
+import time
+
+import numpy as np
+
 from . import helpers
 
 
-def optimal(input_sets, output_set, idx_dict, memory_limit):
+class _OptimalSearch(object):
+    """
+    Depth first branch and bound search behind ``optimal``. Kept at module
+    level so that branches of the search can be run in worker processes, in
+    which case the bound is shared between them through ``shared_bound``.
+    """
+
+    def __init__(self, output_bits, bits, memory_limit, bound, shared_bound=None):
+        self.output_bits = output_bits
+        self.bits = bits
+        self.memory_limit = memory_limit
+        self.bound = bound
+        self.shared_bound = shared_bound
+
+        # Deepest (most contracted) then cheapest path found so far
+        self.best = (-1, float('inf'), None)
+
+        # Cheapest cost seen for each multiset of remaining terms
+        self.seen_costs = {}
+
+    def contractions(self, remaining, cost):
+        """Yields the ``(con, new_remaining, total_cost)`` within the bound."""
+
+        # The shared bound is a float, only compare costs as floats against it
+        shared_bound = float('inf')
+        if self.shared_bound is not None:
+            shared_bound = self.shared_bound.value
+
+        for x in range(len(remaining)):
+            for y in range(x + 1, len(remaining)):
+
+                # Find the contraction
+                con = (x, y)
+                contract = helpers.find_contraction_bits(con, remaining, self.output_bits)
+                new_result, new_remaining, idx_removed, idx_contract = contract
+
+                # Sieve the results based on memory_limit
+                new_size = self.bits.size(new_result)
+                if new_size > self.memory_limit:
+                    continue
+
+                # Sieve based on the best complete path
+                total_cost = cost + self.bits.contraction_cost([remaining[x], remaining[y]], new_result, idx_contract,
+                                                               idx_removed)
+                if (total_cost > self.bound) or (float(total_cost) > shared_bound):
+                    continue
+
+                yield con, new_remaining, total_cost
+
+    def search(self, path, remaining, cost):
+
+        depth = len(path)
+        if (depth > self.best[0]) or ((depth == self.best[0]) and (cost < self.best[1])):
+            self.best = (depth, cost, path)
+
+        if len(remaining) == 1:
+            self.bound = min(self.bound, cost)
+            if self.shared_bound is not None:
+                with self.shared_bound.get_lock():
+                    self.shared_bound.value = min(self.shared_bound.value, float(cost))
+            return
+
+        for con, new_remaining, total_cost in self.contractions(remaining, cost):
+
+            # Sieve based on the cheapest way of reaching the same terms
+            key = tuple(sorted(new_remaining))
+            if self.seen_costs.get(key, float('inf')) <= total_cost:
+                continue
+            self.seen_costs[key] = total_cost
+
+            self.search(path + [con], new_remaining, total_cost)
+
+
+# The search settings of a worker process, see ``optimal``
+_worker_search = None
+
+
+def _init_optimal_worker(output_bits, bits, memory_limit, bound, shared_bound):
+    global _worker_search
+    _worker_search = (output_bits, bits, memory_limit, bound, shared_bound)
+
+
+def _search_optimal_branch(branch):
+    search = _OptimalSearch(*_worker_search)
+    search.search(*branch)
+    return search.best
+
+
+def optimal(input_sets, output_set, idx_dict, memory_limit, parallel=None, cost_model=None):
     """
     Computes all possible pair contractions, sieves the results based
-    on ``memory_limit`` and returns the lowest cost path. This algorithm
-    scales factorial with respect to the elements in the list ``input_sets``.
+    on ``memory_limit`` and returns the lowest cost path. The search is depth
+    first and is bounded by the cost of the ``greedy`` path and the best path
+    found so far, partial paths which already cost more are discarded. Partial
+    paths leaving the same terms to contract are only continued from the
+    cheapest. This algorithm scales factorial with respect to the elements in
+    the list ``input_sets``.
 
     Paramaters
     ----------
@@ -21,6 +122,13 @@ def optimal(input_sets, output_set, idx_dict, memory_limit):
         Dictionary of index sizes
     memory_limit : int
         The maximum number of elements in a temporary array
+    parallel : int, optional
+        If larger than one, the branches rooted at each first pair contraction
+        are searched in a pool of this many processes which share the best
+        cost found so far. The path found is identical to the serial search.
+    cost_model : CostModel, optional
+        Minimize the cost of this model rather than the FLOP count, see
+        ``opt_einsum.costs``.
 
     Returns
     -------
@@ -36,63 +144,63 @@ def optimal(input_sets, output_set, idx_dict, memory_limit):
     [(0, 2), (0, 1)]
     """
 
-    full_results = [(0, [], input_sets)]
-    for iteration in range(len(input_sets) - 1):
-        iter_results = []
-
-        # Compute all unique pairs
-        comb_iter = []
-        for x in range(len(input_sets) - iteration):
-            for y in range(x + 1, len(input_sets) - iteration):
-                comb_iter.append((x, y))
-
-        for curr in full_results:
-            cost, positions, remaining = curr
-            for con in comb_iter:
+    bits = helpers.IndexBits(idx_dict, cost_model)
+    input_bits = [bits.encode(x) for x in input_sets]
+    output_bits = bits.encode(output_set)
 
-                # Find the contraction
-                contract = helpers.find_contraction(con, remaining, output_set)
-                new_result, new_input_sets, idx_removed, idx_contract = contract
+    # Seed the bound with the greedy path if it contracts pairs all the way
+    bound = float('inf')
+    greedy_path = greedy(input_sets, output_set, idx_dict, memory_limit, cost_model=cost_model)
+    if all(len(con) == 2 for con in greedy_path) and (len(greedy_path) == len(input_sets) - 1):
+        bound = 0
+        remaining = input_bits
+        for con in greedy_path:
+            inputs = [remaining[x] for x in con]
+            contract = helpers.find_contraction_bits(con, remaining, output_bits)
+            new_result, remaining, idx_removed, idx_contract = contract
+            bound += bits.contraction_cost(inputs, new_result, idx_contract, idx_removed)
 
-                # Sieve the results based on memory_limit
-                new_size = helpers.compute_size_by_dict(new_result, idx_dict)
-                if new_size > memory_limit:
-                    continue
+    search = _OptimalSearch(output_bits, bits, memory_limit, bound)
+    if (parallel is None) or (parallel <= 1) or (len(input_sets) < 3):
+        search.search([], input_bits, 0)
+        best = search.best
 
-                # Build (total_cost, positions, indices_remaining)
-                total_cost = cost + helpers.flop_count(idx_contract, idx_removed, len(con), idx_dict)
-                new_pos = positions + [con]
-                iter_results.append((total_cost, new_pos, new_input_sets))
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
 
-        # Update combinatorial list, if we did not find anything return best
-        # path + remaining contractions
-        if iter_results:
-            full_results = iter_results
-        else:
-            path = min(full_results, key=lambda x: x[0])[1]
-            path += [tuple(range(len(input_sets) - iteration))]
-            return path
+        # Each branch is searched independently, the first of the deepest
+        # then cheapest is the path the serial search would have found
+        branches = [([con], new_remaining, cost) for con, new_remaining, cost in search.contractions(input_bits, 0)]
+        best = (0, 0, [])
 
-        # Update list to iterate over
-        full_results = iter_results
+        shared_bound = multiprocessing.Value('d', bound)
+        initargs = (output_bits, bits, memory_limit, bound, shared_bound)
+        with ProcessPoolExecutor(parallel, initializer=_init_optimal_worker, initargs=initargs) as executor:
+            for result in executor.map(_search_optimal_branch, branches):
+                if (result[0] > best[0]) or ((result[0] == best[0]) and (result[1] < best[1])):
+                    best = result
 
-    # If we have not found anything return single einsum contraction
-    if len(full_results) == 0:
-        return [tuple(range(len(input_sets)))]
+    # If we could not contract everything in pairs, contract the remaining
+    depth, cost, path = best
+    if depth < len(input_sets) - 1:
+        path = path + [tuple(range(len(input_sets) - depth))]
 
-    path = min(full_results, key=lambda x: x[0])[1]
     return path
 
 
-def greedy(input_sets, output_set, idx_dict, memory_limit):
+def greedy(input_sets, output_set, idx_dict, memory_limit, cost_model=None):
     """
     Finds the path by contracting the best pair until the input list is
     exhausted. The best pair is found by minimizing the tuple
     ``(-prod(indices_removed), cost)``.  What this amounts to is prioritizing
     matrix multiplication or inner product operations, then Hadamard like
-    operations, and finally outer operations. Outer products are limited by
-    ``memory_limit``. This algorithm scales cubically with respect to the number of
-    elements in the list ``input_sets``.
+    operations. Only pairs which share an index are considered, outer products
+    are only formed once no such pair is left and are limited by
+    ``memory_limit``. The candidate pairs are kept in a heap and only pairs
+    involving a new intermediate are scored after each contraction, so this
+    algorithm scales like ``N^2 log(N)`` with respect to the number of
+    elements in the list ``input_sets`` for sparsely connected terms.
 
     Paramaters
     ----------
@@ -104,6 +212,9 @@ def greedy(input_sets, output_set, idx_dict, memory_limit):
         Dictionary of index sizes
     memory_limit_limit : int
         The maximum number of elements in a temporary array
+    cost_model : CostModel, optional
+        Break ties by the cost of this model rather than the FLOP count, see
+        ``opt_einsum.costs``.
 
     Returns
     -------
@@ -122,54 +233,1055 @@ def greedy(input_sets, output_set, idx_dict, memory_limit):
     if len(input_sets) == 1:
         return [(0, )]
 
+    bits = helpers.IndexBits(idx_dict, cost_model)
+    input_bits = [bits.encode(x) for x in input_sets]
+    output_bits = bits.encode(output_set)
+
+    return ssa_to_linear(_greedy_ssa(bits, input_bits, output_bits, memory_limit))
+
+
+def _greedy_ssa(bits, input_sets, output_set, memory_limit, rng=None, temperature=1.0, nbranch=8):
+    """
+    The SSA path of ``greedy`` for bitsets of the terms. Given a random
+    number generator ``rng``, each contraction is drawn from the ``nbranch``
+    best pairs with Boltzmann weights ``exp(-(E - E_min) / temperature)``,
+    where the energy ``E`` is the log of the cost of a pair per element it
+    removes, rather than always taking the best pair.
+    """
+
     # Build up a naive cost
-    contract = helpers.find_contraction(range(len(input_sets)), input_sets, output_set)
+    contract = helpers.find_contraction_bits(range(len(input_sets)), input_sets, output_set)
     idx_result, new_input_sets, idx_removed, idx_contract = contract
-    naive_cost = helpers.flop_count(idx_contract, idx_removed, len(input_sets), idx_dict)
+    naive_cost = bits.contraction_cost(input_sets, idx_result, idx_contract, idx_removed)
+
+    # Terms are given increasing ids, which keeps them in the same order as
+    # their positions in the remaining list
+    terms = dict(enumerate(input_sets))
+    holders = {}
+    for num, term in terms.items():
+        for bit in _iter_bits(term):
+            holders.setdefault(bit, set()).add(num)
+
+    def _score_pair(x, y):
+        idx_contract = terms[x] | terms[y]
+
+        # Indices are removed if no other term or the output needs them
+        idx_removed = 0
+        for bit in _iter_bits(idx_contract & ~output_set):
+            if len(holders[bit]) == bool(terms[x] & bit) + bool(terms[y] & bit):
+                idx_removed |= bit
+        idx_result = idx_contract & ~idx_removed
+
+        # Sieve the results based on memory_limit
+        if bits.size(idx_result) > memory_limit:
+            return None
+
+        # Build sort tuple
+        removed_size = bits.size(idx_removed)
+        cost = bits.contraction_cost([terms[x], terms[y]], idx_result, idx_contract, idx_removed)
+        return (-removed_size, cost, x, y, idx_result)
+
+    def _push_neighbors(x):
+        neighbors = set().union(*[holders[bit] for bit in _iter_bits(terms[x])])
+        for y in sorted(neighbors):
+            if y != x:
+                candidate = _score_pair(min(x, y), max(x, y))
+                if candidate is not None:
+                    heapq.heappush(heap, candidate)
+
+    # Start from all pairs sharing an index
+    heap = []
+    for x in sorted(terms):
+        _push_neighbors(x)
 
     path_cost = 0
+    ssa_path = []
+    while len(terms) > 1:
+
+        # Pairs of contracted terms are stale, this cost can only get worse
+        best = None
+        choices = []
+        while heap and (len(choices) < (1 if rng is None else nbranch)):
+            candidate = heapq.heappop(heap)
+            sort, cost, x, y, idx_result = candidate
+            if (x in terms) and (y in terms) and ((path_cost + cost) <= naive_cost):
+                choices.append(candidate)
+
+        if len(choices) == 1:
+            best = choices[0]
+        elif choices:
+            energies = [math.log(max(cost, 1)) - math.log(-sort) for sort, cost, x, y, idx_result in choices]
+            weights = [math.exp((min(energies) - energy) / temperature) for energy in energies]
+            pick = rng.random() * sum(weights)
+            for best, weight in zip(choices, weights):
+                pick -= weight
+                if pick <= 0:
+                    break
+
+            # The pairs not taken are still candidates
+            for candidate in choices:
+                if candidate is not best:
+                    heapq.heappush(heap, candidate)
+
+        # Nothing sharing an index is left, consider outer products
+        if best is None:
+            candidates = []
+            for x in sorted(terms):
+                for y in sorted(terms):
+                    if y > x:
+                        candidate = _score_pair(x, y)
+                        if (candidate is not None) and ((path_cost + candidate[1]) <= naive_cost):
+                            candidates.append(candidate)
+            if not candidates:
+                break
+            best = min(candidates)
+
+        # Contract the pair and update which terms hold each index
+        sort, cost, x, y, idx_result = best
+        new = len(input_sets) + len(ssa_path)
+        for bit in _iter_bits(terms[x] | terms[y]):
+            holders[bit].discard(x)
+            holders[bit].discard(y)
+            if idx_result & bit:
+                holders[bit].add(new)
+        del terms[x], terms[y]
+        terms[new] = idx_result
+        ssa_path.append((x, y))
+        path_cost += cost
+
+        # Only pairs with the new term need to be scored
+        _push_neighbors(new)
+
+    # If we did not find a new contraction contract remaining
+    if len(terms) > 1:
+        ssa_path.append(tuple(sorted(terms)))
+
+    return ssa_path
+
 
+def _ssa_cost(bits, input_bits, output_bits, ssa_path):
+    """The cost of an SSA path."""
+
+    terms = dict(enumerate(input_bits))
+    remaining = set(terms)
+    cost = 0
+    for num, con in enumerate(ssa_path):
+        inputs = [terms[x] for x in con]
+        remaining.difference_update(con)
+        idx_contract = 0
+        for x in inputs:
+            idx_contract |= x
+        idx_remain = output_bits
+        for x in remaining:
+            idx_remain |= terms[x]
+        new_result = idx_contract & idx_remain
+        cost += bits.contraction_cost(inputs, new_result, idx_contract, idx_contract & ~new_result)
+
+        terms[len(input_bits) + num] = new_result
+        remaining.add(len(input_bits) + num)
+
+    return cost
+
+
+def _random_greedy_trials(bits, input_bits, output_bits, memory_limit, seeds, temperature, nbranch, deadline):
+    """Runs a ``random_greedy`` trial for each seed until the ``deadline``
+    and returns the ``(cost, seed, ssa_path)`` of the cheapest.
+    """
+
+    best = None
+    for seed in seeds:
+        if (best is not None) and (deadline is not None) and (time.time() > deadline):
+            break
+
+        rng = random.Random(seed)
+        ssa_path = _greedy_ssa(bits, input_bits, output_bits, memory_limit, rng=rng, temperature=temperature,
+                               nbranch=nbranch)
+        cost = _ssa_cost(bits, input_bits, output_bits, ssa_path)
+        if (best is None) or ((cost, seed) < best[:2]):
+            best = (cost, seed, ssa_path)
+
+    return best
+
+
+def random_greedy(input_sets, output_set, idx_dict, memory_limit, trials=32, temperature=1.0, nbranch=8, seed=None,
+                  max_time=None, parallel=None, cost_model=None):
+    """
+    Runs ``greedy`` many times, each time drawing the pair to contract from
+    the ``nbranch`` best pairs with Boltzmann weights rather than always
+    taking the best one, and returns the cheapest path found. The first
+    trial is the plain ``greedy`` path, so the result is never worse.
+
+    Paramaters
+    ----------
+    input_sets : list
+        List of sets that represent the lhs side of the einsum subscript
+    output_set : set
+        Set that represents the rhs side of the overall einsum subscript
+    idx_dict : dictionary
+        Dictionary of index sizes
+    memory_limit : int
+        The maximum number of elements in a temporary array
+    trials : int, optional (default: 32)
+        The number of paths to sample.
+    temperature : float, optional (default: 1.0)
+        How far the draws stray from the best pair, in units of the log of
+        the cost per element removed.
+    nbranch : int, optional (default: 8)
+        The number of best pairs drawn from.
+    seed : int, optional
+        Makes the trials reproducible, trial ``k`` is seeded with ``seed + k``.
+    max_time : float, optional
+        Stop sampling after this many seconds, even if fewer than ``trials``
+        paths were sampled.
+    parallel : int, optional
+        If larger than one, the trials are split between this many
+        processes. Without ``max_time`` the path found is identical to the
+        serial search.
+    cost_model : CostModel, optional
+        Minimize the cost of this model rather than the FLOP count, see
+        ``opt_einsum.costs``.
+
+    Returns
+    -------
+    path : list
+        The cheapest contraction order found within the memory limit
+        constraint.
+
+    Examples
+    --------
+    >>> isets = [set('abd'), set('ac'), set('bdc')]
+    >>> oset = set('')
+    >>> idx_sizes = {'a': 1, 'b':2, 'c':3, 'd':4}
+    >>> random_greedy(isets, oset, idx_sizes, 5000, seed=0)
+    [(0, 2), (0, 1)]
+    """
+
+    if len(input_sets) == 1:
+        return [(0, )]
+
+    bits = helpers.IndexBits(idx_dict, cost_model)
+    input_bits = [bits.encode(x) for x in input_sets]
+    output_bits = bits.encode(output_set)
+
+    ssa_path = _greedy_ssa(bits, input_bits, output_bits, memory_limit)
+    best = (_ssa_cost(bits, input_bits, output_bits, ssa_path), -1, ssa_path)
+
+    if seed is None:
+        seed = random.randrange(2**31)
+    seeds = [seed + num for num in range(trials - 1)]
+    deadline = None if max_time is None else time.time() + max_time
+    args = (bits, input_bits, output_bits, memory_limit)
+
+    if (parallel is None) or (parallel <= 1):
+        results = [_random_greedy_trials(*args, seeds=seeds, temperature=temperature, nbranch=nbranch,
+                                         deadline=deadline)]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(parallel) as executor:
+            futures = [
+                executor.submit(_random_greedy_trials, *args, seeds=seeds[num::parallel], temperature=temperature,
+                                nbranch=nbranch, deadline=deadline) for num in range(parallel)
+            ]
+            results = [future.result() for future in futures]
+
+    for result in results:
+        if (result is not None) and (result[:2] < best[:2]):
+            best = result
+
+    return ssa_to_linear(best[2])
+
+
+class RandomGreedy(object):
+    """
+    The settings of a ``random_greedy`` search, which can be given to
+    ``contract_path`` and ``contract`` as the path, for example
+    ``path=RandomGreedy(trials=128, seed=0)``. See ``random_greedy`` for the
+    parameters.
+    """
+
+    def __init__(self, trials=32, temperature=1.0, nbranch=8, seed=None, max_time=None, parallel=None):
+        self.trials = trials
+        self.temperature = temperature
+        self.nbranch = nbranch
+        self.seed = seed
+        self.max_time = max_time
+        self.parallel = parallel
+
+    def __repr__(self):
+        return ("RandomGreedy(trials=%r, temperature=%r, nbranch=%r, seed=%r, max_time=%r, parallel=%r)" %
+                (self.trials, self.temperature, self.nbranch, self.seed, self.max_time, self.parallel))
+
+    def __call__(self, input_sets, output_set, idx_dict, memory_limit, cost_model=None):
+        return random_greedy(input_sets, output_set, idx_dict, memory_limit, trials=self.trials,
+                             temperature=self.temperature, nbranch=self.nbranch, seed=self.seed,
+                             max_time=self.max_time, parallel=self.parallel, cost_model=cost_model)
+
+
+def _iter_bits(bits):
+    """Yields each set bit of an integer in turn."""
+    while bits:
+        bit = bits & -bits
+        yield bit
+        bits ^= bit
+
+
+def ssa_to_linear(ssa_path):
+    """
+    Converts a path expressed in static single assignment (SSA) form, where
+    every input and intermediate is given a unique and never reused id, to the
+    positional form used throughout opt_einsum.
+
+    Parameters
+    ----------
+    ssa_path : list of tuples
+        The contraction path where inputs are numbered ``0..N-1`` and the
+        result of the ``k``-th contraction is given the id ``N + k``.
+
+    Returns
+    -------
+    path : list of tuples
+        The equivalent path in the positional form used by ``contract_path``.
+
+    Examples
+    --------
+    >>> ssa_to_linear([(0, 3), (2, 4), (1, 5)])
+    [(0, 3), (1, 2), (0, 1)]
+    """
+
+    num_inputs = sum(len(x) for x in ssa_path) - len(ssa_path) + 1
+    ids = list(range(num_inputs))
     path = []
-    for iteration in range(len(input_sets) - 1):
-        iteration_results = []
-        comb_iter = []
+    for ssa_id, con in enumerate(ssa_path, num_inputs):
+        positions = tuple(sorted(ids.index(x) for x in con))
+        for pos in reversed(positions):
+            del ids[pos]
+        ids.append(ssa_id)
+        path.append(positions)
 
-        # Compute all unique pairs
-        for x in range(len(input_sets)):
-            for y in range(x + 1, len(input_sets)):
-                comb_iter.append((x, y))
+    return path
 
-        for positions in comb_iter:
 
-            # Find the contraction
-            contract = helpers.find_contraction(positions, input_sets, output_set)
-            idx_result, new_input_sets, idx_removed, idx_contract = contract
+def _linear_to_ssa(path, num_inputs):
+    """The inverse of ``ssa_to_linear``."""
 
-            # Sieve the results based on memory_limit
-            if helpers.compute_size_by_dict(idx_result, idx_dict) > memory_limit:
-                continue
+    ids = list(range(num_inputs))
+    ssa_path = []
+    for ssa_id, con in enumerate(path, num_inputs):
+        ssa_path.append(tuple(sorted(ids[x] for x in con)))
+        for pos in sorted(con, reverse=True):
+            del ids[pos]
+        ids.append(ssa_id)
+
+    return ssa_path
+
+
+def _tree_to_ssa(tree, ssa_path, num_inputs):
+    """
+    Appends the contractions of a nested tuple contraction tree to
+    ``ssa_path`` and returns the SSA id of the tree's root.
+    """
+
+    if not isinstance(tree, tuple):
+        return tree
+
+    ssa_path.append(tuple(_tree_to_ssa(branch, ssa_path, num_inputs) for branch in tree))
+    return num_inputs + len(ssa_path) - 1
+
+
+def dynamic_programming(input_sets, output_set, idx_dict, memory_limit, cost_model=None):
+    """
+    Finds the lowest cost path by dynamic programming over subsets of the
+    input terms. Each subset of inputs always produces the same intermediate,
+    so the cheapest way to build it only needs to be found once. Subsets of
+    connected terms (terms sharing an index) are searched first, keeping only
+    those below a cost cap which is doubled until a path is found. The cost of
+    that path then caps a search which also considers outer products. This
+    algorithm returns a path of the same cost as ``optimal`` but scales
+    exponentially, rather than factorially, with the number of terms.
+
+    Paramaters
+    ----------
+    input_sets : list
+        List of sets that represent the lhs side of the einsum subscript
+    output_set : set
+        Set that represents the rhs side of the overall einsum subscript
+    idx_dict : dictionary
+        Dictionary of index sizes
+    memory_limit : int
+        The maximum number of elements in a temporary array
+    cost_model : CostModel, optional
+        Minimize the cost of this model rather than the FLOP count, see
+        ``opt_einsum.costs``.
+
+    Returns
+    -------
+    path : list
+        The optimal contraction order within the memory limit constraint.
+
+    Examples
+    --------
+    >>> isets = [set('abd'), set('ac'), set('bdc')]
+    >>> oset = set('')
+    >>> idx_sizes = {'a': 1, 'b':2, 'c':3, 'd':4}
+    >>> dynamic_programming(isets, oset, idx_sizes, 5000)
+    [(0, 2), (0, 1)]
+    """
+
+    return _dynamic_programming(input_sets, output_set, idx_dict, memory_limit, cost_model=cost_model)
+
+
+class _SearchTimeout(Exception):
+    """Raised by a search which ran past its deadline."""
+
+
+def _dynamic_programming(input_sets, output_set, idx_dict, memory_limit, cost_model=None, deadline=None):
+    """
+    The path of ``dynamic_programming``, raises ``_SearchTimeout`` once the
+    search runs past ``deadline`` (a ``time.time()``).
+    """
+
+    num_inputs = len(input_sets)
+    if num_inputs == 1:
+        return [(0, )]
+
+    full = (1 << num_inputs) - 1
+    inputs = [1 << num for num in range(num_inputs)]
+
+    bits = helpers.IndexBits(idx_dict, cost_model)
+    input_bits = [bits.encode(x) for x in input_sets]
+    output_bits = bits.encode(output_set)
+
+    # Bitmask of the input terms each index (bit) appears in
+    idx_terms = {}
+    for num, ibits in enumerate(input_bits):
+        for bit in bits.bits.values():
+            if ibits & bit:
+                idx_terms[bit] = idx_terms.get(bit, 0) | (1 << num)
+
+    # Indices only found on a single input, summed when it is first contracted
+    private = 0
+    for bit, terms in idx_terms.items():
+        if not (terms & (terms - 1)):
+            private |= bit
+    private &= ~output_bits
+
+    # Maps a bitmask of inputs to (cost, indices, contraction tree)
+    best = {}
+
+    def join(left, right, cost_cap):
+        """The result of contracting the best ``left`` and ``right``, or
+        ``None`` if it is over ``memory_limit`` or costs more than ``cost_cap``.
+        """
+        left_cost, left_inds, left_tree = best[left]
+        right_cost, right_inds, right_tree = best[right]
+
+        # Only shared or private indices can be removed, if no other term needs them
+        mask = left | right
+        idx_contract = left_inds | right_inds
+        idx_removed = idx_contract & private
+        shared = left_inds & right_inds & ~output_bits & ~private
+        while shared:
+            bit = shared & -shared
+            if not (idx_terms[bit] & ~mask):
+                idx_removed |= bit
+            shared ^= bit
+        new_inds = idx_contract & ~idx_removed
+
+        # Sieve the results based on memory_limit
+        new_size = bits.size(new_inds)
+        if new_size > memory_limit:
+            return None
+
+        # Sieve based on cost, unfinished intermediates must be read at least once more
+        # and writing the result costs at least as much as reading it
+        read_cost = bits.read_cost(new_size) if mask != full else 0
+        if left_cost + right_cost + 2 * read_cost > cost_cap:
+            return None
+        step_cost = bits.contraction_cost([left_inds, right_inds], new_inds, idx_contract, idx_removed)
+        cost = left_cost + right_cost + step_cost
+        if cost + read_cost > cost_cap:
+            return None
+        return (cost, new_inds, (left_tree, right_tree))
+
+    def check_deadline():
+        if (deadline is not None) and (time.time() > deadline):
+            raise _SearchTimeout()
+
+    # Terms sharing an index with each term
+    adjacent = [0] * num_inputs
+    for terms in idx_terms.values():
+        rest = terms
+        while rest:
+            term = rest & -rest
+            adjacent[term.bit_length() - 1] |= terms & ~term
+            rest ^= term
+
+    neighbour_sets = {}
+
+    def neighbours(mask):
+        """The terms outside ``mask`` sharing an index with it."""
+        if mask not in neighbour_sets:
+            ret = 0
+            rest = mask
+            while rest:
+                term = rest & -rest
+                ret |= adjacent[term.bit_length() - 1]
+                rest ^= term
+            neighbour_sets[mask] = ret & ~mask
+        return neighbour_sets[mask]
+
+    def search(atoms, cost_cap, connected=False):
+        """Fills ``best`` for all unions of ``atoms``, only joining those
+        sharing an index if ``connected``.
+        """
+
+        levels = [None, {x: best[x] for x in atoms}]
+        for size in range(2, len(atoms) + 1):
+            level = {}
+            for left_size in range(1, size // 2 + 1):
+                right_size = size - left_size
+                for left in levels[left_size]:
+                    check_deadline()
+                    near = neighbours(left) if connected else ~left
+                    for right in levels[right_size]:
+                        if (left & right) or not (right & near):
+                            continue
+                        if (left_size == right_size) and (left > right):
+                            continue
+                        result = join(left, right, cost_cap)
+                        if result is None:
+                            continue
+                        mask = left | right
+                        if (mask not in level) or (result[0] < level[mask][0]):
+                            level[mask] = result
+
+            levels.append(level)
+            for mask, result in level.items():
+                if (mask not in best) or (result[0] < best[mask][0]):
+                    best[mask] = result
+
+    def search_outer(cost_cap):
+        """Lowers the costs in ``best`` with outer products anywhere in the
+        path. Pairs sharing an index only need contracting again if one of them
+        was lowered here, the others were already found by ``search_joined``.
+        """
+
+        # Intermediates that may still be part of a cheaper path by number of
+        # terms, in order of the size of their indices
+        levels = [[] for _ in range(num_inputs + 1)]
+        kept = set()
+        for mask, (cost, inds, _) in best.items():
+            size = bits.size(inds & ~private)
+            if cost + bits.read_cost(size) <= cost_cap:
+                levels[bin(mask).count('1')].append((size, mask))
+                kept.add(mask)
+        for level in levels:
+            level.sort()
+
+        lowered = set()
+        lowered_levels = [[] for _ in range(num_inputs + 1)]
+
+        def update(left, right, level):
+            result = join(left, right, cost_cap)
+            mask = left | right
+            if (result is None) or ((mask in best) and (result[0] >= best[mask][0])):
+                return
+            entry = (bits.size(result[1]), mask)
+            if mask not in kept:
+                bisect.insort(levels[level], entry)
+                kept.add(mask)
+            if mask not in lowered:
+                lowered.add(mask)
+                lowered_levels[level].append(entry)
+            best[mask] = result
+
+        for size in range(2, num_inputs):
+            for left_size in range(1, size // 2 + 1):
+                right_size = size - left_size
+                for left_inds_size, left in levels[left_size]:
+                    check_deadline()
+                    budget = cost_cap - best[left][0]
+                    near = left | neighbours(left)
+
+                    # Writing an outer product costs at least as much as reading it once more,
+                    # so larger partners only cost more
+                    for right_inds_size, right in levels[right_size]:
+                        least_cost = 2 * bits.read_cost(left_inds_size * right_inds_size)
+                        if least_cost > budget:
+                            break
+                        if (right & near) or ((left_size == right_size) and (left > right)):
+                            continue
+                        if best[right][0] + least_cost <= budget:
+                            update(left, right, size)
+
+                    # Pairs sharing an index cost at least reading the larger of them
+                    rights = levels[right_size] if left in lowered else lowered_levels[right_size]
+                    for right_inds_size, right in rights:
+                        if (right & left) or not (right & near) or ((left_size == right_size) and (left > right)):
+                            continue
+                        if best[right][0] + bits.read_cost(max(left_inds_size, right_inds_size)) <= budget:
+                            update(left, right, size)
+
+        # Each part of the full contraction has a single possible partner
+        for left_size in range(1, num_inputs // 2 + 1):
+            for _, left in levels[left_size]:
+                right = full ^ left
+                if (right not in kept) or ((left_size * 2 == num_inputs) and (left > right)):
+                    continue
+                if (right & neighbours(left)) and not ((left in lowered) or (right in lowered)):
+                    continue
+                result = join(left, right, cost_cap)
+                if (result is not None) and ((full not in best) or (result[0] < best[full][0])):
+                    best[full] = result
 
-            # Build sort tuple
-            removed_size = helpers.compute_size_by_dict(idx_removed, idx_dict)
-            cost = helpers.flop_count(idx_contract, idx_removed, len(positions), idx_dict)
-            sort = (-removed_size, cost)
+    # Find the connected components of the index graph
+    components = []
+    for num in range(num_inputs):
+        component = 1 << num
+        for other in list(components):
+            if any((idx_terms[bit] & other) for bit in idx_terms if input_bits[num] & bit):
+                components.remove(other)
+                component |= other
+        components.append(component)
 
-            # Sieve based on total cost as well
-            if (path_cost + cost) > naive_cost:
+    def search_joined(cost_cap):
+        """Fills ``best`` with the intermediates cheaper than ``cost_cap``
+        which only contract pairs sharing an index, or whole components.
+        """
+
+        best.clear()
+        for num, ibits in enumerate(input_bits):
+            best[1 << num] = (0, ibits, num)
+
+        for component in components:
+            search([x for x in inputs if x & component], cost_cap, True)
+        if (len(components) > 1) and all(component in best for component in components):
+            search(components, cost_cap)
+
+    # A pairwise greedy path bounds the cost. Searches below a lower cap are
+    # much faster, so the cap starts at the least the inputs cost to read and
+    # doubles until a path is found, twice the greedy cost leaves room for
+    # rounding. If the memory limit allows no pairwise path, everything is
+    # searched.
+    greedy_path = _greedy_ssa(bits, input_bits, output_bits, memory_limit)
+    cost_cap = float('inf')
+    if all(len(con) == 2 for con in greedy_path):
+        greedy_cost = _ssa_cost(bits, input_bits, output_bits, greedy_path)
+        cost_cap = max(bits.read_cost(bits.size(x)) for x in input_bits) or greedy_cost
+        while True:
+            search_joined(cost_cap)
+            if (full in best) or (cost_cap >= 2 * greedy_cost):
+                break
+            cost_cap *= 2
+    else:
+        search_joined(cost_cap)
+
+    # Outer products can still lower the cost, only search those cheaper than what we have
+    if full in best:
+        cost_cap = best[full][0]
+    search_outer(cost_cap)
+
+    ssa_path = []
+    if full in best:
+        _tree_to_ssa(best[full][2], ssa_path, num_inputs)
+        return ssa_to_linear(ssa_path)
+
+    # Memory limited, as optimal: perform the most pair contractions at the
+    # lowest cost and contract the remaining intermediates at once
+    partitions = {0: (0, 0, ())}
+
+    def partition(mask):
+        if mask not in partitions:
+            low = mask & -mask
+            candidates = []
+            for sub, (cost, _, tree) in best.items():
+                if (sub & low) and ((sub & mask) == sub):
+                    num_parts, rest_cost, rest_trees = partition(mask ^ sub)
+                    candidates.append((num_parts + 1, rest_cost + cost, (tree, ) + rest_trees))
+            partitions[mask] = min(candidates, key=lambda x: x[:2])
+        return partitions[mask]
+
+    roots = [_tree_to_ssa(tree, ssa_path, num_inputs) for tree in partition(full)[2]]
+    ssa_path.append(tuple(roots))
+    return ssa_to_linear(ssa_path)
+
+
+def _linear_to_tree(path, leaves):
+    """The nested tuple contraction tree of a linear ``path`` over ``leaves``."""
+
+    trees = list(leaves)
+    for con in path:
+        branches = [trees.pop(x) for x in sorted(con, reverse=True)]
+        trees.append(tuple(branches))
+    return trees[0]
+
+
+def _bisect(terms, input_sets, idx_dict, imbalance, passes):
+    """
+    Splits ``terms`` in two halves sharing as few and as small indices as
+    possible. The halves are found by spectral bisection of the graph where
+    terms sharing an index are joined, each index weighing the log of its
+    size, and refined by moving single terms while that lowers the weight
+    of the cut, as in Kernighan-Lin.
+    """
+
+    num = len(terms)
+    position = {term: x for x, term in enumerate(terms)}
+    holders = {}
+    for term in terms:
+        for ind in input_sets[term]:
+            holders.setdefault(ind, []).append(position[term])
+    weights = {ind: math.log(max(idx_dict[ind], 2), 2) for ind in holders}
+
+    # Laplacian of the graph, an index held by k terms joins each pair with 1 / (k - 1) of its weight
+    laplacian = np.zeros((num, num))
+    for ind, members in holders.items():
+        if len(members) < 2:
+            continue
+        weight = weights[ind] / (len(members) - 1)
+        for x in members:
+            laplacian[x, members] -= weight
+            laplacian[x, x] += weight * len(members)
+
+    def cut_weight(side):
+        return sum(weights[ind] for ind, members in holders.items() if 0 < sum(side[x] for x in members) < len(members))
+
+    # The Fiedler vector orders the terms, split at the median. The two
+    # lowest modes of regular graphs such as lattices are often degenerate,
+    # their combinations are tried as well
+    vectors = np.linalg.eigh(laplacian)[1][:, 1:3]
+    if vectors.shape[1] == 2:
+        vectors = [vectors[:, 0], vectors[:, 1], vectors[:, 0] + vectors[:, 1], vectors[:, 0] - vectors[:, 1]]
+    else:
+        vectors = [vectors[:, 0]]
+
+    best = None
+    for vector in vectors:
+        order = sorted(range(num), key=lambda x: (vector[x], x))
+        trial = [0] * num
+        for x in order[num // 2:]:
+            trial[x] = 1
+        weight = cut_weight(trial)
+        if (best is None) or (weight < best[0]):
+            best = (weight, trial)
+    side = best[1]
+
+    # Number of terms of each index on side 1
+    count = {ind: sum(side[x] for x in members) for ind, members in holders.items()}
+    sizes = [num - sum(side), sum(side)]
+    min_size = max(1, int(num * (0.5 - imbalance)))
+
+    def gain(x):
+        """Reduction of the cut weight if term ``x`` changes side."""
+        ret = 0
+        for ind in input_sets[terms[x]]:
+            members = len(holders[ind])
+            here = count[ind] if side[x] else members - count[ind]
+            if here == 1 and members > 1:
+                ret += weights[ind]
+            elif here == members and members > 1:
+                ret -= weights[ind]
+        return ret
+
+    def move(x):
+        delta = -1 if side[x] else 1
+        for ind in input_sets[terms[x]]:
+            count[ind] += delta
+        sizes[side[x]] -= 1
+        side[x] = 1 - side[x]
+        sizes[side[x]] += 1
+
+    # Each pass moves every term once, best first even if the cut gets
+    # worse, and then undoes the moves after the lowest cut seen
+    for _ in range(passes):
+        moves = []
+        total = 0
+        best_total = 0
+        best_moves = 0
+        moved = set()
+
+        # Gains are kept in a heap, entries of terms whose gain changed are stale
+        gains = [gain(x) for x in range(num)]
+        heap = [(-gains[x], x) for x in range(num)]
+        heapq.heapify(heap)
+        skipped = []
+        while heap:
+            neg_gain, x = heapq.heappop(heap)
+            if (x in moved) or (-neg_gain != gains[x]):
                 continue
+            if sizes[side[x]] <= min_size:
+                skipped.append((neg_gain, x))
+                continue
+
+            move(x)
+            moved.add(x)
+            moves.append(x)
+            total -= neg_gain
+            if total > best_total + 1e-12:
+                best_total, best_moves = total, len(moves)
+
+            # Moving changes the balance and the gains of the neighbors
+            for entry in skipped:
+                heapq.heappush(heap, entry)
+            skipped = []
+            neighbors = set()
+            for ind in input_sets[terms[x]]:
+                neighbors.update(holders[ind])
+            for y in neighbors:
+                if y not in moved:
+                    gains[y] = gain(y)
+                    heapq.heappush(heap, (-gains[y], y))
 
-            # Add contraction to possible choices
-            iteration_results.append([sort, positions, new_input_sets])
+        for x in reversed(moves[best_moves:]):
+            move(x)
 
-        # If we did not find a new contraction contract remaining
-        if len(iteration_results) == 0:
-            path.append(tuple(range(len(input_sets))))
+        if best_moves == 0:
             break
 
-        # Sort based on first index
-        best = min(iteration_results, key=lambda x: x[0])
-        path.append(best[1])
-        input_sets = best[2]
-        path_cost += best[0][1]
+    return [terms[x] for x in range(num) if not side[x]], [terms[x] for x in range(num) if side[x]]
 
-    return path
+
+def graph_partition(input_sets, output_set, idx_dict, memory_limit, leaf_size=8, imbalance=0.1, passes=4,
+                    cost_model=None):
+    """
+    Divide and conquer path for networks with hundreds or thousands of
+    terms. The terms are recursively bisected so that the indices between
+    the halves are as few and as small as possible, each half is contracted
+    on its own and the two results are contracted last. Groups of at most
+    ``leaf_size`` terms are contracted along their ``dynamic_programming``
+    path.
+
+    Paramaters
+    ----------
+    input_sets : list
+        List of sets that represent the lhs side of the einsum subscript
+    output_set : set
+        Set that represents the rhs side of the overall einsum subscript
+    idx_dict : dictionary
+        Dictionary of index sizes
+    memory_limit : int
+        The maximum number of elements in a temporary array
+    leaf_size : int, optional (default: 8)
+        The largest group of terms searched exactly.
+    imbalance : float, optional (default: 0.1)
+        How far the halves of a bisection may stray from half of the terms.
+    passes : int, optional (default: 4)
+        The number of Kernighan-Lin passes refining each bisection.
+    cost_model : CostModel, optional
+        Minimize the cost of this model in the leaf groups rather than the
+        FLOP count, see ``opt_einsum.costs``.
+
+    Returns
+    -------
+    path : list
+        The contraction order, intermediates larger than ``memory_limit``
+        are left to a final contraction of the remaining terms.
+
+    Examples
+    --------
+    >>> isets = [set('ab'), set('bc'), set('cd'), set('da')]
+    >>> graph_partition(isets, set(), {'a': 2, 'b': 3, 'c': 4, 'd': 5}, 5000, leaf_size=2)
+    [(0, 1), (0, 1), (0, 1)]
+    """
+
+    return _graph_partition(input_sets, output_set, idx_dict, memory_limit, leaf_size=leaf_size,
+                            imbalance=imbalance, passes=passes, cost_model=cost_model)
+
+
+def _graph_partition(input_sets, output_set, idx_dict, memory_limit, leaf_size=8, imbalance=0.1, passes=4,
+                     cost_model=None, deadline=None):
+    """
+    The path of ``graph_partition``, raises ``_SearchTimeout`` once the
+    search runs past ``deadline`` (a ``time.time()``).
+    """
+
+    num_inputs = len(input_sets)
+    if num_inputs == 1:
+        return [(0, )]
+
+    input_sets = [set(x) for x in input_sets]
+    holders = {}
+    for term, term_set in enumerate(input_sets):
+        for ind in term_set:
+            holders[ind] = holders.get(ind, 0) + 1
+
+    def group_indices(terms):
+        """The indices of a group of terms needed after it is contracted."""
+        inside = {}
+        for term in terms:
+            for ind in input_sets[term]:
+                inside[ind] = inside.get(ind, 0) + 1
+        return set(ind for ind, num in inside.items() if (num < holders[ind]) or (ind in output_set))
+
+    def contract_group(terms):
+        """Returns the trees contracting ``terms`` and the indices of each result."""
+
+        if len(terms) == 1:
+            return [terms[0]], [group_indices(terms)]
+
+        if (deadline is not None) and (time.time() > deadline):
+            raise _SearchTimeout()
+
+        if len(terms) <= leaf_size:
+            local_sets = [input_sets[term] for term in terms]
+            local_dict = {ind: idx_dict[ind] for term_set in local_sets for ind in term_set}
+            path = _dynamic_programming(local_sets, group_indices(terms), local_dict, memory_limit,
+                                        cost_model=cost_model, deadline=deadline)
+            return [_linear_to_tree(path, terms)], [group_indices(terms)]
+
+        left, right = _bisect(terms, input_sets, idx_dict, imbalance, passes)
+        if not left or not right:
+            left, right = terms[:len(terms) // 2], terms[len(terms) // 2:]
+
+        left_trees, left_inds = contract_group(left)
+        right_trees, right_inds = contract_group(right)
+
+        # Results over the memory limit are left to the final contraction
+        result = group_indices(terms)
+        size = helpers.compute_size_by_dict(result, idx_dict)
+        if (len(left_trees) == 1) and (len(right_trees) == 1) and (size <= memory_limit):
+            return [(left_trees[0], right_trees[0])], [result]
+        return left_trees + right_trees, left_inds + right_inds
+
+    trees, _ = contract_group(list(range(num_inputs)))
+    tree = trees[0] if len(trees) == 1 else tuple(trees)
+
+    ssa_path = []
+    _tree_to_ssa(tree, ssa_path, num_inputs)
+    return ssa_to_linear(ssa_path)
+
+
+class GraphPartition(object):
+    """
+    The settings of a ``graph_partition`` search, which can be given to
+    ``contract_path`` and ``contract`` as the path, for example
+    ``path=GraphPartition(leaf_size=10)``. See ``graph_partition`` for the
+    parameters.
+    """
+
+    def __init__(self, leaf_size=8, imbalance=0.1, passes=4):
+        self.leaf_size = leaf_size
+        self.imbalance = imbalance
+        self.passes = passes
+
+    def __repr__(self):
+        return "GraphPartition(leaf_size=%r, imbalance=%r, passes=%r)" % (self.leaf_size, self.imbalance, self.passes)
+
+    def __call__(self, input_sets, output_set, idx_dict, memory_limit, cost_model=None):
+        return graph_partition(input_sets, output_set, idx_dict, memory_limit, leaf_size=self.leaf_size,
+                               imbalance=self.imbalance, passes=self.passes, cost_model=cost_model)
+
+
+# The largest networks ``auto`` searches exactly and the smallest it partitions
+_auto_exact_terms = 20
+_auto_partition_terms = 64
+
+
+def auto(input_sets, output_set, idx_dict, memory_limit, max_time=0.1, seed=None, cost_model=None):
+    """
+    Anytime search which keeps the cheapest path found until ``max_time``
+    seconds have passed. The ``greedy`` path is always found first, the
+    remaining time is spent on the exact ``dynamic_programming`` search for
+    up to 20 terms, on ``graph_partition`` for 64 terms or more and then on
+    ``random_greedy`` trials. The searches are stopped at the deadline, only
+    the greedy path and a last greedy trial can run past it, a partition
+    that is not done by then is dropped.
+
+    Paramaters
+    ----------
+    input_sets : list
+        List of sets that represent the lhs side of the einsum subscript
+    output_set : set
+        Set that represents the rhs side of the overall einsum subscript
+    idx_dict : dictionary
+        Dictionary of index sizes
+    memory_limit : int
+        The maximum number of elements in a temporary array
+    max_time : float, optional (default: 0.1)
+        The time budget of the search in seconds.
+    seed : int, optional
+        The seed of the ``random_greedy`` trials.
+    cost_model : CostModel, optional
+        Minimize the cost of this model rather than the FLOP count, see
+        ``opt_einsum.costs``.
+
+    Returns
+    -------
+    path : list
+        The cheapest contraction order found within the memory limit
+        constraint.
+
+    Examples
+    --------
+    >>> isets = [set('abd'), set('ac'), set('bdc')]
+    >>> oset = set('')
+    >>> idx_sizes = {'a': 1, 'b':2, 'c':3, 'd':4}
+    >>> auto(isets, oset, idx_sizes, 5000, max_time=0.01)
+    [(0, 2), (0, 1)]
+    """
+
+    start = time.time()
+    deadline = start + max_time
+    num_inputs = len(input_sets)
+    if num_inputs == 1:
+        return [(0, )]
+
+    bits = helpers.IndexBits(idx_dict, cost_model)
+    input_bits = [bits.encode(x) for x in input_sets]
+    output_bits = bits.encode(output_set)
+
+    ssa_path = _greedy_ssa(bits, input_bits, output_bits, memory_limit)
+    best = (_ssa_cost(bits, input_bits, output_bits, ssa_path), ssa_path)
+    greedy_time = time.time() - start
+
+    def consider(path):
+        ssa_path = _linear_to_ssa(path, num_inputs)
+        cost = _ssa_cost(bits, input_bits, output_bits, ssa_path)
+        return min(best, (cost, ssa_path), key=lambda x: x[0])
+
+    # The exact path cannot be improved on, leave time for trials if it is not found
+    if num_inputs <= _auto_exact_terms:
+        try:
+            path = _dynamic_programming(input_sets, output_set, idx_dict, memory_limit, cost_model=cost_model,
+                                        deadline=(time.time() + deadline) / 2)
+            return ssa_to_linear(consider(path)[1])
+        except _SearchTimeout:
+            pass
+
+    # Partitioning takes about as long as greedy for large networks
+    if (num_inputs >= _auto_partition_terms) and (deadline - time.time() > greedy_time):
+        try:
+            best = consider(_graph_partition(input_sets, output_set, idx_dict, memory_limit, cost_model=cost_model,
+                                             deadline=deadline))
+        except _SearchTimeout:
+            pass
+
+    if time.time() < deadline:
+        if seed is None:
+            seed = random.randrange(2**31)
+        result = _random_greedy_trials(bits, input_bits, output_bits, memory_limit, itertools.count(seed),
+                                       temperature=1.0, nbranch=8, deadline=deadline)
+        if result[0] < best[0]:
+            best = (result[0], result[2])
+
+    return ssa_to_linear(best[1])
+
+
+class Auto(object):
+    """
+    The settings of an ``auto`` search, which can be given to
+    ``contract_path`` and ``contract`` as the path, for example
+    ``path=Auto(max_time=0.5)``. See ``auto`` for the parameters.
+    """
+
+    def __init__(self, max_time=0.1, seed=None):
+        self.max_time = max_time
+        self.seed = seed
+
+    def __repr__(self):
+        return "Auto(max_time=%r, seed=%r)" % (self.max_time, self.seed)
+
+    def __call__(self, input_sets, output_set, idx_dict, memory_limit, cost_model=None):
+        return auto(input_sets, output_set, idx_dict, memory_limit, max_time=self.max_time, seed=self.seed,
+                    cost_model=cost_model)
@@ -0,0 +1,181 @@
+"""
+Finds indices to loop over explicitly so that a contraction fits in memory
+"""
+
+from . import helpers
+
+
+def path_costs(input_sets, output_set, path, dimension_dict):
+    """
+    Computes the FLOP count and the size of the largest intermediate of a
+    contraction path. The result of the final contraction is not counted as
+    an intermediate.
+
+    Parameters
+    ----------
+    input_sets : list
+        List of sets that represent the lhs side of the einsum subscript
+    output_set : set
+        Set that represents the rhs side of the overall einsum subscript
+    path : list of tuples
+        The contraction path.
+    dimension_dict : dictionary
+        Dictionary of index sizes
+
+    Returns
+    -------
+    cost : int
+        The FLOP count of the path.
+    largest : int
+        The number of elements of the largest intermediate.
+
+    Examples
+    --------
+    >>> isets = [set('ab'), set('bc'), set('cd')]
+    >>> path_costs(isets, set('ad'), [(0, 1), (0, 1)], {'a': 2, 'b': 3, 'c': 4, 'd': 5})
+    (128, 8)
+    """
+
+    cost = 0
+    largest = 0
+    for cnum, contract_inds in enumerate(path):
+        contract_inds = tuple(sorted(list(contract_inds), reverse=True))
+        contract = helpers.find_contraction(contract_inds, input_sets, output_set)
+        out_inds, input_sets, idx_removed, idx_contract = contract
+        cost += helpers.flop_count(idx_contract, idx_removed, len(contract_inds), dimension_dict)
+        if cnum < len(path) - 1:
+            largest = max(largest, helpers.compute_size_by_dict(out_inds, dimension_dict))
+
+    return cost, largest
+
+
+def find_slices(input_sets, output_set, path, dimension_dict, memory_limit):
+    """
+    Greedily picks indices to slice until no intermediate of ``path`` is
+    larger than ``memory_limit``. Each step slices the index that shrinks the
+    largest intermediate the most, ties are broken by the smallest total FLOP
+    count over all slices.
+
+    Parameters
+    ----------
+    input_sets : list
+        List of sets that represent the lhs side of the einsum subscript
+    output_set : set
+        Set that represents the rhs side of the overall einsum subscript
+    path : list of tuples
+        The contraction path.
+    dimension_dict : dictionary
+        Dictionary of index sizes
+    memory_limit : int
+        The maximum number of elements in an intermediate of a single slice.
+
+    Returns
+    -------
+    sliced_inds : str
+        The indices to loop over, in the order they were picked.
+
+    Examples
+    --------
+    >>> isets = [set('ab'), set('bc'), set('cd')]
+    >>> find_slices(isets, set('ad'), [(0, 1), (0, 1)], {'a': 2, 'b': 3, 'c': 4, 'd': 5}, 4)
+    'c'
+    """
+
+    sliced_dims = dict(dimension_dict)
+    sliced_inds = ""
+    num_slices = 1
+    cost, largest = path_costs(input_sets, output_set, path, sliced_dims)
+
+    while largest > memory_limit:
+        best = None
+        for ind in sorted(sliced_dims):
+            if sliced_dims[ind] == 1:
+                continue
+
+            trial_dims = dict(sliced_dims)
+            trial_dims[ind] = 1
+            trial_cost, trial_largest = path_costs(input_sets, output_set, path, trial_dims)
+            trial = (trial_largest, trial_cost * num_slices * dimension_dict[ind], ind)
+            if (best is None) or (trial < best):
+                best = trial
+
+        # Every index is sliced already
+        if (best is None) or (best[0] >= largest):
+            break
+
+        largest, total_cost, ind = best
+        sliced_dims[ind] = 1
+        sliced_inds += ind
+        num_slices *= dimension_dict[ind]
+
+    return sliced_inds
+
+
+def slice_sizes(input_sets, output_set, path, dimension_dict, sliced_inds, memory_limit):
+    """
+    Grows the slices of ``sliced_inds`` from a single value to chunks of
+    values, so that the contraction is split into as few slices as possible.
+    In the order the indices were picked, each chunk is made as large as it
+    can be while no intermediate of ``path`` is larger than ``memory_limit``.
+
+    Parameters
+    ----------
+    input_sets : list
+        List of sets that represent the lhs side of the einsum subscript
+    output_set : set
+        Set that represents the rhs side of the overall einsum subscript
+    path : list of tuples
+        The contraction path.
+    dimension_dict : dictionary
+        Dictionary of index sizes
+    sliced_inds : str
+        The indices to loop over, see ``find_slices``.
+    memory_limit : int
+        The maximum number of elements in an intermediate of a single slice.
+
+    Returns
+    -------
+    sizes : dictionary
+        The number of values of each sliced index in a slice, indices which
+        no longer need slicing keep their full dimension.
+
+    Examples
+    --------
+    >>> isets = [set('ab'), set('bc'), set('cd')]
+    >>> slice_sizes(isets, set('ad'), [(0, 1), (0, 1)], {'a': 2, 'b': 3, 'c': 4, 'd': 5}, 'c', 4)
+    {'c': 2}
+    """
+
+    sliced_dims = dict(dimension_dict)
+    sliced_dims.update((ind, 1) for ind in sliced_inds)
+
+    for ind in sliced_inds:
+        # Largest chunk that still fits, a single value if none does
+        low, high = 1, dimension_dict[ind]
+        while low < high:
+            mid = (low + high + 1) // 2
+            sliced_dims[ind] = mid
+            if path_costs(input_sets, output_set, path, sliced_dims)[1] <= memory_limit:
+                low = mid
+            else:
+                high = mid - 1
+        sliced_dims[ind] = low
+
+    return {ind: sliced_dims[ind] for ind in sliced_inds}
+
+
+def count_slices(sizes, dimension_dict):
+    """
+    The number of slices of a contraction whose sliced indices are split
+    into chunks of ``sizes`` values, see ``slice_sizes``.
+
+    Examples
+    --------
+    >>> count_slices({'a': 2, 'c': 3}, {'a': 2, 'b': 3, 'c': 4, 'd': 5})
+    2
+    """
+
+    num = 1
+    for ind, size in sizes.items():
+        num *= -(-dimension_dict[ind] // size)
+    return num
@@ -0,0 +1,127 @@
+"""
+Tests contracting the arrays of other libraries with their own functions.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+import numpy as np
+import pytest
+
+import opt_einsum as oe
+
+tests = [
+    'a,ab,abc->abc',
+    'ea,fb,abcd,gc,hd->efgh',
+    'acdf,jbje,gihb,hfac,gfac,gifabc,hfac',
+    'chd,bde,agbc,hiad,hgc,hgi,hiad',
+    'bd,db,eac->ace',
+    'ab,bc,cd,de,ef->af',
+    'abcd,cdef,efgh,ghij->abij',
+    'ab,ab,c->',
+    'ab,ab,cd,cd->',
+]
+
+
+@pytest.fixture
+def numpy_backend(monkeypatch):
+    """A backend that routes through the dispatch layer to NumPy."""
+    monkeypatch.setitem(oe.backends._backend_modules, 'dispatch', 'numpy')
+    return 'dispatch'
+
+
+@pytest.mark.parametrize("string", tests)
+def test_dispatch(string, numpy_backend):
+    views = oe.helpers.build_views(string)
+    ein = np.einsum(string, *views)
+
+    assert np.allclose(ein, oe.contract(string, *views, backend=numpy_backend))
+    assert np.allclose(ein, oe.contract(string, *views, backend=numpy_backend, use_blas=False))
+
+
+def test_dispatch_checks(numpy_backend):
+    a, b = np.random.rand(3, 4), np.random.rand(4, 5)
+
+    with pytest.raises(ValueError):
+        oe.contract('ab,bc->ac', a, b, backend='unknown')
+
+    with pytest.raises(ValueError):
+        oe.contract('ab,bc->ac', a, b, backend=numpy_backend, out=np.empty((3, 5)))
+
+
+def test_infer_backend():
+    assert oe.backends.infer_backend(np.ones(3)) == 'numpy'
+    assert oe.backends.infer_backend(np.ones(3).view(np.matrix)) == 'numpy'
+    assert oe.backends.infer_backend([1, 2]) == 'numpy'
+
+
+@pytest.mark.parametrize("backend,convert,to_numpy", [
+    ('dask', lambda x: pytest.importorskip('dask.array').from_array(x, chunks=2), lambda x: x.compute()),
+    ('torch', lambda x: pytest.importorskip('torch').from_numpy(x), lambda x: x.numpy()),
+    ('sparse', lambda x: pytest.importorskip('sparse').COO.from_numpy(x), lambda x: x.todense()),
+])
+@pytest.mark.parametrize("string", tests)
+def test_backend(backend, convert, to_numpy, string):
+    views = oe.helpers.build_views(string)
+    ein = np.einsum(string, *views)
+
+    arrays = [convert(x) for x in views]
+    assert oe.backends.infer_backend(arrays[0]) == backend
+
+    result = oe.contract(string, *arrays)
+    assert oe.backends.infer_backend(result) == backend
+    assert np.allclose(ein, to_numpy(result))
+
+    expr = oe.contract_expression(string, *[x.shape for x in views])
+    result = expr(*arrays)
+    assert oe.backends.infer_backend(result) == backend
+    assert np.allclose(ein, to_numpy(result))
+
+
+@pytest.mark.parametrize("backend,to_numpy", [
+    ('dask', lambda x: x.compute()),
+    ('torch', lambda x: x.numpy()),
+    ('sparse', lambda x: x.todense()),
+])
+def test_backend_conversion(backend, to_numpy):
+    pytest.importorskip(backend)
+    a, b = np.random.rand(3, 4), np.random.rand(4, 5)
+
+    # NumPy operands are converted to the given backend
+    result = oe.contract('ab,bc->ac', a, b.tolist(), backend=backend)
+    assert oe.backends.infer_backend(result) == backend
+    assert np.allclose(np.dot(a, b), to_numpy(result))
+
+
+def test_backend_interleaved():
+    torch = pytest.importorskip('torch')
+    a, b = np.random.rand(3, 4), np.random.rand(4, 5)
+
+    result = oe.contract(torch.from_numpy(a), [0, 1], torch.from_numpy(b), [1, 2], [0, 2])
+    assert oe.backends.infer_backend(result) == 'torch'
+    assert np.allclose(np.dot(a, b), result.numpy())
+
+
+def test_backend_out():
+    torch = pytest.importorskip('torch')
+    a, b = np.random.rand(3, 4), np.random.rand(4, 5)
+    out = torch.empty(3, 5, dtype=torch.float64)
+
+    with pytest.raises(ValueError) as err:
+        oe.contract('ab,bc->ac', a, b, out=out)
+    assert "must be a NumPy array" in str(err)
+
+    expr = oe.contract_expression('ab,bc->ac', a.shape, b.shape)
+    with pytest.raises(ValueError) as err:
+        expr(a, b, out=out)
+    assert "must be a NumPy array" in str(err)
+
+
+def test_backend_cached_plan():
+    torch = pytest.importorskip('torch')
+    a, b = np.random.rand(3, 4), np.random.rand(4, 5)
+
+    # The plan cached for NumPy operands of the same shapes is not reused
+    oe.contract('ab,bc->ac', a, b)
+    result = oe.contract('ab,bc->ac', torch.from_numpy(a), torch.from_numpy(b))
+    assert oe.backends.infer_backend(result) == 'torch'
+    assert np.allclose(np.dot(a, b), result.numpy())
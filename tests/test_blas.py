@@ -7,7 +7,7 @@ from __future__ import division, absolute_import, print_function
 import numpy as np
 import pytest
 
-from opt_einsum import blas, helpers, contract
+from opt_einsum import blas, helpers, contract, contract_path, contract_expression
 
 blas_tests = [
     # DOT
@@ -62,6 +62,7 @@ blas_tests = [
    ((['i', 'j'], 'ij', set()),              False), # Outer
    ((['ijk', 'j'], 'ij', set()),            False), # Index sum 1
    ((['ijk', 'k'], 'ij', set()),            False), # Index sum 2
+   ((['ijk', 'kl'], 'il', set('jk')),       False), # Index sum and contraction
 ]
 
 @pytest.mark.parametrize("inp,benchmark", blas_tests)
@@ -91,6 +92,31 @@ def test_tensor_blas(inp, benchmark):
 
     assert np.allclose(einsum_result, blas_result)
 
+    # Writing into a given array
+    out = np.empty_like(einsum_result)
+    blas_result = blas.tensor_blas(view_left, tensor_strs[0], view_right, tensor_strs[1], output, reduced_idx, out=out)
+    assert blas_result is out
+    assert np.allclose(einsum_result, out)
+
+
+@pytest.mark.parametrize("inp,benchmark", blas_tests)
+def test_batch_blas(inp, benchmark):
+
+    # Weed out non-blas cases
+    if benchmark is False:
+        return
+
+    tensor_strs, output, reduced_idx = inp
+    tensor_strs = ['z' + x for x in tensor_strs]
+    output = 'z' + output
+    einsum_str = ','.join(tensor_strs) + '->' + output
+    view_left, view_right = helpers.build_views(einsum_str, dict(helpers.default_dim_dict, z=3))
+
+    einsum_result = np.einsum(einsum_str, view_left, view_right)
+    blas_result = blas.batch_blas(view_left, tensor_strs[0], view_right, tensor_strs[1], output, reduced_idx)
+
+    assert np.allclose(einsum_result, blas_result)
+
 
 def test_blas_out():
     a = np.random.rand(4, 4)
@@ -105,5 +131,47 @@ def test_blas_out():
     assert np.allclose(d, np.dot(a, b).dot(c))
 
 
+def test_blas_copies():
+    assert blas.blas_copies(['ij', 'jk'], 'ik', set('j'), 'GEMM') == 0
+    assert blas.blas_copies(['ij', 'jk'], 'ki', set('j'), 'GEMM') == 1
+    assert blas.blas_copies(['ilj', 'jlk'], 'ik', set('jl'), 'TDOT') == 1
+    assert blas.blas_copies(['ilj', 'jlk'], 'ki', set('jl'), 'TDOT') == 2
+    assert blas.blas_copies(['ijk', 'ikj'], '', set('ijk'), False) == 0
+
+
+def test_plan_layout():
+    terms = ['ab', 'bcd', 'cde']
+    dimension_dict = {'a': 3, 'b': 5, 'c': 2, 'd': 4, 'e': 6}
+    steps = [([1, 0], set('acd'), set('b')), ([3, 2], set('ae'), set('cd'))]
+
+    # The sorted order 'cad' needs a transpose and a tensordot, 'cda' neither
+    default = ['cad', 'ae']
+    planned = blas.plan_layout(terms, steps, 'ae', dimension_dict)
+    assert planned == ['cda', 'ae']
+    assert blas.layout_copies(terms, steps, default) == 2
+    assert blas.layout_copies(terms, steps, planned) == 0
+
+
+def test_contract_layout():
+    string = 'ab,bcd,cde->ae'
+    views = helpers.build_views(string, {'a': 3, 'b': 5, 'c': 2, 'd': 4, 'e': 6})
+
+    path, path_info = contract_path(string, *views, path=[(0, 1), (0, 1)])
+    assert path_info.contraction_list[0][2] == 'bcd,ab->cda'
+    assert (path_info.copies, path_info.copies_avoided) == (0, 2)
+    assert np.allclose(np.einsum(string, *views), contract(string, *views, optimize=path))
+
+    path, path_info = contract_path(string, *views, path=[(0, 1), (0, 1)], use_blas=False)
+    assert path_info.contraction_list[0][2] == 'bcd,ab->cad'
+    assert (path_info.copies, path_info.copies_avoided) == (0, 0)
+
 
+def test_contract_layout_repeated_index():
+    # The partner 'ff' of the first intermediate repeats an index
+    string = 'ed,fcd,ff,bcf->be'
+    views = helpers.build_views(string)
+    ein = np.einsum(string, *views)
 
+    assert np.allclose(ein, contract(string, *views))
+    expr = contract_expression(string, bucket=True)
+    assert np.allclose(ein, expr(*views))
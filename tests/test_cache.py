@@ -0,0 +1,111 @@
+"""
+Tests the caching of contraction paths.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+import numpy as np
+import pytest
+
+import opt_einsum as oe
+
+
+def test_path_key():
+
+    key = oe.cache.path_key('ij,jk', 'ik', {'i': 2, 'j': 3, 'k': 4}, 24, True, 'greedy')
+    assert key == ('ab,bc->ac', (2, 3, 4), 24, True, 'greedy')
+
+    # Relabeled indices share a key, different sizes do not
+    assert key == oe.cache.path_key('xa,ab', 'xb', {'x': 2, 'a': 3, 'b': 4}, 24, True, 'greedy')
+    assert key != oe.cache.path_key('ij,jk', 'ik', {'i': 2, 'j': 5, 'k': 4}, 24, True, 'greedy')
+    assert key != oe.cache.path_key('ij,jk', 'ik', {'i': 2, 'j': 3, 'k': 4}, 24, True, 'optimal')
+
+
+def test_lru_eviction():
+
+    cache = oe.cache.PathCache(maxsize=2)
+    cache.put('a', [(0, 1)])
+    cache.put('b', [(0, 1)])
+    assert cache.get('a') == [(0, 1)]
+
+    # 'b' is now the least recently used
+    cache.put('c', [(0, 1)])
+    assert len(cache) == 2
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Storing an existing key also marks it as most recently used
+    cache.put('a', [(1, 0)])
+    cache.put('d', [(0, 1)])
+    assert 'a' in cache
+    assert 'c' not in cache
+    assert cache.get('a') == [(1, 0)]
+
+
+def test_contract_path_cache():
+
+    expression = 'abc,bdef,fghj,cem,mhk,ljk->adgl'
+    views = oe.helpers.build_views(expression)
+    cache = oe.cache.PathCache()
+
+    path, path_str = oe.contract_path(expression, *views, path='optimal', cache=cache)
+    assert (len(cache), cache.hits, cache.misses) == (1, 0, 1)
+
+    cached_path, cached_str = oe.contract_path(expression, *views, path='optimal', cache=cache)
+    assert (len(cache), cache.hits, cache.misses) == (1, 1, 1)
+    assert cached_path == path
+    assert str(cached_str) == str(path_str)
+
+    # Relabeled expressions hit the same entry
+    relabeled = expression.translate({ord(x): ord(x.upper()) for x in expression if x.isalpha()})
+    cached_path, cached_str = oe.contract_path(relabeled, *views, path='optimal', cache=cache)
+    assert cached_path == path
+    assert cache.hits == 2
+
+    # As does contract
+    result = oe.contract(expression, *views, optimize='optimal', cache=cache)
+    assert np.allclose(result, oe.contract(expression, *views, optimize=False))
+    assert cache.hits == 3
+
+    # A different path type is a different entry
+    oe.contract_path(expression, *views, path='greedy', cache=cache)
+    assert len(cache) == 2
+
+
+def test_pickle_cache(tmpdir):
+
+    filename = str(tmpdir.join('paths.pkl'))
+    expression = 'ab,bc,cd->ad'
+    views = oe.helpers.build_views(expression)
+
+    cache = oe.cache.PathCache(filename=filename)
+    path, path_str = oe.contract_path(expression, *views, cache=cache)
+    cache.save()
+
+    loaded = oe.cache.PathCache(filename=filename)
+    assert len(loaded) == 1
+    assert oe.contract_path(expression, *views, cache=loaded)[0] == path
+    assert loaded.hits == 1
+
+    with pytest.raises(ValueError):
+        oe.cache.PathCache().save()
+
+
+def test_sqlite_cache(tmpdir):
+
+    filename = str(tmpdir.join('paths.sqlite'))
+    expression = 'ab,bc,cd->ad'
+    views = oe.helpers.build_views(expression)
+
+    cache = oe.cache.SQLitePathCache(filename)
+    path, path_str = oe.contract_path(expression, *views, cache=cache)
+    cache.close()
+
+    # A new process would only find the path in the database
+    loaded = oe.cache.SQLitePathCache(filename)
+    assert len(loaded) == 0
+    assert oe.contract_path(expression, *views, cache=loaded)[0] == path
+    assert (len(loaded), loaded.hits) == (1, 1)
+    loaded.close()
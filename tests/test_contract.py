@@ -4,6 +4,8 @@ Tets a series of opt_einsum contraction paths to ensure the results are the same
 
 from __future__ import division, absolute_import, print_function
 
+import sys
+
 import numpy as np
 from opt_einsum import contract, contract_path, helpers, contract_expression
 import pytest
@@ -108,6 +110,9 @@ def test_compare(string):
     opt = contract(string, *views, optimize='optimal', use_blas=False)
     assert np.allclose(ein, opt)
 
+    opt = contract(string, *views, optimize='dp', use_blas=False)
+    assert np.allclose(ein, opt)
+
 
 @pytest.mark.parametrize("string", tests)
 def test_compare_blas(string):
@@ -120,17 +125,36 @@ def test_compare_blas(string):
     opt = contract(string, *views, optimize='optimal')
     assert np.allclose(ein, opt)
 
+    opt = contract(string, *views, optimize='dp')
+    assert np.allclose(ein, opt)
+
 
 def test_printing():
     string = "bbd,bda,fc,db->acf"
     views = helpers.build_views(string)
 
     ein = contract_path(string, *views)
-    assert len(ein[1]) == 729
+    assert len(str(ein[1])) == 768
+
+
+def test_path_info():
+    string = "ij,jk,kl->il"
+    views = [np.random.rand(2, 2), np.random.rand(2, 5), np.random.rand(5, 2)]
+
+    path, path_info = contract_path(string, *views)
+    assert path_info.path == path == [(1, 2), (0, 1)]
+    assert len(path_info.contraction_list) == 2
+    assert path_info.naive_cost == 120
+    assert path_info.opt_cost == 56
+    assert path_info.naive_scaling == 4
+    assert path_info.optimized_scaling == 3
+    assert path_info.largest_intermediate == 4
+    assert "Theoretical speedup:  2.143" in str(path_info)
+    assert repr(path_info) == str(path_info)
 
 
 @pytest.mark.parametrize("string", tests)
-@pytest.mark.parametrize("optimize", ['greedy', 'optimal'])
+@pytest.mark.parametrize("optimize", ['greedy', 'optimal', 'dp'])
 @pytest.mark.parametrize("use_blas", [False, True])
 @pytest.mark.parametrize("out_spec", [False, True])
 def test_contract_expressions(string, optimize, use_blas, out_spec):
@@ -197,3 +221,233 @@ def test_contract_expression_checks():
     with pytest.raises(ValueError) as err:
         expr(np.random.rand(2, 3), np.random.rand(3, 4), order='F')
     assert "only valid keyword argument to a `ContractExpression`" in str(err)
+
+
+def test_small_contraction_plans():
+
+    a = np.random.rand(3, 4)
+    b = np.random.rand(4, 5)
+    c = np.random.rand(5, 2)
+    ein = np.einsum('ij,jk,kl->il', a, b, c)
+
+    # Repeated calls reuse the plan of the first
+    for _ in range(3):
+        assert np.allclose(ein, contract('ij,jk,kl->il', a, b, c))
+        assert np.allclose(ein, contract('ij,jk,kl->il', a.tolist(), b, c))
+
+    # A single small contraction is dispatched to einsum
+    out = np.empty((3, 5))
+    for _ in range(2):
+        contract('ij,jk->ik', a, b, out=out)
+        assert np.allclose(out, np.dot(a, b))
+
+    # Different shapes build a new plan
+    assert np.allclose(contract('ij,jk->ik', b, c), np.dot(b, c))
+
+
+@pytest.mark.parametrize("string", ['abc,cd->abd', 'abc,dbc->ad', 'cab,cd->abd', 'abc,abc->', 'abcd,ecbf->adef'])
+def test_blas_kernels_noncontiguous(string):
+    views = helpers.build_views(string, dict.fromkeys(string, 12))
+
+    # Transposed views cannot be reshaped without a copy
+    views = [np.asfortranarray(x) for x in views]
+    ein = np.einsum(string, *views)
+    assert np.allclose(ein, contract(string, *views, optimize='greedy', use_blas=True))
+
+    out = np.empty_like(ein)
+    contract(string, *views, optimize='greedy', use_blas=True, out=out)
+    assert np.allclose(ein, out)
+
+
+@pytest.mark.parametrize("string", tests)
+@pytest.mark.parametrize("n_workers", [2, 4])
+@pytest.mark.parametrize("memory_cap", [None, 1])
+def test_contract_dag(string, n_workers, memory_cap):
+    views = helpers.build_views(string)
+    ein = contract(string, *views, optimize=False)
+
+    opt = contract(string, *views, optimize='greedy', n_workers=n_workers, memory_cap=memory_cap)
+    assert np.allclose(ein, opt)
+
+    out = np.empty_like(ein)
+    contract(string, *views, optimize='greedy', n_workers=n_workers, memory_cap=memory_cap, out=out)
+    assert np.allclose(ein, out)
+
+
+def test_contract_dag_independent_steps():
+    from concurrent.futures import ThreadPoolExecutor
+
+    string = 'ab,bc,cd,de->ae'
+    views = helpers.build_views(string)
+    ein = np.einsum(string, *views)
+
+    # (0, 1) and (2, 3) do not depend on each other
+    path = [(0, 1), (0, 1), (0, 1)]
+    with ThreadPoolExecutor(2) as executor:
+        assert np.allclose(ein, contract(string, *views, optimize=path, executor=executor))
+        assert np.allclose(ein, contract(string, *views, optimize=path, executor=executor, memory_cap=1))
+
+
+@pytest.mark.parametrize("string", tests)
+@pytest.mark.parametrize("optimize", ['greedy', 'optimal'])
+def test_contract_expression_batch(string, optimize):
+    views = helpers.build_views(string)
+    shapes = [view.shape for view in views]
+    expr = contract_expression(string, *shapes, optimize=optimize)
+
+    stacks = [np.random.rand(*((3, ) + shape)) for shape in shapes]
+    batch_result = expr.batch(*stacks)
+    for num in range(3):
+        assert np.allclose(batch_result[num], expr(*[stack[num] for stack in stacks]))
+
+    out = np.empty_like(batch_result)
+    expr.batch(*stacks, out=out)
+    assert np.allclose(batch_result, out)
+
+    with pytest.raises(ValueError):
+        expr.batch(*stacks[1:])
+
+
+def test_contract_expression_compiled_shapes():
+    expr = contract_expression('abc,cd,dbe->ea', (2, 3, 4), (4, 5), (5, 3, 6))
+    assert [step.kind for step in expr._steps] == ['GEMM', 'GEMM']
+
+    # Sizes other than the planned ones still contract correctly, back and forth
+    for shapes in [[(2, 3, 4), (4, 5), (5, 3, 6)], [(3, 2, 5), (5, 4), (4, 2, 7)], [(2, 3, 4), (4, 5), (5, 3, 6)]]:
+        views = [np.random.rand(*shape) for shape in shapes]
+        assert np.allclose(expr(*views), np.einsum('abc,cd,dbe->ea', *views))
+
+
+@pytest.mark.parametrize("string,constants", [
+    ('ab,bc,cd,de->ae', [1, 2, 3]),
+    ('ab,bc,cd,de->ae', [0, 2]),
+    ('ab,bc,cd,de->ae', [0, 1, 2, 3]),
+    ('abc,bcd,dea,efg->fg', [1, 3]),
+    ('ij,jk,kl,li->', [1, 2]),
+    # Disjoint groups of constants
+    ('ab,bc,cd,de,ef->af', [0, 1, 3, 4]),
+    ('ab,ab,cd,cd->', [0, 1, 2, 3]),
+])
+def test_contract_expression_constants(string, constants):
+    views = helpers.build_views(string)
+    args = [view if num in constants else view.shape for num, view in enumerate(views)]
+    expr = contract_expression(string, *args, constants=constants)
+
+    variables = [view for num, view in enumerate(views) if num not in constants]
+    expected = np.einsum(string, *views)
+    assert np.allclose(expr(*variables), expected)
+
+    # Calling again reuses the folded steps
+    assert np.allclose(expr(*variables), expected)
+
+    out = np.empty_like(expected)
+    expr(*variables, out=out)
+    assert np.allclose(out, expected)
+
+    with pytest.raises(ValueError) as err:
+        expr(*views)
+    assert "`ContractExpression` takes exactly %s" % len(variables) in str(err)
+
+
+def test_contract_expression_constants_path():
+    w1, w2, w3 = np.random.rand(4, 50), np.random.rand(50, 60), np.random.rand(60, 5)
+    expr = contract_expression('ab,bc,cd,de->ae', (100, 4), w1, w2, w3, constants=[1, 2, 3])
+
+    # The weights are folded into a single matrix, each call is one step
+    assert sorted(expr._folded) == [0, 1]
+    assert "[constant]" in str(expr)
+
+    x = np.random.rand(100, 4)
+    assert np.allclose(expr(x), x.dot(w1).dot(w2).dot(w3))
+
+    with pytest.raises(ValueError):
+        expr.batch(np.random.rand(3, 100, 4))
+
+
+@pytest.mark.parametrize("bucket", [None, True, lambda dim: 10 * ((dim + 9) // 10)])
+def test_contract_expression_polymorphic(bucket):
+    string = 'abc,cd,dbe->ea'
+    expr = contract_expression(string, bucket=bucket, maxsize=2)
+
+    for shapes in [[(2, 3, 4), (4, 5), (5, 3, 6)], [(3, 2, 5), (5, 4), (4, 2, 7)], [(2, 3, 4), (4, 5), (5, 3, 6)]]:
+        views = [np.random.rand(*shape) for shape in shapes]
+        assert np.allclose(expr(*views), np.einsum(string, *views))
+
+        out = np.empty((shapes[2][2], shapes[0][0]))
+        expr(*views, out=out)
+        assert np.allclose(out, np.einsum(string, *views))
+
+    # Only the buckets of tens put both sets of sizes together
+    if callable(bucket):
+        assert (expr.hits, expr.misses) == (5, 1)
+    else:
+        assert (expr.hits, expr.misses) == (4, 2)
+
+    # The least recently used plan is evicted
+    expr(*[np.random.rand(*shape) for shape in [(9, 9, 9), (9, 9), (9, 9, 9)]])
+    expr(*[np.random.rand(*shape) for shape in [(99, 9, 9), (9, 9), (9, 9, 9)]])
+    assert len(expr) == 2
+
+    expr.clear()
+    assert len(expr) == 0
+
+    with pytest.raises(ValueError):
+        contract_expression(string, constants=[1])
+
+
+@pytest.mark.parametrize("string", ['ijk,ijl,lm->ikm', 'ea,fb,abcd,gc,hd->efgh', 'ab,ab,c->c'])
+def test_contract_expression_autotune(string, tmpdir):
+    from opt_einsum import cache
+
+    views = helpers.build_views(string)
+    shapes = [view.shape for view in views]
+    expected = np.einsum(string, *views)
+
+    filename = str(tmpdir.join('tuned.pkl'))
+    tuned = cache.PathCache(filename=filename)
+    expr = contract_expression(string, *shapes, autotune=tuned)
+    assert np.allclose(expr(*views), expected)
+    assert (len(tuned), tuned.misses) == (1, 1)
+
+    # The fastest path is reused, also from another process
+    path, use_blas = list(tuned._paths.values())[0]
+    expr = contract_expression(string, *shapes, autotune=tuned)
+    assert tuned.hits == 1
+    assert [c[0] for c in expr.contraction_list] == list(path)
+
+    tuned.save()
+    loaded = cache.PathCache(filename=filename)
+    expr = contract_expression(string, *shapes, autotune=loaded)
+    assert (loaded.hits, loaded.misses) == (1, 0)
+    assert np.allclose(expr(*views), expected)
+
+    # Each shape signature is tuned once
+    expr = contract_expression(string, autotune=tuned)
+    assert np.allclose(expr(*views), expected)
+    assert len(tuned) == 1
+
+
+def test_contract_expression_autotune_candidates():
+    candidates = sys.modules['opt_einsum.contract']._autotune_candidates
+
+    assert candidates(3, True, None) == [('greedy', True), ('greedy', False), ('dp', True), ('dp', False),
+                                         ('optimal', True), ('optimal', False)]
+    assert candidates(30, True, False) == [('greedy', False), ('random-greedy', False)]
+    assert candidates(3, 'dp', True) == [('dp', True)]
+
+
+def test_small_contraction_plans_threaded(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    # A tiny plan cache so that threads keep evicting each other's plans
+    monkeypatch.setattr(sys.modules['opt_einsum.contract'], '_plan_cache', {})
+    monkeypatch.setattr(sys.modules['opt_einsum.contract'], '_plan_cache_size', 2)
+
+    views = [(np.random.rand(2, n), np.random.rand(n, 3)) for n in range(1, 9)]
+
+    def run(i):
+        a, b = views[i % len(views)]
+        return np.allclose(contract('ij,jk->ik', a, b), np.dot(a, b))
+
+    with ThreadPoolExecutor(4) as executor:
+        assert all(executor.map(run, range(400)))
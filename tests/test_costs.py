@@ -0,0 +1,79 @@
+"""
+Tests the cost models that path finders can minimize instead of FLOPs.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+import numpy as np
+import pytest
+
+import opt_einsum as oe
+
+# A fast BLAS kernel, the batched einsum of the fewest FLOPs path is slower
+model = oe.costs.CostModel({'einsum': 1.0, 'blas': 0.1})
+string = 'ijk,ijl,lm->ikm'
+sizes = {'i': 10, 'j': 100, 'k': 40, 'l': 200, 'm': 100}
+
+
+def test_kernel():
+    bits = oe.helpers.IndexBits(sizes)
+    ij, jk, ik, ijk = [bits.encode(x) for x in ['ij', 'jk', 'ik', 'ijk']]
+
+    assert model.kernel([ij, jk], ik, bits.encode('j')) == 'blas'
+    assert model.kernel([ijk, ij], ik, bits.encode('j')) == 'einsum'
+    assert model.kernel([ij, jk], bits.encode('ijk'), 0) == 'einsum'
+    assert model.kernel([ij, jk, ik], 0, ijk) == 'einsum'
+
+
+def test_contraction_cost():
+    bits = oe.helpers.IndexBits(sizes)
+    inputs = [bits.encode('ij'), bits.encode('jk')]
+    args = (inputs, bits.encode('ik'), bits.encode('ijk'), bits.encode('j'))
+    assert bits.contraction_cost(*args) == bits.flop_count(args[2], args[3], 2)
+
+    model_bits = oe.helpers.IndexBits(sizes, oe.costs.CostModel({'blas': 0.5}, byte_time=0.25, itemsize=4))
+    flops = bits.flop_count(args[2], args[3], 2)
+    elements = 10 * 100 + 100 * 40 + 10 * 40
+    assert model_bits.contraction_cost(*args) == flops * 0.5 + elements * 4 * 0.25
+
+
+@pytest.mark.parametrize("path", ['greedy', 'optimal', 'dp'])
+def test_cost_model_path(path):
+    views = oe.helpers.build_views(string, sizes)
+
+    flops_path, flops_info = oe.contract_path(string, *views, path=path, memory_limit=-1)
+    model_path, model_info = oe.contract_path(string, *views, path=path, memory_limit=-1, cost_model=model)
+
+    # More FLOPs, but all of the large ones on BLAS
+    assert model_path == [(1, 2), (0, 1)]
+    assert model_info.opt_cost >= flops_info.opt_cost
+    assert np.allclose(np.einsum(string, *views), oe.contract(string, *views, cost_model=model))
+
+
+def test_cost_model_cache():
+    views = oe.helpers.build_views(string, sizes)
+    cache = oe.cache.PathCache()
+
+    flops_path = oe.contract_path(string, *views, path='dp', memory_limit=-1, cache=cache)[0]
+    model_path = oe.contract_path(string, *views, path='dp', memory_limit=-1, cache=cache, cost_model=model)[0]
+    assert flops_path != model_path
+    assert len(cache) == 2
+
+
+def test_save_load(tmpdir):
+    filename = str(tmpdir.join('costs.json'))
+    model.save(filename)
+
+    loaded = oe.costs.CostModel.load(filename)
+    assert loaded.flop_time == model.flop_time
+    assert (loaded.byte_time, loaded.itemsize) == (model.byte_time, model.itemsize)
+
+
+def test_calibrate(tmpdir):
+    filename = str(tmpdir.join('costs.json'))
+    calibrated = oe.costs.calibrate(size=32, repeats=1, filename=filename)
+
+    assert calibrated.flop_time['einsum'] == 1.0
+    assert calibrated.flop_time['blas'] > 0
+    assert calibrated.byte_time > 0
+    assert oe.costs.CostModel.load(filename).flop_time == calibrated.flop_time
@@ -0,0 +1,84 @@
+"""
+Tests the reuse of intermediate memory.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+import numpy as np
+import pytest
+
+import opt_einsum as oe
+
+tests = [
+    'a,ab,abc->abc',
+    'ea,fb,abcd,gc,hd->efgh',
+    'ea,fb,gc,hd,abcd->efgh',
+    'acdf,jbje,gihb,hfac,gfac,gifabc,hfac',
+    'chd,bde,agbc,hiad,hgc,hgi,hiad',
+    'baa,dcf,af,cde->be',
+    'bd,db,eac->ace',
+    'ab,bc,cd,de,ef->af',
+    'abcd,cdef,efgh,ghij->abij',
+]
+
+
+def test_plan_buffers():
+    operands = [np.random.rand(10, 20), np.random.rand(20, 30), np.random.rand(30, 40), np.random.rand(40, 5)]
+    operands, contraction_list = oe.contract_path('ij,jk,kl,lm->im', *operands, einsum_call=True)
+
+    # Each intermediate is consumed by the next step, two buffers alternate
+    assignment, capacities = oe.memory.plan_buffers(contraction_list, [80, 40, 8])
+    assert assignment == [0, 1, None]
+    assert capacities == [80, 40]
+
+    # A freed buffer is grown rather than adding a new one
+    operands = [np.random.rand(2, 2) for _ in range(5)]
+    path = [(0, 1), (0, 3), (0, 2), (0, 1)]
+    operands, contraction_list = oe.contract_path('ab,bc,cd,de,ef->af', *operands, path=path, einsum_call=True)
+    assignment, capacities = oe.memory.plan_buffers(contraction_list, [8, 16, 32, 8])
+    assert assignment == [0, 1, 0, None]
+    assert capacities == [32, 16]
+
+
+@pytest.mark.parametrize("string", tests)
+@pytest.mark.parametrize("use_blas", [False, True])
+def test_buffer_pool(string, use_blas):
+    views = oe.helpers.build_views(string)
+    ein = np.einsum(string, *views)
+
+    pool = oe.memory.BufferPool()
+    assert np.allclose(ein, oe.contract(string, *views, use_blas=use_blas, buffer_pool=pool))
+
+    # Buffers are reused by the next call
+    nbytes = pool.nbytes
+    assert np.allclose(ein, oe.contract(string, *views, use_blas=use_blas, buffer_pool=pool))
+    assert pool.nbytes == nbytes
+    assert pool.peak_bytes >= ein.nbytes
+
+    pool.clear()
+    assert pool.nbytes == 0
+
+
+def test_buffer_pool_view_result():
+    a, b = np.random.rand(3, 4), np.random.rand(4, 5)
+    pool = oe.memory.BufferPool()
+
+    # The final step only transposes the pooled intermediate
+    first = oe.contract('ij,jk->ki', a, b, optimize=[(0, 1), (0, )], buffer_pool=pool)
+    expected = first.copy()
+    second = oe.contract('ij,jk->ki', 2 * a, b, optimize=[(0, 1), (0, )], buffer_pool=pool)
+    assert np.allclose(first, expected)
+    assert np.allclose(second, 2 * expected)
+
+
+def test_buffer_pool_types():
+    a = np.random.rand(4, 5).astype(np.float32)
+    b = np.random.rand(5, 6) + 1j * np.random.rand(5, 6)
+    c = np.random.rand(6, 7)
+    ein = np.einsum('ij,jk,kl->il', a, b, c)
+
+    assert np.allclose(ein, oe.contract('ij,jk,kl->il', a, b, c, buffer_pool=True))
+
+    out = np.empty((4, 7), dtype=np.complex128)
+    oe.contract('ij,jk,kl->il', a, b, c, buffer_pool=True, out=out)
+    assert np.allclose(ein, out)
@@ -5,6 +5,9 @@ the various path helper functions.
 
 from __future__ import division, absolute_import, print_function
 
+import itertools
+import time
+
 import numpy as np
 import opt_einsum as oe
 import pytest
@@ -50,6 +53,16 @@ def check_path(test_output, benchmark, bypass=False):
     return ret
 
 
+def path_cost(path, input_sets, output_set, idx_dict):
+    cost = 0
+    for contract_inds in path:
+        contract_inds = tuple(sorted(contract_inds, reverse=True))
+        contract = oe.helpers.find_contraction(contract_inds, input_sets, output_set)
+        out_inds, input_sets, idx_removed, idx_contract = contract
+        cost += oe.helpers.flop_count(idx_contract, idx_removed, len(contract_inds), idx_dict)
+    return cost
+
+
 def assert_contract_order(func, test_data, max_size, benchmark):
 
     test_output = func(test_data[0], test_data[1], test_data[2], max_size)
@@ -98,6 +111,39 @@ def test_flop_cost():
     assert 2000 == oe.helpers.flop_count("abc", True, 2, size_dict)
 
 
+def test_index_bits():
+
+    sizes_dict = {}
+    for ind, val in zip('abcdefghijklz', [2, 5, 9, 11, 13, 1, 2, 3, 4, 5, 6, 7, 0]):
+        sizes_dict[ind] = val
+
+    bits = oe.helpers.IndexBits(sizes_dict)
+    for indices in ['', 'a', 'ab', 'zbc', 'abcde', 'abcdefghijkl', 'hjl']:
+        encoded = bits.encode(indices)
+        assert bits.decode(encoded) == set(indices)
+        assert bits.size(encoded) == oe.helpers.compute_size_by_dict(indices, sizes_dict)
+        assert bits.flop_count(encoded, True, 3) == oe.helpers.flop_count(indices, True, 3, sizes_dict)
+
+    assert bits.encode('ac') | bits.encode('b') == bits.encode('abc')
+    assert bits.encode('ac') & bits.encode('cb') == bits.encode('c')
+
+
+def test_find_contraction_bits():
+
+    isets = [set('abd'), set('ac'), set('bdc')]
+    oset = set('ac')
+    bits = oe.helpers.IndexBits({k: 2 for k in 'abcd'})
+
+    for positions in [(0, 1), (0, 2), (1, 2), (0, 1, 2)]:
+        ref = oe.helpers.find_contraction(positions, isets, oset)
+        ret = oe.helpers.find_contraction_bits(positions, [bits.encode(x) for x in isets], bits.encode(oset))
+
+        assert bits.decode(ret[0]) == ref[0]
+        assert [bits.decode(x) for x in ret[1]] == ref[1]
+        assert bits.decode(ret[2]) == ref[2]
+        assert bits.decode(ret[3]) == ref[3]
+
+
 def test_path_optimal():
 
     test_func = oe.paths.optimal
@@ -107,6 +153,15 @@ def test_path_optimal():
     assert_contract_order(test_func, test_data, 0, [(0, 1, 2)])
 
 
+def test_path_dp():
+
+    test_func = oe.paths.dynamic_programming
+
+    test_data = explicit_path_tests['GEMM1']
+    assert_contract_order(test_func, test_data, 5000, [(0, 2), (0, 1)])
+    assert_contract_order(test_func, test_data, 0, [(0, 1, 2)])
+
+
 def test_path_greedy():
 
     test_func = oe.paths.greedy
@@ -129,6 +184,9 @@ def test_memory_paths():
     path_ret = oe.contract_path(expression, *views, path="greedy", memory_limit=5)
     assert check_path(path_ret[0], [(0, 1, 2, 3, 4, 5)])
 
+    path_ret = oe.contract_path(expression, *views, path="dp", memory_limit=5)
+    assert check_path(path_ret[0], [(0, 1, 2, 3, 4, 5)])
+
     # Check the possibilities, greedy is capped
     path_ret = oe.contract_path(expression, *views, path="optimal", memory_limit=-1)
     assert check_path(path_ret[0], [(0, 3), (0, 4), (0, 2), (0, 2), (0, 1)])
@@ -136,6 +194,9 @@ def test_memory_paths():
     path_ret = oe.contract_path(expression, *views, path="greedy", memory_limit=-1)
     assert check_path(path_ret[0], [(2, 4), (3, 4), (2, 3), (1, 2), (0, 1)])
 
+    path_ret = oe.contract_path(expression, *views, path="dp", memory_limit=-1)
+    assert check_path(path_ret[0], [(0, 3), (0, 4), (0, 2), (0, 2), (0, 1)])
+
 
 @pytest.mark.parametrize("alg,expression,order", path_edge_tests)
 def test_path_edge_cases(alg, expression, order):
@@ -158,6 +219,34 @@ def test_optimal_edge_cases():
     assert check_path(path, [(0, 1), (0, 1, 2, 3, 4, 5)])
 
 
+def test_optimal_bounded():
+
+    # Far too many states without the bound and deduplication
+    expression = 'ab,bc,cd,de,ef,fg,gh,hi->ai'
+    input_sets = [set(x) for x in expression.split('->')[0].split(',')]
+    output_set = set('ai')
+    size_dict = oe.helpers.default_dim_dict
+
+    optimal = oe.paths.optimal(input_sets, output_set, size_dict, int(1e20))
+    dp = oe.paths.dynamic_programming(input_sets, output_set, size_dict, int(1e20))
+    assert path_cost(optimal, input_sets, output_set, size_dict) == path_cost(dp, input_sets, output_set, size_dict)
+
+
+@pytest.mark.parametrize("expression", [
+    'abc,bdef,fghj,cem,mhk,ljk->adgl',
+    'acdf,jbje,gihb,hfac,gfac,gifabc,hfac',
+    'bca,cdb,dbf,afc->',
+])
+@pytest.mark.parametrize("memory_limit", [None, -1, 5])
+def test_optimal_parallel(expression, memory_limit):
+    views = oe.helpers.build_views(expression)
+
+    path, path_str = oe.contract_path(expression, *views, path='optimal', memory_limit=memory_limit)
+    parallel_path, path_str = oe.contract_path(
+        expression, *views, path='optimal', memory_limit=memory_limit, parallel=2)
+    assert check_path(parallel_path, path)
+
+
 def test_greedy_edge_cases():
 
     expression = "abc,cfd,dbe,efa"
@@ -169,3 +258,253 @@ def test_greedy_edge_cases():
 
     path, path_str = oe.contract_path(expression, *tensors, path='greedy', memory_limit=-1)
     assert check_path(path, [(0, 1), (0, 2), (0, 1)])
+
+
+@pytest.mark.parametrize("expression", [
+    'eb,cb,fb->cef',
+    'dd,fb,be,cdb->cef',
+    'bca,cdb,dbf,afc->',
+    'dcc,fce,ea,dbf->ab',
+    'a,ac,ab,ad,cd,bd,bc->',
+    'abc,bdef,fghj,cem,mhk,ljk->adgl',
+    'acdf,jbje,gihb,hfac,gfac,gifabc,hfac',
+    'ab,cd,ef->abcdef',
+    'ab,bcd,cd->abd',
+    'bgh,b,g,adf->gh',
+])
+@pytest.mark.parametrize("memory_limit", [None, -1, 50])
+def test_dp_matches_optimal(expression, memory_limit):
+    views = oe.helpers.build_views(expression)
+    input_subscripts, output_subscript, views = oe.parser.parse_einsum_input([expression] + views)
+    input_sets = [set(x) for x in input_subscripts.split(',')]
+    output_set = set(output_subscript)
+    size_dict = oe.helpers.default_dim_dict
+
+    memory_limit = {None: max(v.size for v in views), -1: int(1e20)}.get(memory_limit, memory_limit)
+    optimal = oe.paths.optimal(input_sets, output_set, size_dict, memory_limit)
+    dp = oe.paths.dynamic_programming(input_sets, output_set, size_dict, memory_limit)
+
+    assert len(dp) == len(optimal)
+    assert path_cost(dp, input_sets, output_set, size_dict) == path_cost(optimal, input_sets, output_set, size_dict)
+
+
+def test_dp_large():
+
+    # A ring of 12 matrices is far too large for optimal
+    chars = oe.parser.einsum_symbols
+    input_sets = [set(chars[i] + chars[(i + 1) % 12]) for i in range(12)]
+    size_dict = {c: 10 for c in chars}
+
+    path = oe.paths.dynamic_programming(input_sets, set(), size_dict, int(1e20))
+    assert len(path) == 11
+    assert path_cost(path, input_sets, set(), size_dict) < path_cost([tuple(range(12))], input_sets, set(), size_dict)
+
+
+def test_dp_outer_products_cost_model():
+
+    # Outer products lower intermediates which were too costly for the connected search
+    input_sets = [set('chk'), set('ae'), set('bf'), set('gj'), set('j'), set('defghik'), set('bdil')]
+    output_set = set('bh')
+    size_dict = {'a': 1, 'b': 2, 'c': 8, 'd': 8, 'e': 3, 'f': 5, 'g': 2, 'h': 2, 'i': 2, 'j': 1, 'k': 8, 'l': 5}
+    model = oe.costs.CostModel(byte_time=0.3)
+
+    bits = oe.helpers.IndexBits(size_dict, model)
+    input_bits = [bits.encode(x) for x in input_sets]
+    costs = []
+    for func in [oe.paths.optimal, oe.paths.dynamic_programming]:
+        path = func(input_sets, output_set, size_dict, int(1e20), cost_model=model)
+        ssa_path = oe.paths._linear_to_ssa(path, len(input_sets))
+        costs.append(oe.paths._ssa_cost(bits, input_bits, bits.encode(output_set), ssa_path))
+    assert costs[1] == pytest.approx(costs[0])
+
+
+def test_ssa_to_linear():
+    assert oe.paths.ssa_to_linear([(0, 3), (2, 4), (1, 5)]) == [(0, 3), (1, 2), (0, 1)]
+    assert oe.paths.ssa_to_linear([(0, 1), (2, 3, 4)]) == [(0, 1), (0, 1, 2)]
+
+
+def test_greedy_outer_products():
+
+    # Outer products are only formed once nothing sharing an index is left
+    input_sets = [set('ab'), set('c'), set('bd'), set('e')]
+    size_dict = {k: 2 for k in 'abcde'}
+    path = oe.paths.greedy(input_sets, set('acde'), size_dict, int(1e20))
+    assert check_path(path, [(0, 2), (0, 1), (0, 1)])
+
+
+def test_greedy_large():
+
+    # A 20x20 lattice with one index per bond
+    chars = oe.parser.einsum_symbols
+    bonds = {}
+    input_sets = []
+    for i in range(20):
+        for j in range(20):
+            term = set()
+            for neighbor in [(i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)]:
+                if (0 <= neighbor[0] < 20) and (0 <= neighbor[1] < 20):
+                    bond = tuple(sorted([(i, j), neighbor]))
+                    term.add(bonds.setdefault(bond, len(bonds)))
+            input_sets.append(term)
+    size_dict = {bond: 2 for bond in bonds.values()}
+
+    path = oe.paths.greedy(input_sets, set(), size_dict, int(1e30))
+    assert len(path) == len(input_sets) - 1
+    assert all(len(contraction) == 2 for contraction in path)
+
+
+def random_network(num_terms, seed):
+    """Terms of a random network with three bonds per term and two open indices."""
+    rng = np.random.RandomState(seed)
+    chars = itertools.count()
+
+    terms = [set() for _ in range(num_terms)]
+    for _ in range(num_terms * 3 // 2):
+        x, y = rng.choice(num_terms, 2, replace=False)
+        char = next(chars)
+        terms[x].add(char)
+        terms[y].add(char)
+
+    output_set = set()
+    for _ in range(2):
+        char = next(chars)
+        terms[rng.randint(num_terms)].add(char)
+        output_set.add(char)
+
+    size_dict = {char: int(rng.randint(2, 8)) for term in terms for char in term}
+    return terms, output_set, size_dict
+
+
+@pytest.mark.parametrize("num_terms,seed", [(10, 1), (20, 2), (30, 3)])
+def test_random_greedy(num_terms, seed):
+    input_sets, output_set, size_dict = random_network(num_terms, seed)
+
+    greedy = oe.paths.greedy(input_sets, output_set, size_dict, int(1e20))
+    path = oe.paths.random_greedy(input_sets, output_set, size_dict, int(1e20), trials=16, seed=0)
+    assert len(path) == num_terms - 1
+    assert path_cost(path, input_sets, output_set, size_dict) <= path_cost(greedy, input_sets, output_set, size_dict)
+
+    # Trials are reproducible, also when split between processes
+    assert path == oe.paths.random_greedy(input_sets, output_set, size_dict, int(1e20), trials=16, seed=0)
+    assert path == oe.paths.random_greedy(input_sets, output_set, size_dict, int(1e20), trials=16, seed=0,
+                                          parallel=2)
+
+
+def test_random_greedy_max_time():
+    input_sets, output_set, size_dict = random_network(30, 3)
+    greedy = oe.paths.greedy(input_sets, output_set, size_dict, int(1e20))
+
+    # At least one trial is run
+    path = oe.paths.random_greedy(input_sets, output_set, size_dict, int(1e20), trials=10**6, max_time=0.05)
+    assert path_cost(path, input_sets, output_set, size_dict) <= path_cost(greedy, input_sets, output_set, size_dict)
+
+
+def test_random_greedy_contract():
+    expression = 'ea,fb,abcd,gc,hd->efgh'
+    views = oe.helpers.build_views(expression)
+    ein = np.einsum(expression, *views)
+
+    assert np.allclose(ein, oe.contract(expression, *views, optimize='random-greedy'))
+
+    optimizer = oe.paths.RandomGreedy(trials=8, seed=1)
+    path, path_info = oe.contract_path(expression, *views, path=optimizer)
+    assert path == oe.contract_path(expression, *views, path=optimizer)[0]
+    assert np.allclose(ein, oe.contract(expression, *views, optimize=optimizer))
+
+
+def test_graph_partition_bisect():
+
+    # A 6x6 lattice is cut in two 6x3 halves by the 6 bonds between them
+    bonds = {}
+    input_sets = []
+    for i in range(6):
+        for j in range(6):
+            term = set()
+            for neighbor in [(i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)]:
+                if (0 <= neighbor[0] < 6) and (0 <= neighbor[1] < 6):
+                    term.add(bonds.setdefault(tuple(sorted([(i, j), neighbor])), len(bonds)))
+            input_sets.append(term)
+
+    left, right = oe.paths._bisect(list(range(36)), input_sets, dict.fromkeys(bonds.values(), 2), 0.1, 4)
+    assert (len(left), len(right)) == (18, 18)
+    assert len(set().union(*[input_sets[x] for x in left]) & set().union(*[input_sets[x] for x in right])) == 6
+
+
+@pytest.mark.parametrize("num_terms,seed", [(10, 1), (30, 3), (100, 4)])
+@pytest.mark.parametrize("leaf_size", [1, 4, 8])
+def test_graph_partition(num_terms, seed, leaf_size):
+    input_sets, output_set, size_dict = random_network(num_terms, seed)
+
+    path = oe.paths.graph_partition(input_sets, output_set, size_dict, int(1e20), leaf_size=leaf_size)
+    assert len(path) == num_terms - 1
+    assert all(len(con) == 2 for con in path)
+    assert path_cost(path, input_sets, output_set, size_dict) < path_cost([tuple(range(num_terms))], input_sets,
+                                                                          output_set, size_dict)
+
+
+def test_graph_partition_memory_limit():
+    input_sets, output_set, size_dict = random_network(30, 3)
+
+    # Intermediates over the limit are left to a final contraction
+    path = oe.paths.graph_partition(input_sets, output_set, size_dict, 100, leaf_size=4)
+    assert len(path[-1]) > 2
+    assert sum(len(con) - 1 for con in path) == 29
+
+
+def test_graph_partition_contract():
+    expression = 'acdf,jbje,gihb,hfac,gfac,gifabc,hfac'
+    views = oe.helpers.build_views(expression)
+    ein = np.einsum(expression, *views)
+
+    assert np.allclose(ein, oe.contract(expression, *views, optimize='partition'))
+    assert np.allclose(ein, oe.contract(expression, *views, optimize=oe.paths.GraphPartition(leaf_size=2)))
+
+
+@pytest.mark.parametrize("num_terms,seed", [(10, 1), (30, 3), (70, 4)])
+def test_auto(num_terms, seed):
+    input_sets, output_set, size_dict = random_network(num_terms, seed)
+    greedy = oe.paths.greedy(input_sets, output_set, size_dict, int(1e20))
+    greedy_cost = path_cost(greedy, input_sets, output_set, size_dict)
+
+    # Without a budget only the greedy path is found
+    assert oe.paths.auto(input_sets, output_set, size_dict, int(1e20), max_time=0) == greedy
+
+    path = oe.paths.auto(input_sets, output_set, size_dict, int(1e20), max_time=0.05, seed=0)
+    assert len(path) == num_terms - 1
+    assert path_cost(path, input_sets, output_set, size_dict) <= greedy_cost
+
+
+def test_auto_exact():
+    input_sets, output_set, size_dict = random_network(10, 1)
+    dp = oe.paths.dynamic_programming(input_sets, output_set, size_dict, int(1e20))
+
+    path = oe.paths.auto(input_sets, output_set, size_dict, int(1e20), max_time=10)
+    assert path_cost(path, input_sets, output_set, size_dict) == path_cost(dp, input_sets, output_set, size_dict)
+
+
+def test_auto_max_time():
+    input_sets, output_set, size_dict = random_network(30, 3)
+
+    start = time.time()
+    oe.paths.auto(input_sets, output_set, size_dict, int(1e20), max_time=0.1)
+    assert 0.1 <= time.time() - start < 1.0
+
+
+def test_graph_partition_deadline():
+    input_sets, output_set, size_dict = random_network(100, 4)
+
+    # The partition of ``auto`` gives up once its deadline has passed
+    with pytest.raises(oe.paths._SearchTimeout):
+        oe.paths._graph_partition(input_sets, output_set, size_dict, int(1e20), deadline=time.time())
+
+    path = oe.paths._graph_partition(input_sets, output_set, size_dict, int(1e20), deadline=time.time() + 60)
+    assert path == oe.paths.graph_partition(input_sets, output_set, size_dict, int(1e20))
+
+
+def test_auto_contract():
+    expression = 'acdf,jbje,gihb,hfac,gfac,gifabc,hfac'
+    views = oe.helpers.build_views(expression)
+    ein = np.einsum(expression, *views)
+
+    assert np.allclose(ein, oe.contract(expression, *views, optimize='auto'))
+    assert np.allclose(ein, oe.contract(expression, *views, optimize=oe.paths.Auto(max_time=0.01, seed=0)))
@@ -0,0 +1,165 @@
+"""
+Tests the slicing of contractions to fit a memory limit.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+import sys
+
+import numpy as np
+import pytest
+
+import opt_einsum as oe
+
+tests = [
+    'abcd,cdef,efgh,ghij->abij',
+    'ea,fb,abcd,gc,hd->efgh',
+    'abc,bcd,dea->',
+    'chd,bde,agbc,hiad,hgc,hgi,hiad',
+    'baa,dcf,af,cde->be',
+    'ab,bc,cd,de,ef->af',
+]
+
+
+def test_path_costs():
+    isets = [set('ab'), set('bc'), set('cd')]
+    sizes = {'a': 2, 'b': 3, 'c': 4, 'd': 5}
+    assert oe.slicing.path_costs(isets, set('ad'), [(0, 1), (0, 1)], sizes) == (128, 8)
+
+    # Slicing 'c' leaves a single column of the intermediate
+    sizes['c'] = 1
+    assert oe.slicing.path_costs(isets, set('ad'), [(0, 1), (0, 1)], sizes) == (32, 2)
+
+
+def test_find_slices():
+    isets = [set('ab'), set('bc'), set('cd')]
+    sizes = {'a': 2, 'b': 3, 'c': 4, 'd': 5}
+    assert oe.slicing.find_slices(isets, set('ad'), [(0, 1), (0, 1)], sizes, 8) == ''
+    assert oe.slicing.find_slices(isets, set('ad'), [(0, 1), (0, 1)], sizes, 4) == 'c'
+    assert oe.slicing.find_slices(isets, set('ad'), [(0, 1), (0, 1)], sizes, 1) == 'ca'
+
+
+def test_slice_sizes():
+    isets = [set('ab'), set('bc'), set('cd')]
+    sizes = {'a': 2, 'b': 3, 'c': 4, 'd': 5}
+    assert oe.slicing.slice_sizes(isets, set('ad'), [(0, 1), (0, 1)], sizes, 'c', 4) == {'c': 2}
+    assert oe.slicing.slice_sizes(isets, set('ad'), [(0, 1), (0, 1)], sizes, 'ca', 1) == {'c': 1, 'a': 1}
+    assert oe.slicing.count_slices({'c': 3}, sizes) == 2
+
+
+def test_sliced_path_info():
+    expression = 'abcd,cdef,efgh,ghij->abij'
+    views = oe.helpers.build_views(expression, dict.fromkeys(expression, 6))
+
+    path, path_info = oe.contract_path(expression, *views, memory_limit=200, slicing=True)
+    assert path_info.sliced_inds
+    assert path_info.sliced_largest_intermediate <= 200
+    assert set(path_info.sliced_sizes) == set(path_info.sliced_inds)
+    assert path_info.num_slices == oe.slicing.count_slices(path_info.sliced_sizes, path_info.dimension_dict)
+    assert 1 < path_info.num_slices < 6**len(path_info.sliced_inds)
+    assert path_info.slicing_overhead >= 1
+    assert "Sliced indices" in str(path_info)
+
+    # The path itself is the one found without a memory limit
+    assert path == oe.contract_path(expression, *views, memory_limit=-1)[0]
+
+    path, path_info = oe.contract_path(expression, *views, memory_limit=200)
+    assert path_info.sliced_inds == ''
+    assert "Sliced indices" not in str(path_info)
+
+
+@pytest.mark.parametrize("string", tests)
+@pytest.mark.parametrize("memory_limit", [1, 10, 100])
+@pytest.mark.parametrize("use_blas", [False, True])
+def test_sliced_contract(string, memory_limit, use_blas):
+    views = oe.helpers.build_views(string)
+    ein = np.einsum(string, *views)
+
+    opt = oe.contract(string, *views, memory_limit=memory_limit, slicing=True, use_blas=use_blas)
+    assert np.allclose(ein, opt)
+
+    out = np.empty_like(ein)
+    oe.contract(string, *views, memory_limit=memory_limit, slicing=True, use_blas=use_blas, out=out)
+    assert np.allclose(ein, out)
+
+
+@pytest.mark.parametrize("string", tests)
+@pytest.mark.parametrize("n_workers", [2, 3])
+def test_sliced_contract_threads(string, n_workers):
+    views = oe.helpers.build_views(string)
+    ein = np.einsum(string, *views)
+
+    opt = oe.contract(string, *views, memory_limit=10, slicing=True, n_workers=n_workers)
+    assert np.allclose(ein, opt)
+
+
+def test_sliced_contract_executor():
+    from concurrent.futures import ThreadPoolExecutor
+
+    string = 'abc,bcd,dea->'
+    views = oe.helpers.build_views(string)
+    ein = np.einsum(string, *views)
+
+    with ThreadPoolExecutor(2) as executor:
+        for _ in range(2):
+            out = np.empty_like(ein)
+            oe.contract(string, *views, memory_limit=1, slicing=True, executor=executor, out=out)
+            assert np.allclose(ein, out)
+
+
+@pytest.mark.parametrize("string", tests)
+@pytest.mark.parametrize("order", ['C', 'F'])
+def test_streamed_contract(string, order):
+    views = [np.asarray(x, order=order) for x in oe.helpers.build_views(string)]
+    ein = np.einsum(string, *views)
+
+    for memory_limit in [1, 10, None]:
+        opt = oe.contract(string, *views, memory_limit=memory_limit, streaming=True)
+        assert np.allclose(ein, opt)
+
+
+def test_streamed_contract_memmap(tmpdir):
+    string = 'ijk,kl,jm->iml'
+    shapes = [(100, 5, 4), (4, 3), (5, 2)]
+    views = [np.random.rand(*shape) for shape in shapes]
+    ein = np.einsum(string, *views)
+
+    filename = str(tmpdir.join('operand.npy'))
+    np.save(filename, views[0])
+    operand = np.load(filename, mmap_mode='r')
+
+    out = np.lib.format.open_memmap(str(tmpdir.join('out.npy')), mode='w+', dtype=ein.dtype, shape=ein.shape)
+    result = oe.contract(string, operand, views[1], views[2], memory_limit=60, streaming=True, out=out)
+    assert result is out
+    assert np.allclose(ein, np.load(str(tmpdir.join('out.npy'))))
+
+    # The blocked index is summed over
+    opt = oe.contract('ijk,kl,jm->ml', operand, views[1], views[2], memory_limit=60, streaming=True)
+    assert np.allclose(np.einsum('ijk,kl,jm->ml', *views), opt)
+
+
+def test_streamed_contract_path(monkeypatch):
+    views = [np.random.rand(400, 40), np.random.rand(40, 40), np.random.rand(40, 40)]
+    ein = np.einsum('ab,bc,cd->ad', *views)
+
+    # The memory limit sizes the blocks, the path is still pairwise even
+    # though every pairwise intermediate exceeds it
+    module = sys.modules['opt_einsum.contract']
+    contract_slices = module._contract_slices
+    paths = []
+
+    def record(operands, path_info, selections, *args, **kwargs):
+        paths.append((path_info.path, len(selections)))
+        return contract_slices(operands, path_info, selections, *args, **kwargs)
+
+    monkeypatch.setattr(module, '_contract_slices', record)
+    opt = oe.contract('ab,bc,cd->ad', *views, memory_limit=1000, streaming=True)
+    assert np.allclose(ein, opt)
+    assert all(len(step) == 2 for step in paths[0][0])
+    assert paths[0][1] == 16
+
+    # Without a memory limit intermediates may exceed the largest operand
+    views = oe.helpers.build_views('ab,ac,ad,bcd->', {'a': 20, 'b': 10, 'c': 10, 'd': 10})
+    opt = oe.contract('ab,ac,ad,bcd->', *views, streaming=True)
+    assert np.allclose(np.einsum('ab,ac,ad,bcd->', *views), opt)
+    assert all(len(step) == 2 for step in paths[1][0])